@@ -0,0 +1,72 @@
+import json
+import os
+import unittest
+from hashlib import sha256
+from anchorpy import Idl, Program, Provider, Wallet
+from solana.keypair import Keypair
+from solana.rpc.async_api import AsyncClient
+from ...public.src.pyaver.account_decoders import get_account_decoders
+from ...public.src.pyaver.enums import AccountTypes
+from ...public.src.pyaver.utils import parse_with_version, get_version_of_account_type_in_program
+
+IDL_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'public', 'src', 'pyaver', 'idl', '6q5ZGhEj6kkmEjuyCXuH4x8493bpi9fNzvy9L8hX83HQ.json')
+
+def load_program():
+    with open(IDL_PATH) as f:
+        idl = Idl.from_json(json.load(f))
+    provider = Provider(AsyncClient('http://localhost:8899'), Wallet(Keypair()))
+    return Program(idl, Keypair().public_key, provider)
+
+def account_bytes(name: str, version: int, size: int = 2_000):
+    """
+    Zero-filled account data with the discriminator of name and the given version byte
+    """
+    return sha256(bytes(f'account:{name}', 'utf-8')).digest()[0:8] + bytes([version]) + bytes(size)
+
+def decode_with_anchor(program: Program, account_type: AccountTypes, data: bytes):
+    """
+    Previous implementation of parse_with_version, probing the program and rewriting the discriminator on every call
+    """
+    version = data[8]
+    latest_version = 0
+    while program.account.get(f'{account_type.value}V{latest_version}') is not None:
+        latest_version += 1
+    if(version == latest_version or program.account.get(f'{account_type.value}V{version}') is None):
+        return program.account[account_type.value].coder.accounts.decode(data)
+    name = f'{account_type.value}V{version}'
+    return program.account[name].coder.accounts.decode(sha256(bytes(f'account:{name}', 'utf-8')).digest()[0:8] + data[8:])
+
+
+class TestAccountDecoders(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def test_latest_versions(self):
+        for account_type in AccountTypes:
+            expected = 1 if account_type != AccountTypes.USER_HOST_LIFETIME else 0
+            self.assertEqual(get_version_of_account_type_in_program(account_type, self.program), expected)
+
+    def test_matches_anchor_decoding(self):
+        for account_type in AccountTypes:
+            for version in range(3):
+                data = account_bytes(account_type.value, version)
+                self.assertEqual(parse_with_version(self.program, account_type, data), decode_with_anchor(self.program, account_type, data))
+
+    def test_other_discriminators_fall_back_to_anchor(self):
+        host = account_bytes('Host', 1)
+        self.assertEqual(parse_with_version(self.program, AccountTypes.MARKET, host), decode_with_anchor(self.program, AccountTypes.MARKET, host))
+
+        unknown = account_bytes('Unknown', 1)
+        with self.assertRaises(Exception):
+            decode_with_anchor(self.program, AccountTypes.MARKET, unknown)
+        with self.assertRaises(Exception):
+            parse_with_version(self.program, AccountTypes.MARKET, unknown)
+
+    def test_compiled_once_per_program(self):
+        decoders = get_account_decoders(self.program)
+        self.assertIs(get_account_decoders(self.program), decoders)
+        self.assertIsNot(get_account_decoders(load_program()), decoders)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import base64
+import unittest
+from solana.keypair import Keypair
+from ...public.src.pyaver.utils import FetchPlan, chunk_accounts_by_size, load_multiple_account_states, load_multiple_bytes_data
+
+class FakeConnection():
+    """
+    Answers getMultipleAccounts with the public key bytes of each account as data, tracking the requests in flight
+    """
+    def __init__(self, missing: set = set()):
+        self.missing = missing
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fetched = []
+
+    async def get_multiple_accounts(self, pubkeys):
+        self.requests.append(len(pubkeys))
+        self.fetched += list(pubkeys)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later chunks answer first, results must still come back in order
+        await asyncio.sleep(0.01 / len(self.requests))
+        self.in_flight -= 1
+        return {'result': {'value': [
+            None if p in self.missing else {'data': [base64.b64encode(bytes(p)).decode('ascii'), 'base64'], 'lamports': 1}
+            for p in pubkeys
+        ]}}
+
+
+class TestAccountLoading(unittest.TestCase):
+
+    def test_chunk_accounts_by_size(self):
+        self.assertEqual(chunk_accounts_by_size([]), [])
+        self.assertEqual(chunk_accounts_by_size([1] * 250), [(0, 100), (100, 200), (200, 250)])
+        self.assertEqual(chunk_accounts_by_size([10, 10, 50, 10, 100, 5], 100, 60), [(0, 2), (2, 4), (4, 5), (5, 6)])
+        self.assertEqual(chunk_accounts_by_size([10, 10, 10], 2, 1_000), [(0, 2), (2, 3)])
+
+    def test_load_multiple_bytes_data(self):
+        pubkeys = [Keypair().public_key for _ in range(530)]
+        conn = FakeConnection(missing={pubkeys[3], pubkeys[401]})
+
+        data = asyncio.run(load_multiple_bytes_data(conn, pubkeys, max_concurrent_requests=3))
+        self.assertEqual(data, [None if p in conn.missing else bytes(p) for p in pubkeys])
+        self.assertEqual(sorted(conn.requests), [30, 100, 100, 100, 100, 100])
+        self.assertEqual(conn.max_in_flight, 3)
+
+        full = asyncio.run(load_multiple_bytes_data(conn, pubkeys[:5], [b'previous'], False))
+        self.assertEqual(full[0], b'previous')
+        self.assertEqual([d['data'] if d else None for d in full[1:]], [bytes(pubkeys[0]), bytes(pubkeys[1]), bytes(pubkeys[2]), None, bytes(pubkeys[4])])
+
+    def test_load_multiple_bytes_data_by_size(self):
+        pubkeys = [Keypair().public_key for _ in range(20)]
+        conn = FakeConnection()
+        data = asyncio.run(load_multiple_bytes_data(conn, pubkeys, expected_sizes=[400_000] * 10 + [100] * 10))
+        self.assertEqual(data, [bytes(p) for p in pubkeys])
+        self.assertEqual(conn.requests, [2, 2, 2, 2, 12])
+        self.assertEqual(asyncio.run(load_multiple_bytes_data(conn, [])), [])
+
+    def test_fetch_plan(self):
+        a, b, c = [Keypair().public_key for _ in range(3)]
+        conn = FakeConnection(missing={c})
+        plan = FetchPlan()
+        first = plan.add([a, b, a])
+        second = plan.add([b, c], expected_size=400_000)
+        self.assertEqual(plan.pubkeys, [a, b, c])
+        self.assertEqual(plan.expected_sizes, [1_000, 400_000, 400_000])
+        self.assertEqual((plan.requested, plan.fetches_saved), (5, 2))
+        with self.assertRaises(Exception):
+            plan.get(first)
+
+        asyncio.run(plan.load(conn, is_only_getting_data=True))
+        self.assertEqual(plan.get(first), [bytes(a), bytes(b), bytes(a)])
+        self.assertEqual(plan.get(second), [bytes(b), None])
+        self.assertEqual(conn.fetched, [a, b, c])
+
+    def test_load_multiple_account_states_fetches_each_account_once(self):
+        class Client():
+            quote_token = Keypair().public_key
+            decode_cache = None
+            decode_executor = None
+        owners = [Keypair().public_key for _ in range(3)]
+        user_pubkeys = owners * 10
+        client = Client()
+        client.provider = Client()
+        client.provider.connection = FakeConnection()
+
+        states = asyncio.run(load_multiple_account_states(client, [], [], [], [], user_pubkeys))
+        # Each owner and its ATA once
+        self.assertEqual(len(client.provider.connection.fetched), 6)
+        self.assertEqual(states['fetches_saved'], 54)
+        self.assertEqual([(b.lamport_balance, b.token_balance) for b in states['user_balance_states']], [(1, 0)] * 30)
+
+if __name__ == '__main__':
+    unittest.main()
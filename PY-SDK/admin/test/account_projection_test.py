@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import random
+import struct
+import unittest
+from solana.keypair import Keypair
+from ...public.src.pyaver.account_decoders import get_account_decoders
+from ...public.src.pyaver.enums import AccountTypes, MarketStatus
+from ...public.src.pyaver.event_queue import load_event_queue_headers
+from ...public.src.pyaver.layouts import EVENT_QUEUE_HEADER_LAYOUT
+from ...public.src.pyaver.market import AverMarket, MARKET_STATUS_FIELDS
+from .account_decoders_test import load_program
+from .fast_decoders_test import random_account
+
+def random_market(rng: random.Random, program, version: int):
+    name = 'Market' if version == 1 else f'MarketV{version}'
+    data = bytearray(random_account(rng, program, name))
+    data[8] = version
+    # market_status follows version (and the u16 category, sub_category, series and event since version 1)
+    data[17 if version == 1 else 9] = rng.randrange(len(MarketStatus))
+    return bytes(data)
+
+class SlicingConnection():
+    """
+    Answers getMultipleAccounts with the requested slice of each account, tracking the slices requested
+    """
+    def __init__(self, accounts: dict, owner):
+        self.accounts = accounts
+        self.owner = owner
+        self.slices = []
+
+    async def get_multiple_accounts(self, pubkeys, data_slice=None):
+        self.slices.append(data_slice)
+        value = []
+        for p in pubkeys:
+            data = self.accounts.get(p)
+            if(data is None):
+                value.append(None)
+                continue
+            if(data_slice is not None):
+                data = data[data_slice.offset:data_slice.offset + data_slice.length]
+            value.append({'data': [base64.b64encode(data).decode('ascii'), 'base64'], 'owner': str(self.owner), 'lamports': 1})
+        return {'result': {'value': value}}
+
+class ProgramsClient():
+    def __init__(self, connection, program):
+        self.connection = connection
+        self.programs = [program]
+
+    async def get_program_from_program_id(self, program_id):
+        return self.programs[0]
+
+
+class TestAccountProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def test_projection_matches_full_decode(self):
+        rng = random.Random(0)
+        projection = get_account_decoders(self.program).get_projection(AccountTypes.MARKET, MARKET_STATUS_FIELDS)
+        self.assertLess(projection.length, 64)
+        for version in [0, 1]:
+            for _ in range(20):
+                data = random_market(rng, self.program, version)
+                full = get_account_decoders(self.program).decode(AccountTypes.MARKET, data)
+                self.assertEqual(projection.decode(data[:projection.length]), {n: getattr(full, n) for n in MARKET_STATUS_FIELDS})
+        self.assertIs(get_account_decoders(self.program).get_projection(AccountTypes.MARKET, MARKET_STATUS_FIELDS), projection)
+
+    def test_unbounded_fields_cannot_be_projected(self):
+        with self.assertRaises(Exception):
+            get_account_decoders(self.program).get_projection(AccountTypes.MARKET, ['outcome_names'])
+
+    def test_load_multiple_status(self):
+        rng = random.Random(1)
+        pubkeys = [Keypair().public_key for _ in range(6)]
+        accounts = {p: random_market(rng, self.program, i % 2) for i, p in enumerate(pubkeys[:-1])}
+        conn = SlicingConnection(accounts, self.program.program_id)
+
+        statuses = asyncio.run(AverMarket.load_multiple_status(ProgramsClient(conn, self.program), pubkeys))
+        self.assertIsNone(statuses[-1])
+        for p, status in zip(pubkeys, statuses):
+            if(p not in accounts):
+                continue
+            full = get_account_decoders(self.program).decode(AccountTypes.MARKET, accounts[p])
+            self.assertIsInstance(status.market_status, MarketStatus)
+            self.assertEqual(status.market_status, full.market_status)
+            self.assertEqual(status.trading_cease_time, full.trading_cease_time)
+            self.assertEqual(status.in_play_start_time, full.in_play_start_time)
+        self.assertEqual([s.offset for s in conn.slices], [0])
+        self.assertLess(conn.slices[0].length, 64)
+
+    def test_load_event_queue_headers(self):
+        pubkeys = [Keypair().public_key for _ in range(3)]
+        headers = [(2, 5 * i, i, 88, 1_000 + i) for i in range(2)]
+        accounts = {p: struct.pack('<BQQQQ', *h) + bytes(10_000) for p, h in zip(pubkeys, headers)}
+        conn = SlicingConnection(accounts, Keypair().public_key)
+
+        loaded = asyncio.run(load_event_queue_headers(conn, pubkeys))
+        self.assertEqual([(h.account_tag, h.head, h.count, h.event_size, h.seq_num) for h in loaded[:2]], headers)
+        self.assertIsNone(loaded[2])
+        self.assertEqual([(s.offset, s.length) for s in conn.slices], [(0, 33)])
+        self.assertEqual(loaded[0], EVENT_QUEUE_HEADER_LAYOUT.parse(accounts[pubkeys[0]]))
+
+if __name__ == '__main__':
+    unittest.main()
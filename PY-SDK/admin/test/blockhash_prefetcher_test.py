@@ -0,0 +1,122 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from solana.keypair import Keypair
+from solana.rpc.types import TxOpts
+from solana.transaction import TransactionInstruction
+from ...public.src.pyaver.blockhash_prefetcher import BlockhashPrefetcher
+from ...public.src.pyaver.cluster_clock import ClockSample, ClusterClock
+from ...public.src.pyaver.constants import BLOCKHASH_EXPIRY_MARGIN_SLOTS, FAST_SEND_OPTIONS, MAX_BLOCKHASH_AGE_SLOTS
+from ...public.src.pyaver.utils import sign_and_send_transaction_instructions
+
+class SendingConnection():
+    """
+    Serves a new blockhash on every getRecentBlockhash and records the transactions sent
+
+    The first sends (as many as failures) fail with a Blockhash not found error
+    """
+    def __init__(self, slot: int = 1_000, failures: int = 0):
+        self.slot = slot
+        self.failures = failures
+        self.blockhashes = []
+        self.sent = []
+
+    async def get_recent_blockhash(self, commitment=None):
+        await asyncio.sleep(0)
+        self.blockhashes.append(str(Keypair().public_key))
+        return {'result': {'context': {'slot': self.slot}, 'value': {'blockhash': self.blockhashes[-1]}}}
+
+    async def send_transaction(self, tx, *signers, opts=None, recent_blockhash=None):
+        if(self.failures > 0):
+            self.failures -= 1
+            raise Exception("{'code': -32002, 'message': 'Transaction simulation failed: Blockhash not found'}")
+        self.sent.append((recent_blockhash, opts))
+        return {'result': 'signature'}
+
+    @property
+    def requests(self):
+        return len(self.blockhashes) + len(self.sent)
+
+def client(conn: SendingConnection):
+    return SimpleNamespace(
+        provider=SimpleNamespace(connection=conn, opts=TxOpts()),
+        blockhashes=BlockhashPrefetcher(conn, refresh_interval=60),
+        programs=[None],
+    )
+
+def instruction():
+    return TransactionInstruction(keys=[], program_id=Keypair().public_key, data=b'\x01')
+
+
+class TestBlockhashPrefetcher(unittest.TestCase):
+
+    def test_one_request_per_order(self):
+        conn = SendingConnection()
+        aver_client = client(conn)
+        payer = Keypair()
+        async def run():
+            for _ in range(10):
+                await sign_and_send_transaction_instructions(aver_client, [], payer, [instruction()], FAST_SEND_OPTIONS)
+            aver_client.blockhashes.stop()
+        asyncio.run(run())
+        # A single blockhash fetched for the first order
+        self.assertEqual(conn.requests, 11)
+        self.assertEqual(conn.sent, [(conn.blockhashes[0], FAST_SEND_OPTIONS)] * 10)
+
+    def test_concurrent_requests_share_one_fetch(self):
+        conn = SendingConnection()
+        async def run():
+            prefetcher = BlockhashPrefetcher(conn)
+            blockhashes = await asyncio.gather(*[prefetcher.get() for _ in range(20)])
+            prefetcher.stop()
+            return blockhashes
+        blockhashes = asyncio.run(run())
+        self.assertEqual(len(conn.blockhashes), 1)
+        self.assertEqual(set(blockhashes), {conn.blockhashes[0]})
+
+    def test_expiry_follows_the_cluster_slot(self):
+        conn = SendingConnection(slot=1_000)
+        clock = ClusterClock(None)
+        async def run():
+            prefetcher = BlockhashPrefetcher(conn, clock)
+            clock.add_sample(ClockSample(1_000 + MAX_BLOCKHASH_AGE_SLOTS - BLOCKHASH_EXPIRY_MARGIN_SLOTS - 10, 0, time.monotonic()))
+            first = await prefetcher.get()
+            usable = prefetcher.is_usable()
+            clock.add_sample(ClockSample(1_000 + MAX_BLOCKHASH_AGE_SLOTS - BLOCKHASH_EXPIRY_MARGIN_SLOTS, 0, time.monotonic()))
+            expiring = prefetcher.is_usable()
+            second = await prefetcher.get()
+            prefetcher.stop()
+            return first, usable, expiring, second
+        first, usable, expiring, second = asyncio.run(run())
+        self.assertTrue(usable)
+        self.assertFalse(expiring)
+        self.assertEqual([first, second], conn.blockhashes)
+
+    def test_rejected_blockhash_is_refetched(self):
+        conn = SendingConnection(failures=1)
+        aver_client = client(conn)
+        async def run():
+            await sign_and_send_transaction_instructions(aver_client, [], Keypair(), [instruction()], manual_max_retry=1)
+            aver_client.blockhashes.stop()
+        asyncio.run(run())
+        self.assertEqual(len(conn.blockhashes), 2)
+        self.assertEqual(conn.sent, [(conn.blockhashes[1], aver_client.provider.opts)])
+
+    def test_background_refresh(self):
+        conn = SendingConnection()
+        async def run():
+            prefetcher = BlockhashPrefetcher(conn, refresh_interval=0.01)
+            await prefetcher.get()
+            await asyncio.sleep(0.1)
+            prefetcher.stop()
+            fetched = len(conn.blockhashes)
+            await asyncio.sleep(0.05)
+            return prefetcher, fetched
+        prefetcher, fetched = asyncio.run(run())
+        self.assertGreater(fetched, 2)
+        self.assertEqual(len(conn.blockhashes), fetched)
+        self.assertEqual(prefetcher.latest.blockhash, conn.blockhashes[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import struct
+import time
+import unittest
+from types import SimpleNamespace
+from ...public.src.pyaver.cluster_clock import ClockSample, ClusterClock
+from ...public.src.pyaver.data_classes import MarketStatusState
+from ...public.src.pyaver.enums import MarketStatus
+from ...public.src.pyaver.market import AverMarket
+
+class ClockConnection():
+    """
+    Answers getAccountInfo for the clock sysvar with a cluster clock running from unix_timestamp and slot, counting the requests
+    """
+    def __init__(self, unix_timestamp: int = 1_700_000_000, slot: int = 200_000_000):
+        self.unix_timestamp = unix_timestamp
+        self.slot = slot
+        self.started = time.monotonic()
+        self.requests = 0
+
+    async def get_account_info(self, pubkey):
+        self.requests += 1
+        await asyncio.sleep(0)
+        elapsed = time.monotonic() - self.started
+        data = struct.pack('<QqQQq', self.slot + int(elapsed / 0.4), 0, 500, 501, self.unix_timestamp + int(elapsed))
+        return {'result': {'value': {'data': [base64.b64encode(data).decode('ascii'), 'base64']}}}
+
+
+class TestClusterClock(unittest.TestCase):
+
+    def test_interpolates_with_drift(self):
+        clock = ClusterClock(None)
+        # The cluster clock runs 2% faster than the local clock, with a 1 second resolution
+        for t in range(0, 100, 10):
+            clock.add_sample(ClockSample(1_000 + int(t / 0.5), 1_000 + int(1.02 * t), t))
+        self.assertAlmostEqual(clock.estimate_unix_timestamp(120), 1_000 + 1.02 * 120, delta=1)
+        self.assertAlmostEqual(clock.estimate_slot(120), 1_000 + 120 / 0.5, delta=3)
+
+    def test_default_rates(self):
+        clock = ClusterClock(None)
+        with self.assertRaises(Exception):
+            clock.estimate_unix_timestamp()
+        clock.add_sample(ClockSample(100, 1_000, 50))
+        # A second sample too close to estimate rates from
+        clock.add_sample(ClockSample(101, 1_001, 51))
+        self.assertEqual(clock.estimate_unix_timestamp(61), 1_011)
+        self.assertEqual(clock.estimate_slot(61), 101 + 25)
+
+    def test_samples_only_when_stale(self):
+        async def run():
+            conn = ClockConnection()
+            clock = ClusterClock(conn, refresh_interval=60)
+            timestamps = await asyncio.gather(*[clock.unix_timestamp() for _ in range(20)])
+            slot = await clock.slot()
+            first_requests = conn.requests
+            clock.refresh_interval = 0
+            await clock.unix_timestamp()
+            return conn, timestamps, slot, first_requests
+        conn, timestamps, slot, first_requests = asyncio.run(run())
+        self.assertEqual(first_requests, 1)
+        self.assertEqual(conn.requests, 2)
+        self.assertTrue(all(abs(t - conn.unix_timestamp) < 2 for t in timestamps))
+        self.assertLess(abs(slot - conn.slot), 5)
+
+    def test_implied_market_statuses_share_one_sample(self):
+        now = 1_700_000_000
+        states = [
+            MarketStatusState(MarketStatus.ACTIVE_PRE_EVENT, now + 100, None),
+            MarketStatusState(MarketStatus.ACTIVE_PRE_EVENT, now + 100, now - 100),
+            MarketStatusState(MarketStatus.ACTIVE_IN_PLAY, now - 100, now - 200),
+            MarketStatusState(MarketStatus.HALTED_PRE_EVENT, now + 100, now + 50),
+        ] * 125
+        conn = ClockConnection(now)
+        aver_client = SimpleNamespace(clock=ClusterClock(conn))
+        markets = [SimpleNamespace(market_state=s, aver_client=aver_client) for s in states]
+
+        async def run():
+            statuses = await AverMarket.get_implied_market_statuses(aver_client, markets)
+            single = await AverMarket.get_implied_market_status(markets[1])
+            return statuses, single
+        statuses, single = asyncio.run(run())
+        self.assertEqual(statuses[:4], [MarketStatus.ACTIVE_PRE_EVENT, MarketStatus.ACTIVE_IN_PLAY, MarketStatus.TRADING_CEASED, MarketStatus.HALTED_PRE_EVENT])
+        self.assertEqual(statuses, statuses[:4] * 125)
+        self.assertEqual(single, MarketStatus.ACTIVE_IN_PLAY)
+        self.assertEqual(conn.requests, 1)
+
+    def test_background_sampling(self):
+        async def run():
+            conn = ClockConnection()
+            clock = ClusterClock(conn, refresh_interval=0.01)
+            clock.start()
+            await asyncio.sleep(0.1)
+            clock.stop()
+            requests = conn.requests
+            await asyncio.sleep(0.05)
+            return conn, clock, requests
+        conn, clock, requests = asyncio.run(run())
+        self.assertGreater(requests, 2)
+        self.assertEqual(conn.requests, requests)
+        self.assertEqual(len(clock.samples), min(requests, clock.samples.maxlen))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from solana.keypair import Keypair
+from .slab_test import build_slab_bytes, random_orders
+from ...public.src.pyaver.decode_cache import DecodeCache
+from ...public.src.pyaver.slab import Slab
+
+class TestDecodeCache(unittest.TestCase):
+
+    def test_unchanged_data_is_not_decoded_again(self):
+        cache = DecodeCache()
+        pubkey = Keypair().public_key
+        buffer = build_slab_bytes(random_orders(50, seed=1))
+        decoded = []
+        decode = lambda data: decoded.append(data) or Slab.from_bytes(data)
+
+        first = cache.get_or_decode(pubkey, 'slab', buffer, decode)
+        second = cache.get_or_decode(pubkey, 'slab', bytes(bytearray(buffer)), decode)
+        self.assertIs(first, second)
+        self.assertEqual(len(decoded), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+        changed = build_slab_bytes(random_orders(50, seed=2))
+        third = cache.get_or_decode(pubkey, 'slab', changed, decode)
+        self.assertIsNot(third, first)
+        self.assertEqual([n.key for n in third.items()], sorted(o[0] for o in random_orders(50, seed=2)))
+
+        cache.get_or_decode(Keypair().public_key, 'slab', buffer, decode)
+        cache.get_or_decode(pubkey, 'other', buffer, decode)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_lru_eviction(self):
+        cache = DecodeCache(max_size=2)
+        pubkeys = [Keypair().public_key for _ in range(3)]
+        cache.get_or_decode(pubkeys[0], 'raw', b'a', bytes)
+        cache.get_or_decode(pubkeys[1], 'raw', b'b', bytes)
+        # Touch the first entry so the second one is the least recently used
+        cache.get_or_decode(pubkeys[0], 'raw', b'a', bytes)
+        cache.get_or_decode(pubkeys[2], 'raw', b'c', bytes)
+        self.assertEqual(len(cache), 2)
+
+        cache.get_or_decode(pubkeys[0], 'raw', b'a', bytes)
+        self.assertEqual(cache.hits, 2)
+        cache.get_or_decode(pubkeys[1], 'raw', b'b', bytes)
+        self.assertEqual(cache.misses, 4)
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
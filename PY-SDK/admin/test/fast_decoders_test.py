@@ -0,0 +1,80 @@
+import random
+import struct
+import unittest
+from anchorpy.idl import _IdlTypeArray, _IdlTypeDefined, _IdlTypeDefTyStruct, _IdlTypeOption, _IdlTypeVec
+from solana.keypair import Keypair
+from ...public.src.pyaver.enums import AccountTypes
+from ...public.src.pyaver.fast_decoders import compile_account_decoder
+from .account_decoders_test import load_program
+
+INT_FORMATS = {'u8': 'B', 'i8': 'b', 'u16': 'H', 'i16': 'h', 'u32': 'I', 'i32': 'i', 'u64': 'Q', 'i64': 'q'}
+
+def random_borsh(rng: random.Random, program, type_, vec_length: int = 3):
+    """
+    Random Borsh bytes for an IDL type, written independently of anchor
+    """
+    if(isinstance(type_, str)):
+        if(type_ in INT_FORMATS):
+            size = struct.calcsize(INT_FORMATS[type_])
+            signed = type_.startswith('i')
+            value = rng.randint(-2 ** (8 * size - 1), 2 ** (8 * size - 1) - 1) if signed else rng.randint(0, 2 ** (8 * size) - 1)
+            return struct.pack('<' + INT_FORMATS[type_], value)
+        if(type_ == 'bool'):
+            return bytes([rng.randint(0, 1)])
+        if(type_ in ['u128', 'i128']):
+            return rng.getrandbits(128).to_bytes(16, 'little')
+        if(type_ == 'publicKey'):
+            return bytes(Keypair().public_key)
+        if(type_ == 'string'):
+            text = ''.join(rng.choice('abcdé ⚽') for _ in range(rng.randint(0, 12))).encode('utf-8')
+            return struct.pack('<I', len(text)) + text
+    if(isinstance(type_, _IdlTypeOption)):
+        return b'\x00' if rng.random() < 0.3 else b'\x01' + random_borsh(rng, program, type_.option, vec_length)
+    if(isinstance(type_, _IdlTypeVec)):
+        return struct.pack('<I', vec_length) + b''.join(random_borsh(rng, program, type_.vec, vec_length) for _ in range(vec_length))
+    if(isinstance(type_, _IdlTypeArray)):
+        return b''.join(random_borsh(rng, program, type_.array[0], vec_length) for _ in range(type_.array[1]))
+    if(isinstance(type_, _IdlTypeDefined)):
+        typedef = next(t for t in program.idl.types if t.name == type_.defined)
+        if(isinstance(typedef.type, _IdlTypeDefTyStruct)):
+            return b''.join(random_borsh(rng, program, f.type, vec_length) for f in typedef.type.fields)
+        return bytes([rng.randrange(len(typedef.type.variants))])
+    raise Exception(f'Unsupported type {type_}')
+
+def random_account(rng: random.Random, program, name: str, vec_length: int = 3):
+    coder = program.account[name].coder.accounts
+    account = next(a for a in program.idl.accounts if a.name == name)
+    return coder.acc_name_to_discriminator[name] + b''.join(random_borsh(rng, program, f.type, vec_length) for f in account.type.fields)
+
+
+class TestFastDecoders(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def test_matches_anchor(self):
+        rng = random.Random(0)
+        for account_type in AccountTypes:
+            decode = compile_account_decoder(self.program, account_type.value)
+            self.assertIsNotNone(decode)
+            coder = self.program.account[account_type.value].coder.accounts
+            for vec_length in [0, 1, 5]:
+                for _ in range(10):
+                    data = random_account(rng, self.program, account_type.value, vec_length)
+                    # Accounts are allocated larger than their content
+                    data += bytes(rng.randint(0, 64))
+                    decoded = decode(data)
+                    self.assertEqual(decoded, coder.decode(data))
+                    self.assertIs(type(decoded), type(coder.decode(data)))
+
+    def test_truncated_data_raises(self):
+        rng = random.Random(1)
+        for account_type in AccountTypes:
+            decode = compile_account_decoder(self.program, account_type.value)
+            data = random_account(rng, self.program, account_type.value)
+            for length in [9, len(data) // 2, len(data) - 1]:
+                with self.assertRaises(Exception):
+                    decode(data[:length])
+
+if __name__ == '__main__':
+    unittest.main()
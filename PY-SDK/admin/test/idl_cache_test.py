@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from anchorpy import Program
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TxOpts
+from ...public.src.pyaver.aver_client import AverClient
+from ...public.src.pyaver.constants import AVER_PROGRAM_IDS
+from ...public.src.pyaver.idl_cache import BUNDLED_IDL_DIRECTORY, IdlCache
+
+def bundled_raw_idl():
+    with open(os.path.join(BUNDLED_IDL_DIRECTORY, f'{AVER_PROGRAM_IDS[0]}.json')) as f:
+        return json.load(f)
+
+class OnchainIdls():
+    """
+    Replaces Program.fetch_raw_idl, counting the IDLs fetched
+    """
+    def __init__(self, raw_idl: dict):
+        self.raw_idl = raw_idl
+        self.fetched = 0
+
+    async def __call__(self, address, provider):
+        self.fetched += 1
+        return self.raw_idl
+
+
+class TestIdlCache(unittest.TestCase):
+
+    def load_client(self, onchain: OnchainIdls, verify: bool, **kwargs):
+        async def run():
+            with patch.object(Program, 'fetch_raw_idl', onchain):
+                aver_client = await AverClient.load(AsyncClient('http://localhost:8899'), opts=TxOpts(), **kwargs)
+                fetched_during_load = onchain.fetched
+                reloaded = await aver_client.idl_verification if verify and aver_client.idl_verification is not None else None
+                await aver_client.close()
+                return aver_client, fetched_during_load, reloaded
+        return asyncio.run(run())
+
+    def test_bundled_idl_is_used_without_rpc(self):
+        onchain = OnchainIdls(bundled_raw_idl())
+        aver_client, fetched_during_load, reloaded = self.load_client(onchain, True)
+        self.assertEqual(fetched_during_load, 0)
+        self.assertEqual(reloaded, [])
+        self.assertEqual(onchain.fetched, 1)
+        self.assertEqual(aver_client.programs[0].program_id, AVER_PROGRAM_IDS[0])
+
+    def test_fetched_idl_is_saved(self):
+        onchain = OnchainIdls(bundled_raw_idl())
+        with tempfile.TemporaryDirectory() as directory:
+            aver_client, fetched_during_load, reloaded = self.load_client(onchain, True, idl_cache_directory=directory, use_bundled_idls=False)
+            self.assertEqual(fetched_during_load, 1)
+            self.assertIsNone(aver_client.idl_verification)
+            self.assertEqual(os.listdir(directory), [f'{AVER_PROGRAM_IDS[0]}.json'])
+
+            # Next loads read the saved IDL
+            self.assertEqual(IdlCache(directory, False).load(AVER_PROGRAM_IDS[0]), bundled_raw_idl())
+            _, fetched_during_load, _ = self.load_client(onchain, False, idl_cache_directory=directory, use_bundled_idls=False)
+            self.assertEqual(fetched_during_load, 1)
+
+    def test_out_of_date_idl_is_reloaded(self):
+        raw_idl = bundled_raw_idl()
+        stale_idl = bundled_raw_idl()
+        stale_idl['version'] = '0.0.0'
+        onchain = OnchainIdls(raw_idl)
+        with tempfile.TemporaryDirectory() as directory:
+            IdlCache(directory).save(AVER_PROGRAM_IDS[0], stale_idl)
+            aver_client, fetched_during_load, reloaded = self.load_client(onchain, True, idl_cache_directory=directory)
+            self.assertEqual(fetched_during_load, 0)
+            self.assertEqual(reloaded, [AVER_PROGRAM_IDS[0]])
+            self.assertEqual(aver_client.programs[0].idl.version, raw_idl['version'])
+            self.assertEqual(IdlCache(directory, False).load(AVER_PROGRAM_IDS[0]), raw_idl)
+
+    def test_corrupted_file_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, f'{AVER_PROGRAM_IDS[0]}.json'), 'w') as f:
+                f.write('{"version"')
+            self.assertIsNone(IdlCache(directory, False).load(AVER_PROGRAM_IDS[0]))
+            self.assertEqual(IdlCache(directory).load(AVER_PROGRAM_IDS[0]), bundled_raw_idl())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import statistics
+import subprocess
+import sys
+import unittest
+
+SDK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+PACKAGE = 'public.src.pyaver'
+
+def run_python(code: str, *options: str):
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=SDK_DIRECTORY, capture_output=True, text=True, check=True)
+
+def measure_import(module: str = f'{PACKAGE}.market'):
+    """
+    Imports module in a fresh interpreter and returns (total microseconds, microseconds spent in the SDK's own modules)
+    """
+    lines = run_python(f'import {module}', '-X', 'importtime').stderr.splitlines()
+    total = 0
+    own = 0
+    for line in lines:
+        if(not line.startswith('import time:') or 'self [us]' in line):
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        if(name.strip() == module):
+            total = int(cumulative)
+        if(name.strip().startswith(PACKAGE)):
+            own += int(self_time)
+    return total, own
+
+def benchmark_import(runs: int = 5, module: str = f'{PACKAGE}.market'):
+    """
+    Median import time of module over several fresh interpreters, in milliseconds
+    """
+    measures = [measure_import(module) for _ in range(runs)]
+    return statistics.median(m[0] for m in measures) / 1000, statistics.median(m[1] for m in measures) / 1000
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_deferred_dependencies(self):
+        code = '\n'.join([
+            f'import {PACKAGE}.market, sys',
+            f'from {PACKAGE} import layouts',
+            "print('SLAB_LAYOUT' in vars(layouts), 'EVENT_LAYOUT' in vars(layouts))",
+            'layouts.EVENT_LAYOUT',
+            "print('SLAB_LAYOUT' in vars(layouts), layouts.SLAB_LAYOUT is layouts.SLAB_LAYOUT)",
+        ])
+        self.assertEqual(run_python(code).stdout.split(), ['False', 'False', 'True', 'True'])
+
+    def test_import_time(self):
+        total, own = benchmark_import(runs=3)
+        # Most of the time is spent importing dependencies (anchorpy, solana, numpy), the SDK modules should stay well below half of it
+        self.assertLess(own, 0.5 * total)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import unittest
+from types import SimpleNamespace
+from anchorpy import Context
+from solana.keypair import Keypair
+from solana.system_program import SYS_PROGRAM_ID
+from solana.transaction import AccountMeta
+from spl.token.constants import TOKEN_PROGRAM_ID
+from ...public.src.pyaver.enums import OrderType, SelfTradeBehavior, Side, SizeFormat
+from ...public.src.pyaver.instruction_encoders import compile_instruction
+from ...public.src.pyaver.user_market import UserMarket
+from .account_decoders_test import load_program
+
+def random_accounts(program, name: str):
+    idl_instruction = next(i for i in program.idl.instructions if i.name == name)
+    return {a.name: Keypair().public_key for a in idl_instruction.accounts}
+
+def random_place_order_args():
+    return {
+        'limit_price': random.randrange(2 ** 64),
+        'size': random.randrange(2 ** 64),
+        'size_format': random.choice(list(SizeFormat)),
+        'side': random.choice(list(Side)),
+        'order_type': random.choice(list(OrderType)),
+        'self_trade_behavior': random.choice(list(SelfTradeBehavior)),
+        'outcome_id': random.randrange(256),
+    }
+
+def random_cancel_order_args():
+    return {
+        'order_id': random.randrange(2 ** 64),
+        'outcome_id': random.randrange(256),
+        'aaob_order_id': random.choice([None, random.randrange(2 ** 128)]),
+    }
+
+def random_remaining_accounts():
+    return [AccountMeta(Keypair().public_key, is_signer=False, is_writable=True) for _ in range(4 * random.randrange(4))]
+
+
+class ProgramClient():
+    """
+    Stands in for AverClient, counting the program lookups
+    """
+    def __init__(self, program):
+        self.program = program
+        self.program_lookups = 0
+
+    async def get_program_from_program_id(self, program_id):
+        self.program_lookups += 1
+        return self.program
+
+def market_state(in_play_queue=None):
+    return SimpleNamespace(
+        in_play_queue=in_play_queue,
+        market_store=Keypair().public_key,
+        quote_vault=Keypair().public_key,
+        vault_authority=Keypair().public_key,
+        number_of_outcomes=3,
+        decimals=6,
+    )
+
+def orderbook_accounts():
+    return SimpleNamespace(orderbook=Keypair().public_key, bids=Keypair().public_key, asks=Keypair().public_key, event_queue=Keypair().public_key)
+
+def order_user_market(program):
+    market = SimpleNamespace(
+        aver_client=ProgramClient(program),
+        program_id=program.program_id,
+        market_pubkey=Keypair().public_key,
+        market_state=market_state(Keypair().public_key),
+        market_store_state=SimpleNamespace(orderbook_accounts=[orderbook_accounts() for _ in range(3)]),
+        orderbooks=[],
+    )
+    user_market_state = SimpleNamespace(user=Keypair().public_key, user_host_lifetime=Keypair().public_key, version=1, orders=[])
+    return UserMarket(market.aver_client, Keypair().public_key, user_market_state, market, None, None)
+
+def anchor_place_order(program, uma: UserMarket, outcome_id: int, ata):
+    orderbook_account = uma.market.market_store_state.orderbook_accounts[outcome_id]
+    return program.instruction['place_order'](
+        {'limit_price': 500_000, 'size': 2_000_000, 'size_format': SizeFormat.STAKE, 'side': Side.BUY, 'order_type': OrderType.LIMIT, 'self_trade_behavior': SelfTradeBehavior.CANCEL_PROVIDE, 'outcome_id': outcome_id},
+        ctx=Context(accounts={
+            'user': uma.user_market_state.user,
+            'user_host_lifetime': uma.user_market_state.user_host_lifetime,
+            'user_market': uma.pubkey,
+            'user_quote_token_ata': ata,
+            'market': uma.market.market_pubkey,
+            'market_store': uma.market.market_state.market_store,
+            'quote_vault': uma.market.market_state.quote_vault,
+            'vault_authority': uma.market.market_state.vault_authority,
+            'orderbook': orderbook_account.orderbook,
+            'bids': orderbook_account.bids,
+            'asks': orderbook_account.asks,
+            'event_queue': orderbook_account.event_queue,
+            'in_play_queue': uma.market.market_state.in_play_queue,
+            'spl_token_program': TOKEN_PROGRAM_ID,
+            'system_program': SYS_PROGRAM_ID,
+        })
+    )
+
+
+class TestInstructionEncoders(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def assert_identical(self, name: str, make_args, with_remaining_accounts: bool = False):
+        accounts = random_accounts(self.program, name)
+        template = compile_instruction(self.program, name, accounts)
+        for _ in range(200):
+            args = make_args()
+            remaining_accounts = random_remaining_accounts() if with_remaining_accounts else []
+            expected = self.program.instruction[name](*args, ctx=Context(accounts=accounts, remaining_accounts=remaining_accounts))
+            ix = template.build(*args, remaining_accounts=remaining_accounts)
+            self.assertEqual(ix.data, expected.data)
+            self.assertEqual(ix.keys, expected.keys)
+            self.assertEqual(ix.program_id, expected.program_id)
+
+    def test_place_order_is_identical_to_anchor(self):
+        self.assert_identical('place_order', lambda: [random_place_order_args()])
+
+    def test_cancel_order_is_identical_to_anchor(self):
+        self.assert_identical('cancel_order', lambda: [random_cancel_order_args()])
+
+    def test_cancel_all_orders_is_identical_to_anchor(self):
+        self.assert_identical('cancel_all_orders', lambda: [[random.randrange(2 ** 16) for _ in range(random.randrange(6))]], True)
+
+    def test_built_instructions_do_not_share_keys(self):
+        template = compile_instruction(self.program, 'place_order', random_accounts(self.program, 'place_order'))
+        ix = template.build(random_place_order_args())
+        ix.keys.append(None)
+        self.assertEqual(len(template.build(random_place_order_args()).keys), len(template.keys))
+
+    def test_user_market_reuses_templates(self):
+        uma = order_user_market(self.program)
+        ata = Keypair().public_key
+        async def place_orders(outcome_id: int):
+            return [await uma.make_place_order_instruction(outcome_id, Side.BUY, 0.5, 2, SizeFormat.STAKE, ata) for _ in range(5)]
+
+        for outcome_id in [0, 1, 2]:
+            expected = anchor_place_order(self.program, uma, outcome_id, ata)
+            for ix in asyncio.run(place_orders(outcome_id)):
+                self.assertEqual((ix.keys, ix.data), (expected.keys, expected.data))
+        self.assertEqual(uma.aver_client.program_lookups, 3)
+
+        # A new market state (e.g., after refreshing the market) compiles the templates again
+        uma.market.market_state = market_state(Keypair().public_key)
+        expected = anchor_place_order(self.program, uma, 2, ata)
+        ixs = asyncio.run(place_orders(2))
+        self.assertEqual((ixs[-1].keys, ixs[-1].data), (expected.keys, expected.data))
+        self.assertEqual(uma.aver_client.program_lookups, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import random
+import unittest
+import numpy as np
+from solana.keypair import Keypair
+from .slab_test import build_slab_bytes
+from ...public.src.pyaver.enums import PriceRoundingFormat, Side
+from ...public.src.pyaver.data_classes import Price
+from ...public.src.pyaver.orderbook import Orderbook
+from ...public.src.pyaver.utils import RoundingDirection
+from ...public.src.pyaver.slab import Slab
+
+def ladder_orders(n: int, levels: int, seed: int = 0):
+    """
+    Orders spread over a few price levels so that several orders share the same price
+    """
+    rng = random.Random(seed)
+    user_markets = [Keypair().public_key for _ in range(4)]
+    prices = [rng.randint(10, 990) * (2 ** 32) // 1_000 for _ in range(levels)]
+    keys = set()
+    while len(keys) < n:
+        keys.add((rng.choice(prices) << 64) | rng.getrandbits(64))
+    return [(k, rng.randint(1, 10 ** 7), rng.choice(user_markets), rng.randint(0, 6)) for k in keys]
+
+def linear_fill_estimate(prices: list, qty: float, quote: bool):
+    """
+    Reference fill estimate walking the price levels one by one
+    """
+    accumulator = (lambda p: p.size) if quote else (lambda p: p.size * p.price)
+    filled = []
+    cumulative_qty = 0
+    for price in prices:
+        remaining_qty = qty - cumulative_qty
+        if(remaining_qty <= accumulator(price)):
+            cumulative_qty += remaining_qty
+            filled.append((price.price, remaining_qty if quote else remaining_qty / price.price))
+            break
+        cumulative_qty += accumulator(price)
+        filled.append((price.price, price.size))
+    return {
+        'avg_price': Orderbook.weighted_average([p for p, _ in filled], [s for _, s in filled]),
+        'worst_price': filled[-1][0],
+        'filled': cumulative_qty,
+    }
+
+def build_orderbook(seed: int = 0, decimals: int = 6):
+    bids = Slab.from_bytes(build_slab_bytes(ladder_orders(150, 12, seed), free_slots=7))
+    asks = Slab.from_bytes(build_slab_bytes(ladder_orders(150, 12, seed + 1), free_slots=3))
+    return Orderbook(Keypair().public_key, bids, asks, Keypair().public_key, Keypair().public_key, decimals)
+
+
+class TestOrderbook(unittest.TestCase):
+
+    def test_columns_match_l3(self):
+        for orderbook in [build_orderbook(seed=1), build_orderbook(seed=1).invert()]:
+            columns = orderbook.to_columns()
+            for side, l3 in [(columns.bids, orderbook.get_bids_L3()), (columns.asks, orderbook.get_asks_L3())]:
+                self.assertEqual([(int(hi) << 64) | int(lo) for hi, lo in zip(side.key_hi, side.key_lo)], [o.id for o in l3])
+                self.assertEqual(side.base_quantity.tolist(), [o.base_quantity for o in l3])
+                self.assertEqual(side.fee_tier.tolist(), [o.fee_tier for o in l3])
+                self.assertEqual([bytes(u) for u in side.user_market], [bytes(o.user_market) for o in l3])
+                self.assertEqual(np.round(side.price / 2 ** 32 * 10 ** orderbook.decimals).tolist(), [o.price for o in l3])
+
+    def test_l2_for_columns_matches_l2(self):
+        for orderbook in [build_orderbook(seed=2), build_orderbook(seed=2).invert()]:
+            columns = orderbook.to_columns()
+            for ui_amount in [False, True]:
+                for depth in [1, 5, 100]:
+                    for side, l2 in [
+                        (columns.bids, orderbook.get_bids_l2(depth, ui_amount)),
+                        (columns.asks, orderbook.get_asks_l2(depth, ui_amount)),
+                    ]:
+                        prices, sizes = Orderbook.get_L2_for_columns(side, depth, orderbook.decimals, ui_amount)
+                        self.assertEqual(prices.tolist(), [p.price for p in l2])
+                        self.assertEqual(sizes.tolist(), [p.size for p in l2])
+
+    def test_cached_ladders(self):
+        for orderbook in [build_orderbook(seed=3), build_orderbook(seed=3).invert()]:
+            bids_l2 = Orderbook.get_L2_for_slab(orderbook.slab_bids, 100, orderbook.is_inverted, orderbook.decimals, True, orderbook.is_inverted)
+            asks_l2 = Orderbook.get_L2_for_slab(orderbook.slab_asks, 100, not orderbook.is_inverted, orderbook.decimals, False, orderbook.is_inverted)
+
+            # Smaller depth first, then deeper (recomputed), then smaller again (sliced from cache)
+            for depth in [1, 3, 100, 2, 1000]:
+                self.assertEqual(orderbook.get_bids_l2(depth, True), bids_l2[:depth])
+                self.assertEqual(orderbook.get_asks_l2(depth, False), asks_l2[:depth])
+            self.assertEqual(orderbook.get_best_bid_price(True), bids_l2[0])
+
+            l3 = orderbook.get_bids_L3()
+            self.assertEqual(orderbook.get_bids_L3(), l3)
+            self.assertIsNot(orderbook.get_bids_L3(), l3)
+
+            for schema in [PriceRoundingFormat.PROBABILITY, PriceRoundingFormat.DECIMAL]:
+                self.assertEqual(
+                    orderbook.get_asks_l2_with_bucketing(10, True, schema),
+                    Orderbook.get_L2_for_slab_with_bucketing(orderbook.slab_asks, 10, not orderbook.is_inverted, orderbook.decimals, schema, True, orderbook.is_inverted),
+                )
+                self.assertEqual(
+                    orderbook.get_bids_l2_with_bucketing(10, False, schema),
+                    Orderbook.get_L2_for_slab_with_bucketing(orderbook.slab_bids, 10, orderbook.is_inverted, orderbook.decimals, schema, False, orderbook.is_inverted),
+                )
+
+    def test_bucket_prices_matches_bucket_price(self):
+        rng = random.Random(7)
+        prices = [Price(price=rng.randint(0, 2 ** 32), size=rng.randint(1, 10 ** 6)) for _ in range(500)]
+        for price_schema in [PriceRoundingFormat.PROBABILITY, PriceRoundingFormat.DECIMAL]:
+            for direction in [RoundingDirection.UP, RoundingDirection.DOWN, RoundingDirection.ROUND]:
+                # Prices the scalar path cannot round (e.g., above 0.99 when rounding down in probability) are left out
+                valid = []
+                for p in prices:
+                    try:
+                        Orderbook.bucket_price(p, price_schema, direction)
+                        valid.append(p)
+                    except Exception:
+                        pass
+                expected = [Orderbook.bucket_price(p, price_schema, direction) for p in valid]
+                self.assertEqual(Orderbook.bucket_prices(valid, price_schema, direction), [p for p in expected if p is not None])
+
+    def test_cache_dropped_when_slab_attached(self):
+        orderbook = build_orderbook(seed=4)
+        bids = orderbook.get_bids_l2(100, False)
+        orderbook.get_asks_L3()
+        self.assertTrue(len(orderbook._ladders) > 0)
+
+        new_bids = Slab.from_bytes(build_slab_bytes(ladder_orders(20, 3, seed=10)))
+        orderbook.slab_bids = new_bids
+        self.assertEqual(len(orderbook._ladders), 0)
+        self.assertNotEqual(orderbook.get_bids_l2(100, False), bids)
+        self.assertEqual(orderbook.get_bids_l2(100, False), Orderbook.get_L2_for_slab(new_bids, 100, False, orderbook.decimals))
+
+    def test_fill_estimates_match_linear_walk(self):
+        for orderbook in [build_orderbook(seed=5), build_orderbook(seed=5).invert()]:
+            for side in [Side.BUY, Side.SELL]:
+                for ui_amount in [False, True]:
+                    levels = orderbook.get_bids_l2(1000, ui_amount) if side == Side.BUY else orderbook.get_asks_l2(1000, ui_amount)
+                    ladder = orderbook.get_fill_ladder(side, ui_amount)
+                    for quote in [False, True]:
+                        total = ladder.cumulative_size[-1] if quote else ladder.cumulative_notional[-1]
+                        # Level boundaries, inside levels and more than the whole side
+                        qtys = [total * 2] + (ladder.cumulative_size if quote else ladder.cumulative_notional)[1:] + [total * f for f in np.linspace(0.001, 1, 57)]
+                        for qty in qtys:
+                            if(quote):
+                                estimate = orderbook.estimate_avg_fill_for_quote_qty(qty, side, ui_amount)
+                            else:
+                                estimate = orderbook.estimate_avg_fill_for_base_qty(qty, side, ui_amount)
+                            self.assertEqual(estimate, linear_fill_estimate(levels, qty, quote))
+
+                        curve = orderbook.price_impact_curve(qtys, side, ui_amount, quote)
+                        expected = [linear_fill_estimate(levels, qty, quote) for qty in qtys]
+                        for field in ['avg_price', 'worst_price', 'filled']:
+                            np.testing.assert_allclose(curve[field], [e[field] for e in expected], rtol=1e-9)
+
+    def test_price_impact_curve_empty_side(self):
+        empty = Slab.from_bytes(build_slab_bytes([]))
+        orderbook = build_orderbook(seed=6)
+        orderbook.slab_asks = empty
+        curve = orderbook.price_impact_curve([1, 2], Side.SELL, True)
+        self.assertTrue(np.isnan(curve['avg_price']).all())
+        self.assertEqual(curve['filled'].tolist(), [0, 0])
+
+    def test_empty_columns(self):
+        empty = Slab.from_bytes(build_slab_bytes([], free_slots=2))
+        orderbook = Orderbook(Keypair().public_key, empty, empty, Keypair().public_key, Keypair().public_key, 6)
+        columns = orderbook.to_columns()
+        self.assertEqual(len(columns.bids.price), 0)
+        self.assertEqual(columns.asks.user_market.shape, (0, 32))
+        prices, sizes = Orderbook.get_L2_for_columns(columns.bids, 10, 6)
+        self.assertEqual((len(prices), len(sizes)), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
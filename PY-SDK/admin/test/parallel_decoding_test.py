@@ -0,0 +1,96 @@
+import asyncio
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from solana.keypair import Keypair
+from ...public.src.pyaver.account_decoders import get_account_decoders
+from ...public.src.pyaver.decode_cache import DecodeCache
+from ...public.src.pyaver.enums import AccountTypes
+from ...public.src.pyaver.parallel_decoding import SLAB_KIND, decode_accounts
+from ...public.src.pyaver.slab import Slab
+from .account_decoders_test import load_program
+from .fast_decoders_test import random_account
+from .slab_test import build_slab_bytes, random_orders
+
+def random_accounts(rng: random.Random, program, account_type: AccountTypes, n: int):
+    accounts = []
+    latest_version = get_account_decoders(program).latest_versions[account_type]
+    for i in range(n):
+        version = i % (latest_version + 1)
+        name = account_type.value if version == latest_version else f'{account_type.value}V{version}'
+        data = bytearray(random_account(rng, program, name, rng.randint(0, 4)))
+        data[8] = version
+        accounts.append(bytes(data))
+    # Accounts which do not exist
+    accounts[n // 2] = None
+    return accounts
+
+def slab_keys(slab: Slab):
+    return [(n.key, n.base_quantity, n.user_market, n.fee_tier) for n in slab.items()]
+
+
+class TestParallelDecoding(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def expected(self, account_type, buffers):
+        return [get_account_decoders(self.program).decode(account_type, b) if b is not None else None for b in buffers]
+
+    def test_executors_match_event_loop_decoding(self):
+        rng = random.Random(0)
+        with ThreadPoolExecutor(2) as threads, ProcessPoolExecutor(2) as processes:
+            for account_type in AccountTypes:
+                buffers = random_accounts(rng, self.program, account_type, 25)
+                programs = [self.program] * len(buffers)
+                expected = self.expected(account_type, buffers)
+                for executor in [None, threads, processes]:
+                    decoded = asyncio.run(decode_accounts(programs, account_type, buffers, executor=executor, batch_size=4))
+                    self.assertEqual(decoded, expected)
+                    self.assertEqual([type(d) for d in decoded], [type(e) for e in expected])
+
+            slabs = [build_slab_bytes(random_orders(50, seed=i), free_slots=3) for i in range(5)] + [None]
+            for executor in [None, threads, processes]:
+                decoded = asyncio.run(decode_accounts(None, SLAB_KIND, slabs, executor=executor, batch_size=2))
+                self.assertEqual([slab_keys(s) for s in decoded[:-1]], [slab_keys(Slab.from_bytes(b)) for b in slabs[:-1]])
+                self.assertIsNone(decoded[-1])
+
+    def test_decode_cache(self):
+        rng = random.Random(1)
+        buffers = random_accounts(rng, self.program, AccountTypes.USER_MARKET, 10)
+        pubkeys = [Keypair().public_key for _ in buffers]
+        programs = [self.program] * len(buffers)
+        cache = DecodeCache()
+        with ThreadPoolExecutor(2) as threads:
+            first = asyncio.run(decode_accounts(programs, AccountTypes.USER_MARKET, buffers, pubkeys, cache, threads))
+            second = asyncio.run(decode_accounts(programs, AccountTypes.USER_MARKET, buffers, pubkeys, cache, threads))
+        self.assertEqual((cache.hits, cache.misses), (9, 9))
+        for a, b in zip(first, second):
+            self.assertIs(a, b)
+
+    def test_event_loop_stays_responsive(self):
+        rng = random.Random(2)
+        buffers = [random_account(rng, self.program, AccountTypes.USER_MARKET.value, 40) for _ in range(400)]
+        programs = [self.program] * len(buffers)
+
+        async def run(executor):
+            ticks = 0
+            done = False
+            async def ticker():
+                nonlocal ticks
+                while not done:
+                    ticks += 1
+                    await asyncio.sleep(0)
+            task = asyncio.create_task(ticker())
+            await decode_accounts(programs, AccountTypes.USER_MARKET, buffers, executor=executor, batch_size=50)
+            done = True
+            await task
+            return ticks
+
+        # Without an executor the decoding never yields, the ticker only runs after it
+        self.assertLessEqual(asyncio.run(run(None)), 1)
+        with ProcessPoolExecutor(2) as processes:
+            self.assertGreater(asyncio.run(run(processes)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from solana.keypair import Keypair
+from solana.publickey import PublicKey
+from ...public.src.pyaver.market import AverMarket
+from ...public.src.pyaver.orderbook import Orderbook
+from ...public.src.pyaver.pda_cache import PdaCache, get_default_pda_cache
+from ...public.src.pyaver.user_market import UserMarket
+
+def market_store_requests(n: int, program_id: PublicKey):
+    return [([b'market-store', bytes(Keypair().public_key)], program_id) for _ in range(n)]
+
+
+class TestPdaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.program_id = Keypair().public_key
+
+    def test_matches_find_program_address(self):
+        cache = PdaCache()
+        for seeds, program_id in market_store_requests(20, self.program_id):
+            expected = PublicKey.find_program_address(seeds, program_id)
+            self.assertEqual(cache.find_program_address(seeds, program_id), expected)
+            self.assertEqual(cache.find_program_address(seeds, program_id), expected)
+        self.assertEqual((cache.hits, cache.misses), (20, 20))
+
+    def test_lru_eviction(self):
+        cache = PdaCache(max_size=2)
+        a, b, c = market_store_requests(3, self.program_id)
+        cache.find_program_address(*a)
+        cache.find_program_address(*b)
+        cache.find_program_address(*a)
+        cache.find_program_address(*c)
+        self.assertEqual(len(cache), 2)
+        misses = cache.misses
+        cache.find_program_address(*a)
+        self.assertEqual(cache.misses, misses)
+        cache.find_program_address(*b)
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_batch_derivation(self):
+        requests = market_store_requests(30, self.program_id)
+        # Duplicates are derived once
+        requests += requests[:5]
+        expected = [PublicKey.find_program_address(seeds, program_id) for seeds, program_id in requests]
+        cache = PdaCache()
+        cache.find_program_address(*requests[0])
+        self.assertEqual(cache.find_program_addresses(requests), expected)
+        self.assertEqual(len(cache), 30)
+
+        with ProcessPoolExecutor(2) as processes:
+            self.assertEqual(PdaCache().find_program_addresses(requests, processes, chunksize=4), expected)
+
+    def test_persistent_file(self):
+        requests = market_store_requests(10, self.program_id)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pdas.json')
+            cache = PdaCache(path=path)
+            expected = cache.find_program_addresses(requests)
+            cache.save()
+
+            reloaded = PdaCache(path=path)
+            self.assertEqual(len(reloaded), 10)
+            self.assertEqual([reloaded.find_program_address(*r) for r in requests], expected)
+            self.assertEqual(reloaded.misses, 0)
+            self.assertEqual(os.listdir(directory), ['pdas.json'])
+
+        with self.assertRaises(Exception):
+            PdaCache().save()
+
+    def test_sdk_derivations_use_default_cache(self):
+        market, owner, host = Keypair().public_key, Keypair().public_key, Keypair().public_key
+        cache = get_default_pda_cache()
+        self.assertEqual(
+            AverMarket.derive_market_store_pubkey_and_bump(market, self.program_id),
+            PublicKey.find_program_address([bytes('market-store', 'utf-8'), bytes(market)], self.program_id)
+        )
+        self.assertEqual(
+            UserMarket.derive_pubkey_and_bump(owner, market, host, self.program_id),
+            PublicKey.find_program_address([bytes('user-market', 'utf-8'), bytes(owner), bytes(market), bytes(host)], self.program_id)
+        )
+        hits = cache.hits
+        AverMarket.derive_market_store_pubkey_and_bump(market, self.program_id)
+        UserMarket.derive_pubkey_and_bump(owner, market, host, self.program_id)
+        Orderbook.derive_orderbook(market, 1, self.program_id)
+        Orderbook.derive_orderbook(market, 1, self.program_id)
+        self.assertEqual(cache.hits, hits + 3)
+
+if __name__ == '__main__':
+    unittest.main()
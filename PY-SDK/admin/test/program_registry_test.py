@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from anchorpy import Program
+from solana.keypair import Keypair
+from solana.publickey import PublicKey
+from ...public.src.pyaver.aver_client import AverClient
+from ...public.src.pyaver.enums import SolanaNetwork
+from .account_decoders_test import load_program
+
+class ProgramLoads():
+    """
+    Replaces AverClient.load_program, counting the loads and failing the first ones if requested
+    """
+    def __init__(self, failures: int = 0):
+        self.loads = 0
+        self.failures = failures
+
+    async def __call__(self, provider, program_id, idl_cache=None):
+        self.loads += 1
+        # Lets every concurrent caller reach get_program_from_program_id before the load completes
+        await asyncio.sleep(0.01)
+        if(self.failures > 0):
+            self.failures -= 1
+            raise Exception('Program IDL not loaded')
+        program = load_program()
+        return Program(program.idl, program_id, provider)
+
+
+class TestProgramRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def client(self):
+        return AverClient([self.program], SolanaNetwork.DEVNET, self.program.provider.connection)
+
+    def test_loaded_programs_are_found_by_id(self):
+        async def run():
+            aver_client = self.client()
+            with patch.object(AverClient, 'load_program', ProgramLoads()) as loads:
+                program = await aver_client.get_program_from_program_id(PublicKey(str(self.program.program_id)))
+                self.assertEqual(loads.loads, 0)
+            return program
+        self.assertIs(asyncio.run(run()), self.program)
+
+    def test_concurrent_requests_share_one_load(self):
+        program_id = Keypair().public_key
+        async def run():
+            aver_client = self.client()
+            with patch.object(AverClient, 'load_program', ProgramLoads()) as loads:
+                programs = await asyncio.gather(*[aver_client.get_program_from_program_id(program_id) for _ in range(20)])
+                again = await aver_client.get_program_from_program_id(program_id)
+            return aver_client, loads, programs, again
+        aver_client, loads, programs, again = asyncio.run(run())
+        self.assertEqual(loads.loads, 1)
+        self.assertTrue(all(p is programs[0] for p in programs + [again]))
+        self.assertEqual(programs[0].program_id, program_id)
+        self.assertEqual(aver_client.programs, [self.program, programs[0]])
+
+    def test_failed_load_is_retried(self):
+        program_id = Keypair().public_key
+        async def run():
+            aver_client = self.client()
+            with patch.object(AverClient, 'load_program', ProgramLoads(failures=1)) as loads:
+                results = await asyncio.gather(*[aver_client.get_program_from_program_id(program_id) for _ in range(5)], return_exceptions=True)
+                self.assertTrue(all(isinstance(r, Exception) for r in results))
+                program = await aver_client.get_program_from_program_id(program_id)
+            return aver_client, loads, program
+        aver_client, loads, program = asyncio.run(run())
+        self.assertEqual(loads.loads, 2)
+        self.assertEqual(aver_client.programs, [self.program, program])
+
+    def test_cancelled_caller_does_not_cancel_the_load(self):
+        program_id = Keypair().public_key
+        async def run():
+            aver_client = self.client()
+            with patch.object(AverClient, 'load_program', ProgramLoads()) as loads:
+                cancelled = asyncio.create_task(aver_client.get_program_from_program_id(program_id))
+                waiting = asyncio.create_task(aver_client.get_program_from_program_id(program_id))
+                await asyncio.sleep(0)
+                cancelled.cancel()
+                program = await waiting
+            return loads, program
+        loads, program = asyncio.run(run())
+        self.assertEqual(loads.loads, 1)
+        self.assertEqual(program.program_id, program_id)
+
+    def test_add_program_replaces_loaded_program(self):
+        async def run():
+            aver_client = self.client()
+            with patch.object(AverClient, 'load_program', ProgramLoads()):
+                program = await aver_client.add_program(self.program.program_id)
+            return aver_client, program
+        aver_client, program = asyncio.run(run())
+        self.assertEqual(aver_client.programs, [program])
+        self.assertIsNot(program, self.program)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+import asyncio
+import struct
+import unittest
+from hashlib import sha256
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from solana.keypair import Keypair
+from ...public.src.pyaver import user_market
+from ...public.src.pyaver.data_classes import Price, QuoteChange, UmaOrder
+from ...public.src.pyaver.decode_cache import DecodeCache
+from ...public.src.pyaver.enums import Side
+from ...public.src.pyaver.user_market import UserMarket
+from ...public.src.pyaver.utils import parse_user_market_state
+from .account_decoders_test import load_program
+from .instruction_encoders_test import market_state, orderbook_accounts
+
+class FakeSlab():
+    """
+    Stands in for a Slab, holding orders by key
+    """
+    def __init__(self, orders: dict = None):
+        self.orders = orders or {}
+
+    def get(self, search_key: int, use_index: bool = False):
+        return self.orders.get(search_key)
+
+def order_key(price: int, sequence: int):
+    # Prices are 32 bit fixed point numbers in the upper 64 bits of the key
+    return (round(price * 2 ** 32 / 10 ** 6) << 64) | sequence
+
+class QuotingClient():
+    """
+    Stands in for AverClient, serving the program
+    """
+    def __init__(self, program):
+        self.program = program
+        self.owner = Keypair()
+        confirmed = {'result': {'value': [{'err': None, 'confirmationStatus': 'confirmed'}]}}
+        self.provider = SimpleNamespace(connection=SimpleNamespace(confirm_transaction=AsyncMock(return_value=confirmed)))
+
+    async def get_program_from_program_id(self, program_id):
+        return self.program
+
+def quoting_user_market(program, number_of_outcomes: int, resting: list[tuple[int, Side, int, int]]):
+    """
+    UserMarket whose resting orders are (outcome_id, side, price, size), prices and sizes in token units
+    """
+    aver_client = QuotingClient(program)
+    state = market_state(Keypair().public_key)
+    state.number_of_outcomes = number_of_outcomes
+    books = 1 if number_of_outcomes == 2 else number_of_outcomes
+    orderbooks = [SimpleNamespace(slab_bids=FakeSlab(), slab_asks=FakeSlab()) for _ in range(books)]
+    orders = []
+    for i, (outcome_id, side, price, size) in enumerate(resting):
+        key = order_key(price, i)
+        orders.append(UmaOrder(i, outcome_id, size, True, key))
+        slab = orderbooks[outcome_id].slab_bids if side == Side.BUY else orderbooks[outcome_id].slab_asks
+        slab.orders[key] = SimpleNamespace(key=key, base_quantity=size)
+    market = SimpleNamespace(
+        aver_client=aver_client,
+        program_id=program.program_id,
+        market_pubkey=Keypair().public_key,
+        market_state=state,
+        market_store_state=SimpleNamespace(orderbook_accounts=[orderbook_accounts() for _ in range(books)]),
+        orderbooks=orderbooks,
+    )
+    user_market_state = SimpleNamespace(user=aver_client.owner.public_key, user_host_lifetime=Keypair().public_key, version=1, orders=orders, number_of_orders=len(orders))
+    uma = UserMarket(aver_client, Keypair().public_key, user_market_state, market, None, None)
+    uma.update_all_accounts_if_required = AsyncMock(return_value=True)
+    uma._quote_token_ata = Keypair().public_key
+    uma.is_warm = True
+    return uma
+
+def is_place_order(ix):
+    return ix.data[:8] == sha256(b'global:place_order').digest()[:8]
+
+def user_market_bytes(uma: UserMarket):
+    """
+    UserMarket account data (version 1) holding the orders of the UserMarket
+    """
+    outcomes = uma.market.market_state.number_of_outcomes
+    orders = uma.user_market_state.orders
+    data = sha256(b'account:UserMarket').digest()[:8] + bytes([1])
+    data += bytes(Keypair().public_key) * 2 + bytes(1) + bytes(Keypair().public_key)
+    data += struct.pack('<BII5Q', outcomes, len(orders), 10, 0, 0, 0, 0, 0)
+    data += struct.pack('<I', outcomes) + bytes(16 * outcomes)
+    data += struct.pack('<I', len(orders))
+    for order in orders:
+        data += struct.pack('<Q', order.order_id) + order.aaob_order_id.to_bytes(16, 'little') + struct.pack('<BQ?', order.outcome_id, order.base_qty, order.is_pre_event)
+    return data + struct.pack('<I', 0)
+
+
+class TestReplaceQuotes(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+
+    def test_minimal_changes(self):
+        uma = quoting_user_market(self.program, 3, [
+            (0, Side.BUY, 400_000, 10_000_000),
+            (0, Side.BUY, 400_000, 5_000_000),
+            (0, Side.BUY, 380_000, 10_000_000),
+            (0, Side.SELL, 600_000, 10_000_000),
+            (1, Side.BUY, 200_000, 10_000_000),
+        ])
+        orders = uma.user_market_state.orders
+        changes = uma.diff_quotes({0: {
+            Side.BUY: [Price(0.40, 10), Price(0.39, 5), Price(0.39, 2)],
+            Side.SELL: [Price(0.60, 12)],
+        }})
+        # All cancels before all new orders
+        self.assertEqual(changes, [
+            QuoteChange(0, Side.BUY, 380_000, 10_000_000, orders[2]),
+            QuoteChange(0, Side.BUY, 400_000, 5_000_000, orders[1]),
+            QuoteChange(0, Side.BUY, 390_000, 7_000_000),
+            QuoteChange(0, Side.SELL, 600_000, 2_000_000),
+        ])
+        # An empty side cancels all its orders, sides missing from the ladder are untouched
+        self.assertEqual(uma.diff_quotes({1: {Side.BUY: []}}), [QuoteChange(1, Side.BUY, 200_000, 10_000_000, orders[4])])
+        self.assertEqual(uma.diff_quotes({2: {Side.SELL: []}}), [])
+
+    def test_binary_outcomes_share_an_orderbook(self):
+        uma = quoting_user_market(self.program, 2, [(0, Side.SELL, 600_000, 10_000_000)])
+        # Buying the second outcome at 0.4 is selling the first at 0.6, new orders keep the outcome they were quoted on
+        self.assertEqual(uma.diff_quotes({1: {Side.BUY: [Price(0.4, 10)]}}), [])
+        self.assertEqual(uma.diff_quotes({1: {Side.BUY: [Price(0.45, 10)]}}), [
+            QuoteChange(0, Side.SELL, 600_000, 10_000_000, uma.user_market_state.orders[0]),
+            QuoteChange(1, Side.BUY, 450_000, 10_000_000),
+        ])
+
+    def test_cancels_report_the_order_as_placed(self):
+        uma = quoting_user_market(self.program, 2, [(0, Side.SELL, 600_000, 10_000_000)])
+        # An order placed as buying the second outcome at 0.4 rests as an ask at 0.6 in the first orderbook
+        uma.user_market_state.orders[0].outcome_id = 1
+        self.assertEqual(uma.diff_quotes({0: {Side.SELL: []}}), [QuoteChange(1, Side.BUY, 400_000, 10_000_000, uma.user_market_state.orders[0])])
+
+    def test_replace_quotes_packs_and_updates_state(self):
+        resting = [(outcome_id, side, price, 1_000_000) for outcome_id in range(3) for side, price in [(Side.BUY, 400_000), (Side.SELL, 600_000)]]
+        uma = quoting_user_market(self.program, 3, resting)
+        ladder = {o: {Side.BUY: [Price(0.41, 1)], Side.SELL: [Price(0.59, 1)]} for o in range(3)}
+        send = AsyncMock(return_value={'result': 'signature'})
+
+        async def run():
+            with patch.object(user_market, 'sign_and_send_transaction_instructions', send):
+                first = await uma.replace_quotes(ladder)
+                sent = [ix for call in send.await_args_list for ix in call.args[3]]
+                # The new orders are not on the slabs yet, they are not placed twice and the cancelled orders are gone
+                again = await uma.replace_quotes(ladder)
+                return first, sent, again
+        first, sent, again = asyncio.run(run())
+        self.assertEqual(len([ix for ix in sent if ix.program_id == self.program.program_id]), 12)
+        self.assertLess(len(first), 12)
+        self.assertEqual(again, [])
+        # The decoded state is left as it is
+        self.assertEqual(len(uma.user_market_state.orders), 6)
+        self.assertEqual(uma.user_market_state.number_of_orders, 6)
+
+        # Once the UserMarket and the slabs are refreshed, the orders are read from them
+        uma.user_market_state = SimpleNamespace(**{**vars(uma.user_market_state), 'orders': []})
+        for orderbook in uma.market.orderbooks:
+            orderbook.slab_bids, orderbook.slab_asks = FakeSlab(), FakeSlab()
+        self.assertEqual(len(uma.diff_quotes(ladder)), 6)
+
+    def test_new_orders_wait_for_the_cancels(self):
+        resting = [(outcome_id, side, price, 1_000_000) for outcome_id in range(3) for side, price in [(Side.BUY, 400_000), (Side.SELL, 600_000)]]
+        uma = quoting_user_market(self.program, 3, resting)
+        ladder = {o: {Side.BUY: [Price(0.41, 1)], Side.SELL: [Price(0.59, 1)]} for o in range(3)}
+        events = []
+
+        async def send(client, signers, fee_payer, ixs, send_options, **kwargs):
+            kind = 'places' if all(is_place_order(ix) for ix in ixs[2:]) else 'cancels'
+            events.append(('send', kind))
+            await asyncio.sleep(0)
+            return {'result': f'{kind} {len(events)}'}
+
+        async def confirm(signature, commitment):
+            await asyncio.sleep(0)
+            events.append(('confirm', signature.split()[0]))
+            return {'result': {'value': [{'err': None, 'confirmationStatus': 'confirmed'}]}}
+
+        uma.aver_client.provider.connection.confirm_transaction = confirm
+        async def run():
+            with patch.object(user_market, 'sign_and_send_transaction_instructions', send):
+                return await uma.replace_quotes(ladder)
+        responses = asyncio.run(run())
+        cancels = [e for e in events if e == ('send', 'cancels')]
+        places = [e for e in events if e == ('send', 'places')]
+        self.assertGreater(len(cancels), 0)
+        self.assertGreater(len(places), 0)
+        self.assertEqual(len(responses), len(cancels) + len(places))
+        # Every transaction carrying cancels is sent and confirmed before the first transaction only placing orders
+        self.assertEqual(events, cancels + [('confirm', 'cancels')] * len(cancels) + places)
+
+        # Without confirmed cancels, no new order is sent
+        uma = quoting_user_market(self.program, 3, resting)
+        events.clear()
+        uma.aver_client.provider.connection.confirm_transaction = AsyncMock(return_value={'result': {'value': [{'err': {'InstructionError': [2, {'Custom': 6000}]}}]}})
+        with self.assertRaises(Exception):
+            asyncio.run(run())
+        self.assertNotIn(('send', 'places'), events)
+        self.assertEqual(len(uma.diff_quotes(ladder)), 12)
+
+    def test_failed_transactions_are_not_applied(self):
+        uma = quoting_user_market(self.program, 3, [(0, Side.BUY, 400_000, 1_000_000)])
+        send = AsyncMock(side_effect=Exception('failed'))
+        async def run():
+            with patch.object(user_market, 'sign_and_send_transaction_instructions', send):
+                await uma.replace_quotes({0: {Side.BUY: [Price(0.41, 1)]}})
+        with self.assertRaises(Exception):
+            asyncio.run(run())
+        self.assertEqual(len(uma.user_market_state.orders), 1)
+        self.assertEqual(len(uma.diff_quotes({0: {Side.BUY: [Price(0.41, 1)]}})), 2)
+
+    def test_unchanged_accounts_from_the_decode_cache(self):
+        uma = quoting_user_market(self.program, 3, [(0, Side.BUY, 400_000, 1_000_000)])
+        uma.aver_client.decode_cache = DecodeCache()
+        pubkey = Keypair().public_key
+        data = user_market_bytes(uma)
+        uma.user_market_state = parse_user_market_state(data, uma.aver_client, self.program, pubkey)
+        ladder = {0: {Side.BUY: []}}
+        send = AsyncMock(return_value={'result': 'signature'})
+
+        async def run():
+            with patch.object(user_market, 'sign_and_send_transaction_instructions', send):
+                return await uma.replace_quotes(ladder)
+        self.assertEqual(len(asyncio.run(run())), 1)
+
+        # The cancel did not land yet: refreshing with the same bytes returns the same, unmodified, decoded state
+        uma.user_market_state = parse_user_market_state(data, uma.aver_client, self.program, pubkey)
+        for orderbook in uma.market.orderbooks:
+            orderbook.slab_bids, orderbook.slab_asks = FakeSlab(dict(orderbook.slab_bids.orders)), FakeSlab(dict(orderbook.slab_asks.orders))
+        self.assertEqual(len(uma.user_market_state.orders), 1)
+        self.assertEqual(uma.user_market_state.number_of_orders, 1)
+        self.assertEqual(uma.diff_quotes(ladder), [])
+
+        # Once the transaction can no longer land, the order is cancelled again
+        with patch.object(user_market, 'PENDING_QUOTE_CHANGE_LIFETIME', -1):
+            self.assertEqual(uma.diff_quotes(ladder), [QuoteChange(0, Side.BUY, 400_000, 1_000_000, uma.user_market_state.orders[0])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,12 @@
+import random
 import unittest
-from ...public.src.pyaver.utils import round_price_to_nearest_decimal_tick_size, round_price_to_nearest_probability_tick_size
+from ...public.src.pyaver.enums import PriceRoundingFormat
+from ...public.src.pyaver.utils import RoundingDirection, TICK_LADDERS, next_tick_down, next_tick_up, round_prices, round_price_to_nearest_decimal_tick_size, round_price_to_nearest_probability_tick_size
+
+SCALAR_ROUNDING = {
+    PriceRoundingFormat.PROBABILITY: round_price_to_nearest_probability_tick_size,
+    PriceRoundingFormat.DECIMAL: round_price_to_nearest_decimal_tick_size,
+}
 
 class TestRoundingMethods(unittest.TestCase):
 
@@ -89,5 +96,62 @@ class TestRoundingMethods(unittest.TestCase):
         print('BEFORE:', price, 'AFTER: ', 1 / rounded_price)
         self.assertAlmostEqual(1 / rounded_price, rounded)
 
+    def test_round_prices_matches_scalar(self):
+        rng = random.Random(0)
+        prices = [rng.random() for _ in range(3_000)] + [rng.randint(0, 1_000) / 1_000 for _ in range(1_000)] + [1 / rng.randint(1, 1_000) for _ in range(1_000)]
+        prices += [p for ladder in TICK_LADDERS.values() for p in ladder]
+        for price_schema, scalar in SCALAR_ROUNDING.items():
+            for binary_flag in [False, True]:
+                for direction in [RoundingDirection.ROUND, RoundingDirection.UP, RoundingDirection.DOWN]:
+                    expected = []
+                    valid_prices = []
+                    for p in prices:
+                        try:
+                            expected.append(scalar(p, direction, binary_flag))
+                            valid_prices.append(p)
+                        except Exception:
+                            # e.g., prices above 0.99 in the probability schema without binary_flag
+                            with self.assertRaises(Exception):
+                                round_prices([p], price_schema, direction, binary_flag)
+                    self.assertEqual(round_prices(valid_prices, price_schema, direction, binary_flag).tolist(), expected)
+
+    def test_next_ticks(self):
+        for (price_schema, binary_flag), ladder in TICK_LADDERS.items():
+            scalar = SCALAR_ROUNDING[price_schema]
+            self.assertEqual(next_tick_up(ladder[0], price_schema, binary_flag), ladder[1])
+            self.assertIsNone(next_tick_up(ladder[-1], price_schema, binary_flag))
+            self.assertEqual(next_tick_down(ladder[-1], price_schema, binary_flag), ladder[-2])
+            self.assertIsNone(next_tick_down(ladder[0], price_schema, binary_flag))
+
+        self.assertEqual(next_tick_up(0.5, PriceRoundingFormat.PROBABILITY), 0.51)
+        self.assertEqual(next_tick_down(0.5, PriceRoundingFormat.PROBABILITY), 0.49)
+        self.assertEqual(next_tick_up(0.0015, PriceRoundingFormat.PROBABILITY), 0.0016)
+        self.assertEqual(next_tick_down(0.999, PriceRoundingFormat.PROBABILITY, True), 0.9989)
+        self.assertEqual(next_tick_up(0.5, PriceRoundingFormat.DECIMAL), 1 / 1.99)
+        self.assertEqual(next_tick_down(0.5, PriceRoundingFormat.DECIMAL), 1 / (101 * 0.02))
+        # Prices at the ends of the range are clamped to the bounds
+        self.assertEqual(next_tick_up(0.99, PriceRoundingFormat.PROBABILITY), 0.999)
+        self.assertEqual(next_tick_down(0.0011, PriceRoundingFormat.PROBABILITY), 0.001)
+        self.assertEqual(next_tick_up(0.99, PriceRoundingFormat.DECIMAL, True), 1 / 1.01)
+
+    def test_ladders_hold_every_rounded_price(self):
+        rng = random.Random(1)
+        prices = [rng.random() for _ in range(3_000)] + [0, 0.0005, 0.9995, 1, 0.001, 0.999, 1 / 1_000, 1 / 1.01]
+        prices += [p for ladder in TICK_LADDERS.values() for p in ladder]
+        for (price_schema, binary_flag), ladder in TICK_LADDERS.items():
+            scalar = SCALAR_ROUNDING[price_schema]
+            rounded = set()
+            for direction in [RoundingDirection.ROUND, RoundingDirection.UP, RoundingDirection.DOWN]:
+                valid_prices = []
+                for p in prices:
+                    try:
+                        scalar(p, direction, binary_flag)
+                        valid_prices.append(p)
+                    except Exception:
+                        pass
+                rounded.update(round_prices(valid_prices, price_schema, direction, binary_flag).tolist())
+            # The ladder holds exactly the prices rounding returns
+            self.assertEqual(sorted(rounded), ladder)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,178 @@
+import random
+import struct
+import unittest
+from solana.keypair import Keypair
+from ...public.src.pyaver.layouts import SLAB_LAYOUT, NodeType, PADDED_LEN, SLOT_SIZE, CALLBACK_INFO_LEN
+from ...public.src.pyaver.slab import LazySlabLeafNode, Slab, SlabInnerNode, SlabLeafNode
+
+def build_slab_bytes(orders: list, free_slots: int = 0, uninitialized_slots: int = 0):
+    """
+    Builds raw slab bytes (same layout as onchain) for a list of (key, base_quantity, user_market, fee_tier) orders
+
+    Free and uninitialized slots are added so decoders have to skip them
+    """
+    orders = sorted(orders, key=lambda o: o[0])
+    slots = []
+    callbacks = []
+
+    def add_slot(tag, body):
+        slots.append(struct.pack('<Q', tag) + body)
+        return len(slots) - 1
+
+    for _ in range(free_slots):
+        add_slot(NodeType.FREE_NODE, struct.pack('<I', 0) + bytes(28))
+
+    def build(subset):
+        if len(subset) == 1:
+            key, base_quantity, user_market, fee_tier = subset[0]
+            callbacks.append(bytes(user_market) + bytes([fee_tier]))
+            return add_slot(NodeType.LEAF_NODE, key.to_bytes(16, 'little') + struct.pack('<QQ', len(callbacks) - 1, base_quantity))
+        prefix_len = 128 - (subset[0][0] ^ subset[-1][0]).bit_length()
+        split = next(i for i, o in enumerate(subset) if (o[0] >> (127 - prefix_len)) & 1)
+        index = add_slot(NodeType.INNER_NODE, bytes(32))
+        left, right = build(subset[:split]), build(subset[split:])
+        slots[index] = struct.pack('<Q', NodeType.INNER_NODE) + subset[0][0].to_bytes(16, 'little') + struct.pack('<QII', prefix_len, left, right)
+        return index
+
+    root = build(orders) if orders else 0
+    for _ in range(uninitialized_slots):
+        add_slot(NodeType.UNINTIALIZED, bytes(32))
+
+    callback_offset = PADDED_LEN + len(slots) * SLOT_SIZE
+    # Leaf slots were written with the callback index, rewrite with the absolute callback pointer
+    for i, slot in enumerate(slots):
+        if struct.unpack_from('<Q', slot)[0] == NodeType.LEAF_NODE:
+            callback_index = struct.unpack_from('<Q', slot, 24)[0]
+            slots[i] = slot[:24] + struct.pack('<Q', callback_offset + callback_index * CALLBACK_INFO_LEN) + slot[32:]
+
+    header = struct.pack(
+        '<BQQIQQQQIQ32s',
+        1, len(slots), free_slots, 0, callback_offset, 0, 0, len(callbacks), root, len(orders), bytes(Keypair().public_key)
+    ) + bytes(7)
+    return header + b''.join(slots) + b''.join(callbacks)
+
+def random_orders(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    user_markets = [Keypair().public_key for _ in range(8)]
+    keys = set()
+    while len(keys) < n:
+        price = rng.randint(1_000, 990_000) * (2 ** 32) // 1_000_000
+        keys.add((price << 64) | rng.getrandbits(64))
+    return [(k, rng.randint(1, 10 ** 9), rng.choice(user_markets), rng.randint(0, 6)) for k in keys]
+
+
+class TestSlab(unittest.TestCase):
+
+    def test_parity_with_construct_layout(self):
+        buffer = build_slab_bytes(random_orders(300), free_slots=20, uninitialized_slots=20)
+        slab = Slab.from_bytes(buffer)
+        parsed = SLAB_LAYOUT.parse(buffer)
+
+        for field in ['account_tag', 'bump_index', 'free_list_len', 'free_list_head', 'callback_memory_offset', 'root_node', 'leaf_count']:
+            self.assertEqual(getattr(slab._header, field), getattr(parsed.header, field))
+        self.assertEqual(bytes(slab._header.market_address), parsed.header.market_address)
+        self.assertEqual(slab.leaf_count, parsed.header.leaf_count)
+
+        for index, construct_node in enumerate(parsed.nodes):
+            node = slab._nodes.get(index)
+            if construct_node.tag == NodeType.LEAF_NODE:
+                pt = construct_node.node.callback_info_pt
+                self.assertIsInstance(node, SlabLeafNode)
+                self.assertEqual(node.key, int.from_bytes(construct_node.node.key, 'little'))
+                self.assertEqual(node.base_quantity, construct_node.node.base_quantity)
+                self.assertEqual(node.callback_info_pt, pt)
+                self.assertEqual(bytes(node.user_market), buffer[pt:pt + CALLBACK_INFO_LEN - 1])
+                self.assertEqual(node.fee_tier, buffer[pt + CALLBACK_INFO_LEN - 1])
+            elif construct_node.tag == NodeType.INNER_NODE:
+                self.assertIsInstance(node, SlabInnerNode)
+                self.assertEqual(node.key, int.from_bytes(construct_node.node.key, 'little'))
+                self.assertEqual(node.prefix_len, construct_node.node.prefix_len)
+                self.assertEqual(list(node.children), list(construct_node.node.children))
+            else:
+                self.assertIsNone(node)
+
+    def test_items_and_get(self):
+        orders = random_orders(200, seed=1)
+        slab = Slab.from_bytes(build_slab_bytes(orders, free_slots=5))
+        keys = sorted(o[0] for o in orders)
+
+        self.assertEqual([n.key for n in slab.items()], keys)
+        self.assertEqual([n.key for n in slab.items(descending=True)], keys[::-1])
+        for key, base_quantity, user_market, fee_tier in orders:
+            node = slab.get(key)
+            self.assertEqual(node.base_quantity, base_quantity)
+            self.assertEqual(node.user_market, user_market)
+            self.assertEqual(node.fee_tier, fee_tier)
+        self.assertIsNone(slab.get(keys[0] + 1 if keys[0] + 1 not in keys else keys[0] - 1))
+
+    def test_empty_slab(self):
+        slab = Slab.from_bytes(build_slab_bytes([], free_slots=3))
+        self.assertEqual(slab.leaf_count, 0)
+        self.assertEqual(list(slab.items()), [])
+        self.assertIsNone(slab.get(1))
+
+    def test_lazy_matches_eager(self):
+        orders = random_orders(200, seed=3)
+        buffer = build_slab_bytes(orders, free_slots=10, uninitialized_slots=10)
+        eager = Slab.from_bytes(buffer)
+        lazy = Slab.from_bytes(buffer, lazy=True)
+
+        as_tuple = lambda n: (n.key, n.callback_info_pt, n.base_quantity, n.user_market, n.fee_tier)
+        self.assertEqual([as_tuple(n) for n in lazy.items()], [as_tuple(n) for n in eager.items()])
+        self.assertEqual([as_tuple(n) for n in lazy.items(descending=True)], [as_tuple(n) for n in eager.items(descending=True)])
+        for key, _, _, _ in orders:
+            self.assertEqual(as_tuple(lazy.get(key)), as_tuple(eager.get(key)))
+
+    def test_lazy_only_decodes_reached_nodes(self):
+        orders = random_orders(500, seed=4)
+        slab = Slab.from_bytes(build_slab_bytes(orders, free_slots=100), lazy=True)
+        self.assertEqual(len(slab._nodes), 0)
+
+        best = next(slab.items(descending=True))
+        self.assertIsInstance(best, LazySlabLeafNode)
+        self.assertEqual(best.key, max(o[0] for o in orders))
+        self.assertLess(len(slab._nodes), 64)
+
+        key, _, user_market, fee_tier = orders[0]
+        node = slab.get(key)
+        self.assertIsNone(node._user_market)
+        self.assertEqual(node.user_market, user_market)
+        self.assertEqual(node.fee_tier, fee_tier)
+
+    def test_index_and_get_many(self):
+        orders = random_orders(200, seed=6)
+        missing = [o[0] ^ 1 for o in orders[:20]]
+        for lazy in [False, True]:
+            slab = Slab.from_bytes(build_slab_bytes(orders, free_slots=10), lazy)
+            keys = [o[0] for o in orders] + missing
+            expected = [slab.get(k) for k in keys]
+            self.assertIsNone(slab._index)
+
+            self.assertEqual(slab.get_many(keys), expected)
+            self.assertEqual(len(slab._index), len(orders))
+            self.assertEqual([slab.get(k) for k in keys], expected)
+            self.assertEqual(slab.get_many([]), [])
+
+        slab = Slab.from_bytes(build_slab_bytes(orders))
+        self.assertEqual(slab.get(orders[0][0], use_index=True).base_quantity, orders[0][1])
+        self.assertIsNotNone(slab._index)
+        self.assertEqual(Slab.from_bytes(build_slab_bytes([])).get_many([orders[0][0]]), [None])
+
+    def test_to_arrays_matches_items(self):
+        for lazy in [False, True]:
+            slab = Slab.from_bytes(build_slab_bytes(random_orders(300, seed=5), free_slots=15, uninitialized_slots=5), lazy)
+            arrays = slab.to_arrays()
+            nodes = list(slab.items())
+            self.assertEqual([(int(hi) << 64) | int(lo) for hi, lo in zip(arrays.key_hi, arrays.key_lo)], [n.key for n in nodes])
+            self.assertEqual(arrays.price.tolist(), [n.key >> 64 for n in nodes])
+            self.assertEqual(arrays.base_quantity.tolist(), [n.base_quantity for n in nodes])
+            self.assertEqual(arrays.fee_tier.tolist(), [n.fee_tier for n in nodes])
+            self.assertEqual([bytes(u) for u in arrays.user_market], [bytes(n.user_market) for n in nodes])
+            self.assertIs(slab.to_arrays(), arrays)
+
+        empty = Slab.from_bytes(build_slab_bytes([], free_slots=3)).to_arrays()
+        self.assertEqual(len(empty.key_hi), 0)
+        self.assertEqual(empty.user_market.shape, (0, 32))
+
+if __name__ == '__main__':
+    unittest.main()
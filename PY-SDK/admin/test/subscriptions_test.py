@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+import unittest
+import websockets
+from solana.keypair import Keypair
+from ...public.src.pyaver.subscriptions import AccountSubscriptionManager, get_websocket_endpoint
+
+class LocalRpcWebsocket():
+    """
+    Local stand-in for the accountSubscribe / accountUnsubscribe RPC websocket methods
+    """
+    def __init__(self):
+        self.connections = []
+        self.subscriptions = {}
+        self.requests = []
+        self.next_subscription_id = 100
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, 'localhost', 0)
+        self.endpoint = f'ws://localhost:{self.server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handler(self, ws, *args):
+        self.connections.append(ws)
+        async for message in ws:
+            request = json.loads(message)
+            self.requests.append(request)
+            if(request['method'] == 'accountSubscribe'):
+                if(request['params'][0] == 'invalid'):
+                    await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32602, 'message': 'Invalid pubkey'}}))
+                    continue
+                self.next_subscription_id += 1
+                self.subscriptions[self.next_subscription_id] = (ws, request['params'][0])
+                await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': self.next_subscription_id}))
+            elif(request['method'] == 'accountUnsubscribe'):
+                self.subscriptions.pop(request['params'][0], None)
+                await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': True}))
+
+    def subscribed_accounts(self):
+        return sorted(pubkey for ws, pubkey in self.subscriptions.values() if ws.open)
+
+    async def notify(self, pubkey: str, data: bytes, slot: int):
+        for subscription_id, (ws, subscribed) in list(self.subscriptions.items()):
+            if(subscribed == pubkey and ws.open):
+                await ws.send(json.dumps({
+                    'jsonrpc': '2.0',
+                    'method': 'accountNotification',
+                    'params': {
+                        'subscription': subscription_id,
+                        'result': {
+                            'context': {'slot': slot},
+                            'value': None if data is None else {'data': [base64.b64encode(data).decode('ascii'), 'base64'], 'lamports': 1},
+                        },
+                    },
+                }))
+
+class AccountsConnection():
+    """
+    Stands in for AsyncClient, serving the current data of accounts
+    """
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.accounts = {}
+
+    async def get_slot(self, commitment=None):
+        return {'result': self.slot}
+
+    async def get_multiple_accounts(self, pubkeys):
+        value = [{'data': [base64.b64encode(self.accounts[str(p)]).decode('ascii'), 'base64']} if str(p) in self.accounts else None for p in pubkeys]
+        return {'result': {'context': {'slot': self.slot}, 'value': value}}
+
+async def wait_for(condition, timeout: float = 5):
+    for _ in range(int(timeout / 0.01)):
+        if(condition()):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('Condition not met in time')
+
+
+class TestSubscriptions(unittest.TestCase):
+
+    def test_get_websocket_endpoint(self):
+        self.assertEqual(get_websocket_endpoint('https://api.devnet.solana.com'), 'wss://api.devnet.solana.com')
+        self.assertEqual(get_websocket_endpoint('https://api.mainnet-beta.solana.com/'), 'wss://api.mainnet-beta.solana.com/')
+        self.assertEqual(get_websocket_endpoint('http://localhost:8899'), 'ws://localhost:8900')
+
+    def test_shared_subscriptions_and_updates(self):
+        async def run():
+            server = LocalRpcWebsocket()
+            await server.start()
+            manager = AccountSubscriptionManager(server.endpoint, reconnect_delay=0.01)
+            a, b = Keypair().public_key, Keypair().public_key
+            updates = []
+            async def async_callback(pubkey, data, slot):
+                updates.append(('async', str(pubkey), data, slot))
+
+            first = await manager.subscribe(a, lambda pubkey, data, slot: updates.append(('sync', str(pubkey), data, slot)))
+            second = await manager.subscribe(a, async_callback)
+            third = await manager.subscribe(b, async_callback)
+            await wait_for(lambda: server.subscribed_accounts() == sorted([str(a), str(b)]))
+
+            await server.notify(str(a), b'hello', 10)
+            await server.notify(str(a), b'stale', 9)
+            await server.notify(str(b), None, 11)
+            await wait_for(lambda: len(updates) == 3)
+            self.assertEqual(updates, [('sync', str(a), b'hello', 10), ('async', str(a), b'hello', 10), ('async', str(b), None, 11)])
+
+            # The account stays subscribed until its last consumer unsubscribes
+            await manager.unsubscribe(first)
+            await asyncio.sleep(0.05)
+            self.assertEqual(server.subscribed_accounts(), sorted([str(a), str(b)]))
+            await manager.unsubscribe(second)
+            await wait_for(lambda: server.subscribed_accounts() == [str(b)])
+
+            # The connection is closed with the last consumer
+            await manager.unsubscribe(third)
+            await wait_for(lambda: manager._task.done())
+            self.assertFalse(manager.is_connected)
+            self.assertEqual(len(server.connections), 1)
+            self.assertFalse(server.connections[0].open)
+
+            await manager.close()
+            await server.stop()
+
+        asyncio.run(run())
+
+    def test_reconnects_and_resubscribes(self):
+        async def run():
+            server = LocalRpcWebsocket()
+            await server.start()
+            connection = AccountsConnection(15)
+            manager = AccountSubscriptionManager(server.endpoint, reconnect_delay=0.01, connection=connection)
+            pubkey = Keypair().public_key
+            updates = []
+            await manager.subscribe(pubkey, lambda pubkey, data, slot: updates.append(data))
+            await manager.subscribe('invalid', lambda pubkey, data, slot: None)
+            await wait_for(lambda: server.subscribed_accounts() == [str(pubkey)])
+            self.assertIn('invalid', manager.failed_subscriptions)
+
+            # The account changes while the connection is down, without a notification
+            await server.connections[0].close()
+            connection.accounts[str(pubkey)] = b'changed while disconnected'
+            await wait_for(lambda: len(server.connections) == 2 and server.subscribed_accounts() == [str(pubkey)])
+            self.assertTrue(manager.is_connected)
+            await wait_for(lambda: updates == [b'changed while disconnected'])
+
+            await server.notify(str(pubkey), b'after reconnect', 20)
+            await wait_for(lambda: updates == [b'changed while disconnected', b'after reconnect'])
+
+            await manager.close()
+            self.assertFalse(manager.is_connected)
+            await server.stop()
+
+        asyncio.run(run())
+
+    def test_skips_malformed_messages(self):
+        async def run():
+            server = LocalRpcWebsocket()
+            await server.start()
+            manager = AccountSubscriptionManager(server.endpoint, reconnect_delay=0.01)
+            pubkey = Keypair().public_key
+            updates = []
+            await manager.subscribe(pubkey, lambda pubkey, data, slot: updates.append(data))
+            await wait_for(lambda: server.subscribed_accounts() == [str(pubkey)])
+
+            ws, _ = next(iter(server.subscriptions.values()))
+            subscription_id = next(iter(server.subscriptions))
+            await ws.send('not json')
+            # A notification without context
+            await ws.send(json.dumps({'jsonrpc': '2.0', 'method': 'accountNotification', 'params': {'subscription': subscription_id, 'result': {'value': None}}}))
+            await server.notify(str(pubkey), b'after malformed', 30)
+            await wait_for(lambda: updates == [b'after malformed'])
+            self.assertEqual(len(server.connections), 1)
+
+            await manager.close()
+            await server.stop()
+
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
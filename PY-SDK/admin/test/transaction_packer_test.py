@@ -0,0 +1,70 @@
+import random
+import unittest
+from solana.blockhash import Blockhash
+from solana.keypair import Keypair
+from solana.transaction import Transaction, TransactionInstruction
+from ...public.src.pyaver.compute_units import compute_budget_program_id
+from ...public.src.pyaver.constants import MAX_TRANSACTION_COMPUTE_UNITS, MAX_TRANSACTION_SIZE
+from ...public.src.pyaver.instruction_encoders import compile_instruction
+from ...public.src.pyaver.transaction_packer import pack_instructions
+from .account_decoders_test import load_program
+from .instruction_encoders_test import random_accounts, random_place_order_args
+
+def place_order_templates(program, user, outcomes: int):
+    """
+    Templates of place_order instructions of a user on one market, one per outcome
+    """
+    shared = random_accounts(program, 'place_order')
+    shared['user'] = user
+    templates = []
+    for _ in range(outcomes):
+        accounts = dict(shared)
+        for name in ['orderbook', 'bids', 'asks', 'event_queue']:
+            accounts[name] = Keypair().public_key
+        templates.append(compile_instruction(program, 'place_order', accounts))
+    return templates
+
+def serialized_size(ixs: list[TransactionInstruction], fee_payer: Keypair):
+    tx = Transaction(recent_blockhash=Blockhash(str(Keypair().public_key)), fee_payer=fee_payer.public_key)
+    tx.add(*ixs)
+    tx.sign(fee_payer)
+    return len(tx.serialize())
+
+
+class TestTransactionPacker(unittest.TestCase):
+
+    def setUp(self):
+        self.program = load_program()
+        self.owner = Keypair()
+
+    def test_packs_orders_into_full_transactions(self):
+        templates = place_order_templates(self.program, self.owner.public_key, 4)
+        ixs = [random.choice(templates).build(random_place_order_args()) for _ in range(40)]
+        packed = pack_instructions(ixs, self.owner.public_key)
+        self.assertLess(len(packed), len(ixs) / 2)
+        # Order is kept and every instruction is sent once
+        self.assertEqual([ix for tx in packed for ix in tx[2:]], ixs)
+        for i, tx in enumerate(packed):
+            self.assertEqual([ix.program_id for ix in tx[:2]], [compute_budget_program_id] * 2)
+            self.assertEqual(int.from_bytes(tx[0].data[1:], 'little'), 200_000 * (len(tx) - 2))
+            self.assertLessEqual(serialized_size(tx, self.owner), MAX_TRANSACTION_SIZE)
+            if(i < len(packed) - 1 and int.from_bytes(tx[0].data[1:], 'little') + 200_000 <= MAX_TRANSACTION_COMPUTE_UNITS):
+                # The next instruction did not fit (when the transaction was not closed by its compute units)
+                with self.assertRaises(RuntimeError):
+                    serialized_size(tx + [packed[i + 1][2]], self.owner)
+
+    def test_respects_compute_units(self):
+        program_id = Keypair().public_key
+        ixs = [TransactionInstruction(keys=[], program_id=program_id, data=bytes([i])) for i in range(10)]
+        packed = pack_instructions(ixs, self.owner.public_key, compute_units=[400_000] * 10, compute_unit_price=None)
+        self.assertEqual([len(tx) - 1 for tx in packed], [3, 3, 3, 1])
+        self.assertEqual([int.from_bytes(tx[0].data[1:], 'little') for tx in packed], [1_200_000] * 3 + [400_000])
+        self.assertEqual([ix for tx in packed for ix in tx[1:]], ixs)
+
+    def test_instruction_too_large(self):
+        ix = TransactionInstruction(keys=[], program_id=Keypair().public_key, data=bytes(MAX_TRANSACTION_SIZE))
+        with self.assertRaises(Exception):
+            pack_instructions([ix], self.owner.public_key)
+
+if __name__ == '__main__':
+    unittest.main()
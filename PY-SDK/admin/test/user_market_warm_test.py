@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from anchorpy import Program
+from solana.keypair import Keypair
+from ...public.src.pyaver import user_market, version_checks
+from ...public.src.pyaver.constants import AVER_PROGRAM_IDS
+from ...public.src.pyaver.enums import SelfTradeBehavior, Side, SizeFormat
+from ...public.src.pyaver.user_market import UserMarket
+from .account_decoders_test import load_program
+
+class OrderClient():
+    """
+    Stands in for AverClient, counting the ATA lookups (each one a getTokenAccountBalance request)
+    """
+    def __init__(self, program: Program):
+        self.program = program
+        self.owner = Keypair()
+        self.ata = Keypair().public_key
+        self.ata_lookups = 0
+
+    async def get_program_from_program_id(self, program_id):
+        return self.program
+
+    async def get_or_create_associated_token_account(self, owner, payer, token_mint=None):
+        self.ata_lookups += 1
+        return self.ata
+
+def order_user_market(aver_client: OrderClient, owner: Keypair):
+    market = SimpleNamespace(aver_client=aver_client, program_id=aver_client.program.program_id, market_state=SimpleNamespace(quote_token_mint=Keypair().public_key))
+    uma = UserMarket(aver_client, Keypair().public_key, SimpleNamespace(user=owner.public_key), market, None, None)
+    uma.make_update_all_accounts_if_required_instructions = AsyncMock(return_value=[])
+    uma.make_place_order_instruction = AsyncMock(return_value='ix')
+    return uma
+
+
+class TestUserMarketWarm(unittest.TestCase):
+
+    def setUp(self):
+        program = load_program()
+        self.program = Program(program.idl, AVER_PROGRAM_IDS[0], program.provider)
+
+    def place_orders(self, uma: UserMarket, owner: Keypair, n: int):
+        return [uma.place_order(owner, 0, Side.BUY, 0.5, 1, SizeFormat.STAKE, self_trade_behavior=SelfTradeBehavior.CANCEL_PROVIDE) for _ in range(n)]
+
+    def test_warm_orders_only_send(self):
+        aver_client = OrderClient(self.program)
+        owner = Keypair()
+        uma = order_user_market(aver_client, owner)
+        stale = Exception("{'code': -32002, 'message': 'Transaction simulation failed: Error processing Instruction 0: custom program error: 0xbbf'}")
+        rejected = Exception("{'code': -32002, 'message': 'Transaction simulation failed: Error processing Instruction 0: custom program error: 0x1770'}")
+        outcomes = iter(['sent'] * 5 + ['rejected', 'timeout', 'stale', 'sent', 'stale_retried'] + ['sent'] * 4)
+
+        async def send(*args, on_error=None):
+            outcome = next(outcomes)
+            if(outcome == 'rejected'):
+                raise rejected
+            if(outcome == 'stale'):
+                raise stale
+            if(outcome == 'stale_retried'):
+                # sign_and_send_transaction_instructions reports each failed attempt and returns None once out of retries
+                on_error(stale)
+                return None
+            return None if outcome == 'timeout' else {'result': 'signature'}
+
+        def counts():
+            return (aver_client.ata_lookups, uma.make_update_all_accounts_if_required_instructions.await_count)
+
+        async def run():
+            with patch.object(user_market, 'sign_and_send_transaction_instructions', AsyncMock(side_effect=send)) as sent:
+                await asyncio.gather(*self.place_orders(uma, owner, 2))
+                cold = counts()
+                await uma.warm_up(owner)
+                warm_up = counts()
+                for order in self.place_orders(uma, owner, 3):
+                    await order
+                warm = counts()
+                # Orders rejected by the program and failed requests keep the cached results
+                with self.assertRaises(Exception):
+                    await self.place_orders(uma, owner, 1)[0]
+                timed_out = await self.place_orders(uma, owner, 1)[0]
+                still_warm = (counts(), uma.is_warm)
+                # An error pointing to stale accounts drops them, the next order resolves and caches them again
+                with self.assertRaises(Exception):
+                    await self.place_orders(uma, owner, 1)[0]
+                is_warm = uma.is_warm
+                await self.place_orders(uma, owner, 1)[0]
+                rewarmed = (*counts(), uma.is_warm)
+                await self.place_orders(uma, owner, 1)[0]
+                swallowed = uma.is_warm
+                # Concurrent orders share a single warm up
+                await asyncio.gather(*self.place_orders(uma, owner, 3))
+                concurrent = (*counts(), uma.is_warm)
+                uma.cool_down()
+                await self.place_orders(uma, owner, 1)[0]
+                cooled = (*counts(), uma.is_warm)
+            return sent, cold, warm_up, warm, timed_out, still_warm, is_warm, rewarmed, swallowed, concurrent, cooled
+
+        sent, cold, warm_up, warm, timed_out, still_warm, is_warm, rewarmed, swallowed, concurrent, cooled = asyncio.run(run())
+        self.assertEqual(cold, (2, 2))
+        self.assertEqual(warm_up, (3, 3))
+        self.assertEqual(warm, (3, 3))
+        self.assertIsNone(timed_out)
+        self.assertEqual(still_warm, ((3, 3), True))
+        self.assertFalse(is_warm)
+        self.assertEqual(rewarmed, (4, 4, True))
+        self.assertFalse(swallowed)
+        self.assertEqual(concurrent, (5, 5, True))
+        self.assertEqual(cooled, (6, 6, False))
+        self.assertEqual(sent.await_count, 14)
+        for call in sent.await_args_list:
+            self.assertEqual(call.args[3], ['ix'])
+        self.assertTrue(all(call.args[5] == aver_client.ata for call in uma.make_place_order_instruction.await_args_list))
+
+    def test_idl_checks_are_cached(self):
+        compare = patch.object(version_checks, 'get_differences_between_idl_and_program_instruction', wraps=version_checks.get_differences_between_idl_and_program_instruction)
+        with compare as differences:
+            for _ in range(5):
+                version_checks.check_if_instruction_is_out_of_date_with_idl('place_order', self.program)
+        self.assertEqual(differences.call_count, 1)
+        self.assertIs(version_checks.load_idl_from_json(str(AVER_PROGRAM_IDS[0])), version_checks.load_idl_from_json(str(AVER_PROGRAM_IDS[0])))
+
+if __name__ == '__main__':
+    unittest.main()
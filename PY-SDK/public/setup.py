@@ -29,7 +29,9 @@ setup(
         'solana<=0.23.2',
         'anchorpy==0.9.0',
         'pydash',
-        'base58'
+        'base58',
+        'numpy',
+        'websockets'
       ],
 
 )
\ No newline at end of file
@@ -0,0 +1,192 @@
+from typing import Any, Callable
+from weakref import WeakKeyDictionary, ref
+from anchorpy import Program
+from .enums import AccountTypes
+from .fast_decoders import compile_account_decoder, compile_account_projection, find_layout_classes
+
+ACCOUNT_DISCRIMINATOR_SIZE = 8
+
+class AccountDecoders():
+    """
+    Decoders of every Aver account type and version of a Program, compiled once per Program
+
+    Use get_account_decoders() to get the decoders of a Program.
+    """
+
+    latest_versions: dict[AccountTypes, int]
+    """
+    Latest version of each account type according to the program
+    """
+    layout_classes: dict[str, dict[str, type]]
+    """
+    Classes generated by anchor for the types of each account (e.g., Market, MarketV0), by name
+    """
+
+    def __init__(self, program: Program):
+        """
+        Compiles the decoders of a Program. Do not use this function; use get_account_decoders() instead
+
+        Args:
+            program (Program): AnchorPy Program
+        """
+        self.latest_versions = {}
+        self.layout_classes = {}
+        # Weak so the decoders cached per program do not keep the program alive
+        self._program = ref(program)
+        self._projections: dict[tuple[AccountTypes, tuple[str]], AccountProjection] = {}
+        # (account type, version byte) -> decoder, and the decoder of the latest version of each account type
+        self._decoders: dict[tuple[AccountTypes, int], Callable[[bytes], Any]] = {}
+        self._latest_decoders: dict[AccountTypes, Callable[[bytes], Any]] = {}
+
+        for account_type in AccountTypes:
+            if(program.account.get(account_type.value) is None):
+                continue
+            latest_version = 0
+            while program.account.get(f'{account_type.value}V{latest_version}') is not None:
+                self._decoders[(account_type, latest_version)] = AccountDecoders.__old_version_decoder(program, account_type, latest_version)
+                latest_version += 1
+            self.latest_versions[account_type] = latest_version
+            for name in [account_type.value] + [f'{account_type.value}V{v}' for v in range(latest_version)]:
+                self.layout_classes[name] = {}
+                find_layout_classes(program.account[name].coder.accounts._accounts_layout[name], self.layout_classes[name])
+            self._latest_decoders[account_type] = AccountDecoders.__latest_version_decoder(program, account_type)
+
+    @staticmethod
+    def __latest_version_decoder(program: Program, account_type: AccountTypes):
+        coder = program.account[account_type.value].coder.accounts
+        layout = coder._accounts_layout[account_type.value]
+        discriminator = coder.acc_name_to_discriminator[account_type.value]
+        fast_decode = compile_account_decoder(program, account_type.value)
+
+        def decode(data: bytes):
+            if(data[:ACCOUNT_DISCRIMINATOR_SIZE] != discriminator):
+                # Other accounts (or invalid data) go through anchor, which raises the usual errors
+                return coder.decode(data)
+            if(fast_decode is not None):
+                try:
+                    return fast_decode(data)
+                except Exception:
+                    # Truncated or invalid data, anchor raises its usual error
+                    pass
+            return layout.parse(data[ACCOUNT_DISCRIMINATOR_SIZE:])
+        return decode
+
+    @staticmethod
+    def __old_version_decoder(program: Program, account_type: AccountTypes, version: int):
+        name = f'{account_type.value}V{version}'
+        layout = program.account[name].coder.accounts._accounts_layout[name]
+
+        def decode(data: bytes):
+            print(f'THE {account_type} BEING READ HAS NOT BEEN UPDATED TO THE LATEST VERSION')
+            print('PLEASE CALL THE UPDATE INSTRUCTION FOR THE CORRESPONDING ACCOUNT TYPE TO RECTIFY, IF POSSIBLE')
+            # The discriminator of old versions is the one of the latest version, so it is skipped
+            return layout.parse(data[ACCOUNT_DISCRIMINATOR_SIZE:])
+        return decode
+
+    def decode(self, account_type: AccountTypes, data: bytes):
+        """
+        Decodes an account of this program, taking into account its version (9th byte)
+
+        Args:
+            account_type (AccountTypes): Account Type (e.g., MarketStore)
+            data (bytes): Raw bytes data
+
+        Returns:
+            Container: Parsed object
+        """
+        decoder = self._decoders.get((account_type, data[8]))
+        if(decoder is None):
+            decoder = self._latest_decoders[account_type]
+        return decoder(data)
+
+    def get_projection(self, account_type: AccountTypes, field_names: list[str]):
+        """
+        Gets a decoder for some fields of an account type, compiling it on first use
+
+        Args:
+            account_type (AccountTypes): Account Type (e.g., Market)
+            field_names (list[str]): Names of the fields to decode (snake case, e.g., market_status)
+
+        Raises:
+            Exception: Fields cannot be projected
+
+        Returns:
+            AccountProjection: AccountProjection object
+        """
+        key = (account_type, tuple(field_names))
+        projection = self._projections.get(key)
+        if(projection is None):
+            projection = AccountProjection(self._program(), account_type, self.latest_versions[account_type], field_names)
+            self._projections[key] = projection
+        return projection
+
+
+class AccountProjection():
+    """
+    Decoder for some fields of an account type, reading only the first bytes of accounts of any version
+
+    Use AccountDecoders.get_projection() to get a projection.
+    """
+
+    length: int
+    """
+    Number of bytes needed at the start of the account (data_slice length) to decode the fields of any version
+    """
+
+    def __init__(self, program: Program, account_type: AccountTypes, latest_version: int, field_names: list[str]):
+        """
+        Compiles the projection. Do not use this function; use AccountDecoders.get_projection() instead
+
+        Args:
+            program (Program): AnchorPy Program
+            account_type (AccountTypes): Account Type (e.g., Market)
+            latest_version (int): Latest version of the account type according to the program
+            field_names (list[str]): Names of the fields to decode
+
+        Raises:
+            Exception: Fields cannot be projected
+        """
+        # Same version selection as AccountDecoders.decode()
+        names = {v: f'{account_type.value}V{v}' for v in range(latest_version)}
+        names[None] = account_type.value
+        self._decoders = {}
+        lengths = []
+        for version, name in names.items():
+            projection = compile_account_projection(program, name, field_names)
+            if(projection is None):
+                raise Exception(f'Cannot read {field_names} from the first bytes of {name}')
+            lengths.append(projection[0])
+            self._decoders[version] = projection[1]
+        self._latest_decoder = self._decoders.pop(None)
+        self.length = max(lengths)
+
+    def decode(self, data: bytes) -> dict:
+        """
+        Decodes the fields from the first bytes of an account
+
+        Args:
+            data (bytes): First bytes of the account (at least length bytes)
+
+        Returns:
+            dict: Decoded fields by name
+        """
+        return self._decoders.get(data[8], self._latest_decoder)(data)
+
+
+_decoders_by_program: 'WeakKeyDictionary[Program, AccountDecoders]' = WeakKeyDictionary()
+
+def get_account_decoders(program: Program) -> AccountDecoders:
+    """
+    Gets the compiled account decoders of a Program, compiling them on first use
+
+    Args:
+        program (Program): AnchorPy Program
+
+    Returns:
+        AccountDecoders: AccountDecoders object
+    """
+    decoders = _decoders_by_program.get(program)
+    if(decoders is None):
+        decoders = AccountDecoders(program)
+        _decoders_by_program[program] = decoders
+    return decoders
@@ -1,19 +1,22 @@
-from requests import get
-from asyncio import gather
-import base64
+from asyncio import Future, Task, create_task, gather, shield
+from concurrent.futures import Executor
 import datetime
-from anchorpy import Provider, Wallet, Program
+from anchorpy import Idl, Provider, Wallet, Program
 from solana.rpc import types
 from .version_checks import check_idl_has_same_instructions_as_sdk
 from solana.rpc.async_api import AsyncClient
 from solana.publickey import PublicKey
 from solana.transaction import Transaction
-from solana.rpc.api import Client
-from .constants import AVER_PROGRAM_IDS, SYS_VAR_CLOCK, get_quote_token, get_solana_endpoint
+from .constants import AVER_PROGRAM_IDS, get_quote_token, get_solana_endpoint
 from solana.keypair import Keypair
 from spl.token.instructions import get_associated_token_address, create_associated_token_account
 from .enums import SolanaNetwork
-from .layouts import CLOCK_STRUCT
+from .decode_cache import DecodeCache
+from .account_decoders import get_account_decoders
+from .subscriptions import AccountSubscriptionManager, get_websocket_endpoint
+from .idl_cache import IdlCache
+from .cluster_clock import ClusterClock
+from .blockhash_prefetcher import BlockhashPrefetcher
 
 class AverClient():
     """
@@ -32,16 +35,31 @@ class AverClient():
     """Devnet or Mainnet - must correspond to the network provided in the connection AsyncClient"""
     quote_token: PublicKey
     """The token mint of the default quote token for markets on this network (i.e. USDC)"""
-    solana_client: Client
-    """Solana Client"""
     owner: Keypair
     """The default payer for transactions on-chain, unless one is specified"""
+    decode_cache: DecodeCache
+    """Cache of decoded accounts reused when refreshing unchanged accounts (None if disabled)"""
+    decode_executor: Executor
+    """Executor decoding accounts of bulk loads off the event loop, e.g. ThreadPoolExecutor or ProcessPoolExecutor (None decodes on the event loop)"""
+    subscriptions: AccountSubscriptionManager
+    """Websocket account subscriptions (see refresh.subscribe_to_markets), connected on first use"""
+    idl_cache: IdlCache
+    """IDLs stored on disk, used instead of fetching IDLs onchain when loading programs (None if disabled)"""
+    idl_verification: Task
+    """Background task checking the IDLs loaded from disk against the onchain IDLs (None if not started)"""
+    clock: ClusterClock
+    """Local estimate of the cluster clock, sampling the clock sysvar periodically instead of on every use"""
+    blockhashes: BlockhashPrefetcher
+    """Recent blockhash used to sign transactions, refreshed in the background once transactions are sent"""
 
     def __init__(
             self, 
             programs: list[Program],
             solana_network: SolanaNetwork,
-            connection: AsyncClient
+            connection: AsyncClient,
+            decode_cache: DecodeCache = None,
+            decode_executor: Executor = None,
+            idl_cache: IdlCache = None,
         ):
         """
         Initialises AverClient object. Do not use this function; use AverClient.load() instead
@@ -49,14 +67,43 @@ class AverClient():
         Args:
             program (Program): Aver program AnchorPy
             solana_network (SolanaNetwork): Solana network
+            decode_cache (DecodeCache, optional): Cache of decoded accounts. Defaults to None.
+            decode_executor (Executor, optional): Executor decoding accounts of bulk loads. Defaults to None.
+            idl_cache (IdlCache, optional): IDLs stored on disk. Defaults to None.
         """
         self.connection = connection
         self.programs = programs
+        self._programs_by_id: dict[bytes, Program] = {bytes(p.program_id): p for p in programs}
+        self._program_loads: dict[bytes, Future] = {}
         self.provider = programs[0].provider
         self.solana_network = solana_network
         self.quote_token = get_quote_token(solana_network)
-        self.solana_client = Client(connection._provider.endpoint_uri)
+        self._solana_client = None
         self.owner = programs[0].provider.wallet.payer
+        self.decode_cache = decode_cache
+        self.decode_executor = decode_executor
+        self.idl_cache = idl_cache
+        self.idl_verification = None
+        self.clock = ClusterClock(connection)
+        self.blockhashes = BlockhashPrefetcher(connection, self.clock)
+        self.subscriptions = AccountSubscriptionManager(
+            get_websocket_endpoint(connection._provider.endpoint_uri),
+            str(connection._commitment),
+            connection=connection,
+        )
+
+    @property
+    def solana_client(self):
+        """
+        Synchronous Solana Client, created the first time it is used
+
+        Returns:
+            Client: Solana Client
+        """
+        if(self._solana_client is None):
+            from solana.rpc.api import Client
+            self._solana_client = Client(self.connection._provider.endpoint_uri)
+        return self._solana_client
 
     @staticmethod
     async def load(
@@ -65,16 +112,27 @@ class AverClient():
             opts: types.TxOpts = None,
             network: SolanaNetwork = SolanaNetwork.DEVNET,
             program_ids: list[PublicKey] = AVER_PROGRAM_IDS,
+            decode_cache: DecodeCache = None,
+            decode_executor: Executor = None,
+            idl_cache_directory: str = None,
+            use_bundled_idls: bool = True,
         ):
             """
             Initialises an AverClient object
 
+            IDLs are read from idl_cache_directory or the IDLs bundled with the SDK when available, so no IDL is fetched onchain before loading markets.
+            IDLs read from disk are then verified against the onchain IDLs in the background (see AverClient.verify_idls).
+
             Args:
                 connection (AsyncClient): Solana AsyncClient object
                 owner (KeypairorWallet): Default keypair to pay transaction costs (and rent costs) unless one is otherwise specified for a given transaction.
                 opts (types.TxOpts): Default options for sending transactions. 
                 network (SolanaNetwork): Solana network
                 program_id (PublicKey, optional): Program public key. Defaults to latest AVER_PROGRAM_ID specified in constants.py.
+                decode_cache (DecodeCache, optional): Reuse decoded accounts whose data is unchanged when refreshing (e.g., DecodeCache()). Defaults to None.
+                decode_executor (Executor, optional): Decode accounts of bulk loads (e.g., refresh.refresh_multiple_user_markets) in this executor so the event loop stays responsive (e.g., ProcessPoolExecutor()). Defaults to None.
+                idl_cache_directory (str, optional): Directory IDLs fetched onchain are saved to and read from on later loads. Defaults to None.
+                use_bundled_idls (bool, optional): Use the IDLs bundled with the SDK instead of fetching them onchain. Defaults to True.
 
             Returns:
                 AverClient: AverClient
@@ -95,14 +153,19 @@ class AverClient():
                     skip_preflight=False
                 )
             )
-            programs = await gather(*[AverClient.load_program(provider, p) for  p in program_ids])
+            idl_cache = IdlCache(idl_cache_directory, use_bundled_idls) if idl_cache_directory is not None or use_bundled_idls else None
+            programs = await gather(*[AverClient.load_program(provider, p, idl_cache) for  p in program_ids])
 
-            return AverClient(programs, network, connection)    
+            aver_client = AverClient(programs, network, connection, decode_cache, decode_executor, idl_cache)
+            if(idl_cache is not None and len(idl_cache.served_from_disk) > 0):
+                aver_client.idl_verification = create_task(aver_client.verify_idls())
+            return aver_client
 
     @staticmethod
     async def load_program(
             provider: Provider,
-            program_id: PublicKey
+            program_id: PublicKey,
+            idl_cache: IdlCache = None,
         ):
         """
         Loads Aver Program
@@ -110,6 +173,7 @@ class AverClient():
         Args:
             provider (Provider): Provider
             program_id (PublicKey, optional): Program public key.
+            idl_cache (IdlCache, optional): Read the IDL from disk when available, and save IDLs fetched onchain. Defaults to None.
 
         Raises:
             Exception: Program IDL not loaded
@@ -117,10 +181,16 @@ class AverClient():
         Returns:
             Program: Program
         """
-        idl = await Program.fetch_idl(program_id,provider)
-        if(idl):
-            program = Program(idl, program_id, provider)
+        raw_idl = idl_cache.load(program_id) if idl_cache is not None else None
+        if(raw_idl is None):
+            raw_idl = await Program.fetch_raw_idl(program_id, provider)
+            if(idl_cache is not None and raw_idl):
+                idl_cache.save(program_id, raw_idl)
+        if(raw_idl):
+            program = Program(Idl.from_json(raw_idl), program_id, provider)
             check_idl_has_same_instructions_as_sdk(program)
+            #Compiles the account decoders upfront so the first account loads don't pay for it
+            get_account_decoders(program)
             return program
         else:
             raise Exception('Program IDL not loaded')
@@ -129,30 +199,85 @@ class AverClient():
         """
         Loads and adds a program to the list of programs
 
+        If the program was already loaded, it is replaced by the newly loaded one.
+
         Args:
             program_id (PublicKey): Program public key
 
         Returns:
             Program: Program
         """
-        program = await AverClient.load_program(self.provider, program_id)
-        self.programs.append(program)
+        program = await AverClient.load_program(self.provider, program_id, self.idl_cache)
+        self.__register_program(program)
+        if(self.idl_cache is not None and str(program_id) in self.idl_cache.served_from_disk and (self.idl_verification is None or self.idl_verification.done())):
+            self.idl_verification = create_task(self.verify_idls())
         return program
+
+    async def verify_idls(self):
+        """
+        Checks the IDLs loaded from disk against the onchain IDLs
+
+        Programs whose onchain IDL differs are reloaded with the onchain IDL (and the IDL is saved to the cache directory).
+        Objects already holding the previous Program (e.g., AverMarket) keep using it until they are loaded again.
+
+        Returns:
+            list[PublicKey]: Programs which were reloaded
+        """
+        reloaded = []
+        while len(self.idl_cache.served_from_disk) > 0:
+            program_id = PublicKey(self.idl_cache.served_from_disk.pop())
+            program = self._programs_by_id.get(bytes(program_id))
+            if(program is None):
+                continue
+            try:
+                raw_idl = await Program.fetch_raw_idl(program_id, self.provider)
+            except Exception as e:
+                print(f'COULD NOT VERIFY THE IDL OF PROGRAM {program_id} ONCHAIN: {e}')
+                continue
+            if(Idl.from_json(raw_idl) == program.idl):
+                continue
+            print(f'THE IDL OF PROGRAM {program_id} ON DISK IS OUT OF DATE, RELOADING IT WITH THE ONCHAIN IDL')
+            self.idl_cache.save(program_id, raw_idl)
+            updated_program = Program(Idl.from_json(raw_idl), program_id, self.provider)
+            check_idl_has_same_instructions_as_sdk(updated_program)
+            get_account_decoders(updated_program)
+            self.__register_program(updated_program)
+            reloaded.append(program_id)
+        return reloaded
     
     async def get_program_from_program_id(self, program_id: PublicKey):
         """
         Checks if a program is already loaded and returns it. If not, it loads it, saves it and returns it.
 
+        Concurrent calls for a program which is not loaded yet share a single load.
+
         Args:
             program_id (PublicKey): Program public key
 
         Returns:
             Program: Program
         """
-        for p in self.programs:
-            if(p.program_id.to_base58() == program_id.to_base58()):
-                return p
-        return await self.add_program(program_id)
+        key = bytes(program_id)
+        program = self._programs_by_id.get(key)
+        if(program is not None):
+            return program
+        loading = self._program_loads.get(key)
+        if(loading is None):
+            loading = create_task(self.add_program(program_id))
+            self._program_loads[key] = loading
+            # Removed once done, so a failed load is retried by the next call
+            loading.add_done_callback(lambda _: self._program_loads.pop(key, None))
+        # Shielded so a cancelled caller does not cancel the load shared with other callers
+        return await shield(loading)
+
+    def __register_program(self, program: Program):
+        key = bytes(program.program_id)
+        previous = self._programs_by_id.get(key)
+        self._programs_by_id[key] = program
+        if(previous is not None and previous in self.programs):
+            self.programs[self.programs.index(previous)] = program
+        else:
+            self.programs.append(program)
 
     ####
 ## IDL Checks
@@ -163,6 +288,11 @@ class AverClient():
 
         Call this in your program's clean-up function(s)
         """
+        if(self.idl_verification is not None and not self.idl_verification.done()):
+            self.idl_verification.cancel()
+        self.clock.stop()
+        self.blockhashes.stop()
+        await self.subscriptions.close()
         await self.provider.close()
 
 
@@ -295,17 +425,18 @@ class AverClient():
         """
         Loads current solana system datetime
 
+        The sysvar read is also added to the samples of AverClient.clock. To avoid a request on every call, use AverClient.clock.unix_timestamp() instead.
+
         Returns:
             datetime: Current Solana Clock Datetime
         """
-        raw_data = await self.connection.get_account_info(SYS_VAR_CLOCK)
-        data = raw_data["result"]["value"]["data"][0]
-        parsed_data = CLOCK_STRUCT.parse(base64.decodebytes(data.encode("ascii")))
-        return datetime.datetime.utcfromtimestamp(parsed_data['unix_timestamp'])
+        sample = await self.clock.sample()
+        return datetime.datetime.utcfromtimestamp(sample.unix_timestamp)
         
 
     # DEPRECATED
     async def check_health(self):
+        from requests import get
         url = "https://dev.api.aver.exchange" + '/health?format=json'
         aver_health_response = get(url)
 
@@ -0,0 +1,143 @@
+import time
+from asyncio import CancelledError, Task, create_task, shield, sleep
+from typing import NamedTuple
+from solana.blockhash import Blockhash
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Finalized
+from .cluster_clock import ClusterClock
+from .constants import BLOCKHASH_EXPIRY_MARGIN_SLOTS, BLOCKHASH_REFRESH_INTERVAL, DEFAULT_SLOT_DURATION, MAX_BLOCKHASH_AGE_SLOTS
+
+class FetchedBlockhash(NamedTuple):
+    """
+    Recent blockhash and when it was fetched
+    """
+    blockhash: Blockhash
+    slot: int
+    """Slot of the bank the blockhash was read from"""
+    local_time: float
+    """time.monotonic() when the blockhash was fetched"""
+
+
+class BlockhashPrefetcher():
+    """
+    Keeps a recent blockhash ready so sending a transaction does not wait for getRecentBlockhash
+
+    A blockhash is used until it comes within BLOCKHASH_EXPIRY_MARGIN_SLOTS of expiring (MAX_BLOCKHASH_AGE_SLOTS after the slot it was read from).
+    The current slot is estimated by the ClusterClock when it has samples, otherwise from the time elapsed since the blockhash was fetched.
+    Once used, the blockhash is refreshed every refresh_interval seconds in the background.
+
+    Identical transactions signed with the same blockhash have the same signature, so sending the exact same transaction twice
+    within refresh_interval is only processed once.
+    """
+
+    connection: AsyncClient
+    """Solana AsyncClient"""
+    clock: ClusterClock
+    """Cluster clock used to estimate the current slot (None to only use the time elapsed)"""
+    refresh_interval: float
+    """Seconds between refreshes in the background"""
+    latest: FetchedBlockhash
+    """Most recently fetched blockhash (None if none was fetched yet)"""
+
+    def __init__(self, connection: AsyncClient, clock: ClusterClock = None, refresh_interval: float = BLOCKHASH_REFRESH_INTERVAL):
+        """
+        Initialise a BlockhashPrefetcher object. Nothing is fetched until a blockhash is requested.
+
+        Args:
+            connection (AsyncClient): Solana AsyncClient object
+            clock (ClusterClock, optional): Cluster clock used to estimate the current slot. Defaults to None.
+            refresh_interval (float, optional): Seconds between refreshes in the background. Defaults to BLOCKHASH_REFRESH_INTERVAL.
+        """
+        self.connection = connection
+        self.clock = clock
+        self.refresh_interval = refresh_interval
+        self.latest = None
+        self._fetching: Task = None
+        self._background: Task = None
+
+    async def refresh(self):
+        """
+        Fetches a new recent blockhash
+
+        Returns:
+            FetchedBlockhash: Fetched blockhash
+        """
+        response = await self.connection.get_recent_blockhash(Finalized)
+        if('error' in response):
+            raise Exception(response['error'])
+        self.latest = FetchedBlockhash(
+            Blockhash(response['result']['value']['blockhash']),
+            response['result']['context']['slot'],
+            time.monotonic(),
+        )
+        return self.latest
+
+    def slots_elapsed(self):
+        """
+        Estimated number of slots since the slot the latest blockhash was read from
+
+        Returns:
+            float: Slots elapsed (None if no blockhash was fetched)
+        """
+        if(self.latest is None):
+            return None
+        if(self.clock is not None and len(self.clock.samples) > 0):
+            return self.clock.estimate_slot() - self.latest.slot
+        return (time.monotonic() - self.latest.local_time) / DEFAULT_SLOT_DURATION
+
+    def is_usable(self):
+        """
+        Whether the latest blockhash can still be used to send a transaction
+
+        Returns:
+            bool: True if a blockhash was fetched and is not close to expiring
+        """
+        slots_elapsed = self.slots_elapsed()
+        return slots_elapsed is not None and slots_elapsed < MAX_BLOCKHASH_AGE_SLOTS - BLOCKHASH_EXPIRY_MARGIN_SLOTS
+
+    async def get(self):
+        """
+        Returns a blockhash to sign a transaction with, only fetching one if the latest is missing or close to expiring
+
+        Concurrent callers share a single request. The first call starts refreshing the blockhash in the background.
+
+        Returns:
+            Blockhash: Recent blockhash
+        """
+        self.start()
+        if(not self.is_usable()):
+            if(self._fetching is None or self._fetching.done()):
+                self._fetching = create_task(self.refresh())
+            await shield(self._fetching)
+        return self.latest.blockhash
+
+    def invalidate(self):
+        """
+        Forgets the latest blockhash (e.g., after the cluster rejected it), the next get() fetches a new one
+        """
+        self.latest = None
+
+    def start(self):
+        """
+        Refreshes the blockhash every refresh_interval seconds in the background
+        """
+        if(self._background is None or self._background.done()):
+            self._background = create_task(self.__refresh_periodically())
+
+    def stop(self):
+        """
+        Stops refreshing in the background
+        """
+        for task in [self._background, self._fetching]:
+            if(task is not None and not task.done()):
+                task.cancel()
+
+    async def __refresh_periodically(self):
+        while True:
+            await sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except CancelledError:
+                raise
+            except Exception as e:
+                print(f'COULD NOT REFRESH THE RECENT BLOCKHASH: {e}')
@@ -0,0 +1,196 @@
+import base64
+import time
+from asyncio import CancelledError, Task, create_task, shield, sleep
+from collections import deque
+from typing import NamedTuple
+from solana.rpc.async_api import AsyncClient
+from . import layouts
+from .constants import CLUSTER_CLOCK_REFRESH_INTERVAL, CLUSTER_CLOCK_SAMPLES, DEFAULT_SLOT_DURATION, SYS_VAR_CLOCK
+
+# Samples must span at least this many seconds before rates are estimated from them (the clock sysvar only has a 1 second resolution)
+_MIN_FIT_SPAN = 5
+# Bounds of the estimated rates, so a few noisy samples cannot produce absurd estimates
+_TIME_RATE_BOUNDS = (0.9, 1.1)
+_SLOT_RATE_BOUNDS = (0.5 / DEFAULT_SLOT_DURATION, 2 / DEFAULT_SLOT_DURATION)
+
+class ClockSample(NamedTuple):
+    """
+    Value of the clock sysvar at a local point in time
+    """
+    slot: int
+    unix_timestamp: int
+    local_time: float
+    """time.monotonic() when the sysvar was read"""
+
+
+class ClusterClock():
+    """
+    Local estimate of the Solana cluster clock (unix timestamp and slot)
+
+    The clock sysvar is sampled at most every refresh_interval seconds, in between the current time and slot are interpolated locally.
+    The rates at which the cluster time and slots advance relative to the local clock are estimated from the recent samples (correcting drift),
+    and the latest sample anchors the estimates.
+    """
+
+    connection: AsyncClient
+    """Solana AsyncClient"""
+    refresh_interval: float
+    """Seconds after which the latest sample is too old and the clock sysvar is sampled again"""
+    samples: deque[ClockSample]
+    """Most recent samples, oldest first"""
+
+    def __init__(self, connection: AsyncClient, refresh_interval: float = CLUSTER_CLOCK_REFRESH_INTERVAL, max_samples: int = CLUSTER_CLOCK_SAMPLES):
+        """
+        Initialise a ClusterClock object. Nothing is fetched until the clock is used.
+
+        Args:
+            connection (AsyncClient): Solana AsyncClient object
+            refresh_interval (float, optional): Seconds between samples of the clock sysvar. Defaults to CLUSTER_CLOCK_REFRESH_INTERVAL.
+            max_samples (int, optional): Number of samples the rates are estimated from. Defaults to CLUSTER_CLOCK_SAMPLES.
+        """
+        self.connection = connection
+        self.refresh_interval = refresh_interval
+        self.samples = deque(maxlen=max_samples)
+        self._sampling: Task = None
+        self._background: Task = None
+
+    async def sample(self):
+        """
+        Reads the clock sysvar and adds it to the samples
+
+        Returns:
+            ClockSample: New sample
+        """
+        sent = time.monotonic()
+        response = await self.connection.get_account_info(SYS_VAR_CLOCK)
+        received = time.monotonic()
+        if('error' in response):
+            raise Exception(response['error'])
+        data = response['result']['value']['data'][0]
+        clock = layouts.CLOCK_STRUCT.parse(base64.b64decode(data))
+        # The sysvar is assumed to be read halfway through the request
+        sample = ClockSample(clock.slot, clock.unix_timestamp, (sent + received) / 2)
+        self.add_sample(sample)
+        return sample
+
+    def add_sample(self, sample: ClockSample):
+        """
+        Adds a sample read elsewhere (e.g., from a websocket subscription to the clock sysvar)
+
+        Args:
+            sample (ClockSample): Sample
+        """
+        self.samples.append(sample)
+
+    def is_stale(self):
+        """
+        Whether the clock sysvar needs to be sampled again before estimating the time
+
+        Returns:
+            bool: True if there are no samples or the latest one is older than refresh_interval
+        """
+        return len(self.samples) == 0 or time.monotonic() - self.samples[-1].local_time > self.refresh_interval
+
+    async def refresh_if_stale(self):
+        """
+        Samples the clock sysvar if the latest sample is too old
+
+        Concurrent callers share a single request.
+        """
+        if(not self.is_stale()):
+            return
+        if(self._sampling is None or self._sampling.done()):
+            self._sampling = create_task(self.sample())
+        await shield(self._sampling)
+
+    async def unix_timestamp(self):
+        """
+        Current cluster unix timestamp, only fetching the clock sysvar if the latest sample is too old
+
+        Returns:
+            float: Estimated unix timestamp of the cluster clock
+        """
+        await self.refresh_if_stale()
+        return self.estimate_unix_timestamp()
+
+    async def slot(self):
+        """
+        Current slot, only fetching the clock sysvar if the latest sample is too old
+
+        Returns:
+            int: Estimated slot
+        """
+        await self.refresh_if_stale()
+        return self.estimate_slot()
+
+    def estimate_unix_timestamp(self, local_time: float = None):
+        """
+        Interpolates the cluster unix timestamp from the samples, without any request
+
+        Args:
+            local_time (float, optional): time.monotonic() to estimate the timestamp at. Defaults to now.
+
+        Raises:
+            Exception: No samples
+
+        Returns:
+            float: Estimated unix timestamp of the cluster clock
+        """
+        return self.__estimate(lambda s: s.unix_timestamp, 1, _TIME_RATE_BOUNDS, local_time)
+
+    def estimate_slot(self, local_time: float = None):
+        """
+        Interpolates the slot from the samples, without any request
+
+        Args:
+            local_time (float, optional): time.monotonic() to estimate the slot at. Defaults to now.
+
+        Raises:
+            Exception: No samples
+
+        Returns:
+            int: Estimated slot
+        """
+        return int(self.__estimate(lambda s: s.slot, 1 / DEFAULT_SLOT_DURATION, _SLOT_RATE_BOUNDS, local_time))
+
+    def start(self):
+        """
+        Samples the clock sysvar every refresh_interval seconds in the background, so estimates never wait for a request
+        """
+        if(self._background is None or self._background.done()):
+            self._background = create_task(self.__sample_periodically())
+
+    def stop(self):
+        """
+        Stops sampling in the background
+        """
+        for task in [self._background, self._sampling]:
+            if(task is not None and not task.done()):
+                task.cancel()
+
+    async def __sample_periodically(self):
+        while True:
+            try:
+                await self.sample()
+            except CancelledError:
+                raise
+            except Exception as e:
+                print(f'COULD NOT SAMPLE THE CLUSTER CLOCK: {e}')
+            await sleep(self.refresh_interval)
+
+    def __estimate(self, value, default_rate: float, rate_bounds: tuple[float, float], local_time: float = None):
+        if(len(self.samples) == 0):
+            raise Exception('ClusterClock has no samples, call sample() first')
+        local_time = local_time if local_time is not None else time.monotonic()
+        latest = self.samples[-1]
+        return value(latest) + self.__rate(value, default_rate, rate_bounds) * (local_time - latest.local_time)
+
+    def __rate(self, value, default_rate: float, rate_bounds: tuple[float, float]):
+        # Least squares slope of the samples against the local clock
+        if(len(self.samples) < 2 or self.samples[-1].local_time - self.samples[0].local_time < _MIN_FIT_SPAN):
+            return default_rate
+        mean_x = sum(s.local_time for s in self.samples) / len(self.samples)
+        mean_y = sum(value(s) for s in self.samples) / len(self.samples)
+        covariance = sum((s.local_time - mean_x) * (value(s) - mean_y) for s in self.samples)
+        variance = sum((s.local_time - mean_x) ** 2 for s in self.samples)
+        return min(max(covariance / variance, rate_bounds[0]), rate_bounds[1])
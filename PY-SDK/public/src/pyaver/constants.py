@@ -1,4 +1,5 @@
 from solana.publickey import PublicKey
+from solana.rpc.types import TxOpts
 from .enums import SolanaNetwork
 
 
@@ -74,6 +75,37 @@ CALLBACK_INFO_LEN = 33
 
 CANCEL_ALL_ORDERS_INSTRUCTION_CHUNK_SIZE = 5
 
+# getMultipleAccounts requests: at most 100 accounts (RPC limit) and about this much account data per request
+MULTIPLE_ACCOUNTS_CHUNK_SIZE = 100
+MULTIPLE_ACCOUNTS_CHUNK_BYTES = 1_000_000
+# Number of getMultipleAccounts requests in flight at once
+MAX_CONCURRENT_ACCOUNT_REQUESTS = 8
+# Estimated account sizes used to split requests when the actual sizes are not known
+EXPECTED_ACCOUNT_SIZE = 1_000
+EXPECTED_SLAB_ACCOUNT_SIZE = 100_000
+# Number of accounts sent at once to an executor decoding accounts (see AverClient.decode_executor)
+PARALLEL_DECODE_BATCH_SIZE = 256
+# ClusterClock: seconds between samples of the clock sysvar, target slot duration and how many samples the drift is estimated from
+CLUSTER_CLOCK_REFRESH_INTERVAL = 30
+DEFAULT_SLOT_DURATION = 0.4
+CLUSTER_CLOCK_SAMPLES = 10
+# BlockhashPrefetcher: seconds between refreshes, slots a blockhash stays valid and slots kept as a margin for the transaction to land
+BLOCKHASH_REFRESH_INTERVAL = 10
+MAX_BLOCKHASH_AGE_SLOTS = 150
+BLOCKHASH_EXPIRY_MARGIN_SLOTS = 50
+# Transaction packer: wire size of a transaction (an IPv6 packet), accounts a transaction can lock, compute units of a transaction,
+# compute units assumed for an instruction when not given (the default budget of an instruction) and compute unit price in micro lamports
+MAX_TRANSACTION_SIZE = 1232
+MAX_TRANSACTION_ACCOUNT_LOCKS = 64
+MAX_TRANSACTION_COMPUTE_UNITS = 1_400_000
+DEFAULT_INSTRUCTION_COMPUTE_UNITS = 200_000
+DEFAULT_COMPUTE_UNIT_PRICE = 1
+# Seconds after which a transaction sent by UserMarket.replace_quotes() can no longer land (its blockhash expired)
+PENDING_QUOTE_CHANGE_LIFETIME = MAX_BLOCKHASH_AGE_SLOTS * DEFAULT_SLOT_DURATION
+
+FAST_SEND_OPTIONS = TxOpts(skip_confirmation=True, skip_preflight=True)
+"""Send options skipping the preflight simulation and the confirmation polling, so sending a transaction is a single RPC call (errors are only seen when confirming the signature)"""
+
 USER_FACING_INSTRUCTIONS_TO_CHECK_IN_IDL = [
   'init_user_market', 
   'place_order', 
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from solana.publickey import PublicKey
-from .enums import MarketStatus, FeeTier
+from .enums import MarketStatus, FeeTier, Side
 
 @dataclass
 class MarketState():
@@ -48,6 +48,18 @@ class MarketState():
    
    
 
+@dataclass
+class MarketStatusState():
+    """
+    Market Status State Object
+
+    Holds the status fields of a MarketState, loaded without the rest of the market (see AverMarket.load_multiple_status())
+    """
+    market_status: MarketStatus
+    trading_cease_time: int
+    in_play_start_time: int = None
+
+
 @dataclass
 class OrderbookAccountsState():
     """
@@ -235,3 +247,20 @@ class UserBalanceState():
     token_balance: int
 
 
+
+@dataclass
+class QuoteChange():
+    """
+    QuoteChange object
+
+    One change made by UserMarket.replace_quotes() to move a user's orders to the desired quotes: cancels an order or places a new one
+    """
+    outcome_id: int
+    """Outcome of the order (as passed to place_order). side and limit_price are those of the order on this outcome, also for cancels"""
+    side: Side
+    limit_price: int
+    """Limit price in token units (e.g., 0.5 -> 500_000 for a 6 decimal quote token)"""
+    size: int
+    """Size (payout) in token units, the remaining size of the order for a cancel"""
+    order: UmaOrder = None
+    """Order to cancel, None to place a new order"""
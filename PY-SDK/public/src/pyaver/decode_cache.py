@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Callable
+from solana.publickey import PublicKey
+
+MISSING = object()
+"""
+Returned by DecodeCache.get() when used as its default, to tell cached None values from misses
+"""
+
+class DecodeCache():
+    """
+    Bounded LRU cache of decoded accounts
+
+    Entries are keyed by (account public key, kind of decoding, hash of the account data), so an account whose bytes have not changed
+    since the last refresh is returned without being decoded again.
+
+    Decoded objects are shared between everyone reading the same bytes and must be treated as read only.
+    """
+
+    max_size: int
+    """
+    Maximum number of decoded accounts kept
+    """
+    hits: int
+    """
+    Number of lookups which returned an already decoded object
+    """
+    misses: int
+    """
+    Number of lookups which had to decode the data
+    """
+
+    def __init__(self, max_size: int = 4096):
+        """
+        Initialise a DecodeCache object
+
+        Args:
+            max_size (int, optional): Maximum number of decoded accounts kept. Defaults to 4096.
+        """
+        if(max_size <= 0):
+            raise Exception('DecodeCache max_size must be positive')
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def data_hash(data: bytes):
+        """
+        Hash of raw account data used in cache keys
+
+        Args:
+            data (bytes): Raw bytes coming from onchain
+
+        Returns:
+            bytes: Digest of the data
+        """
+        return blake2b(data, digest_size=16).digest()
+
+    def get_or_decode(self, pubkey: PublicKey, kind: Any, data: bytes, decode: Callable[[bytes], Any]):
+        """
+        Returns the decoded account for this data, decoding and caching it if needed
+
+        Args:
+            pubkey (PublicKey): Account public key
+            kind (Any): Hashable identifier of the decoding (e.g., account type and program)
+            data (bytes): Raw bytes coming from onchain
+            decode (Callable[[bytes], Any]): Decodes data, called on cache misses only
+
+        Returns:
+            Any: Decoded object
+        """
+        key = (bytes(pubkey), kind, DecodeCache.data_hash(data))
+        decoded = self.__get(key, MISSING)
+        if(decoded is MISSING):
+            decoded = decode(data)
+            self.__put(key, decoded)
+        return decoded
+
+    def get(self, pubkey: PublicKey, kind: Any, data: bytes, default: Any = None):
+        """
+        Returns the decoded account for this data if it is cached
+
+        Args:
+            pubkey (PublicKey): Account public key
+            kind (Any): Hashable identifier of the decoding (e.g., account type and program)
+            data (bytes): Raw bytes coming from onchain
+            default (Any, optional): Returned if the data has not been decoded yet. Defaults to None.
+
+        Returns:
+            Any: Decoded object, or default
+        """
+        return self.__get((bytes(pubkey), kind, DecodeCache.data_hash(data)), default)
+
+    def put(self, pubkey: PublicKey, kind: Any, data: bytes, decoded: Any):
+        """
+        Caches the decoded account for this data
+
+        Args:
+            pubkey (PublicKey): Account public key
+            kind (Any): Hashable identifier of the decoding (e.g., account type and program)
+            data (bytes): Raw bytes coming from onchain
+            decoded (Any): Decoded object
+        """
+        self.__put((bytes(pubkey), kind, DecodeCache.data_hash(data)), decoded)
+
+    def __get(self, key: tuple, default: Any):
+        entries = self._entries
+        if(key in entries):
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        return default
+
+    def __put(self, key: tuple, decoded: Any):
+        entries = self._entries
+        entries[key] = decoded
+        if(len(entries) > self.max_size):
+            entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the hit / miss counters
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """
+        Fraction of lookups which were hits (0 if there has been no lookup)
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
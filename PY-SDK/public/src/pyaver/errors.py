@@ -1,6 +1,7 @@
 from anchorpy import Program
 from solana.rpc.core import RPCException
 import ast
+import re
 
 def get_idl_errors(program: Program):
     """
@@ -52,3 +53,29 @@ def parse_error(e: RPCException, program: Program):
     #     return e
 
 
+
+
+# Anchor errors raised when an instruction or an account does not match what the program expects:
+# InstructionFallbackNotFound, InstructionDidNotDeserialize, ConstraintSeeds, AccountDiscriminatorNotFound,
+# AccountDiscriminatorMismatch, AccountDidNotDeserialize, AccountOwnedByWrongProgram and AccountNotInitialized
+STALE_STATE_ERROR_CODES = {101, 102, 2006, 3001, 3002, 3003, 3007, 3012}
+# Runtime errors of missing accounts or accounts of an unexpected program
+STALE_STATE_ERROR_MESSAGES = ['AccountNotFound', 'could not find account', 'invalid account data for instruction', 'incorrect program id for instruction']
+
+def is_stale_state_error(e: Exception):
+    """
+    Tests whether an error sending a transaction points to stale accounts or instructions
+    (e.g., an account upgraded to a new version, a closed quote token ATA or an SDK out of date with the program),
+    rather than an order the program rejected or an RPC failure
+
+    Args:
+        e (Exception): Exception
+
+    Returns:
+        bool: True if the error points to stale accounts or instructions
+    """
+    message = str(e)
+    if(any(m in message for m in STALE_STATE_ERROR_MESSAGES)):
+        return True
+    codes = [int(c, 16) for c in re.findall(r'custom program error: 0x([0-9a-fA-F]+)', message)]
+    return any(c in STALE_STATE_ERROR_CODES for c in codes)
@@ -2,6 +2,7 @@ from anchorpy import Context, Program
 from .utils import load_multiple_bytes_data, parse_with_version
 from solana.publickey import PublicKey
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import DataSliceOpts
 from spl.token.constants import TOKEN_PROGRAM_ID
 from solana.transaction import AccountMeta
 from spl.token.instructions import get_associated_token_address
@@ -9,7 +10,8 @@ from solana.keypair import Keypair
 from typing import List, Tuple, Union, Container
 from .enums import AccountTypes, Fill, Out, Side
 from solana.rpc.async_api import AsyncClient
-from .layouts import EVENT_QUEUE_HEADER_LAYOUT, EVENT_QUEUE_HEADER_LEN, REGISTER_SIZE, EVENT_LAYOUT
+from . import layouts
+from .layouts import EVENT_QUEUE_HEADER_LEN, REGISTER_SIZE
 from .compute_units import set_compute_unit_limit_ixn, set_compute_unit_price_ixn
 
 
@@ -27,6 +29,22 @@ async def load_all_event_queues(conn: AsyncClient, event_queues: list[PublicKey]
     data = await load_multiple_bytes_data(conn, event_queues)
     return [read_event_queue_from_bytes(d) for d in data]
 
+async def load_event_queue_headers(conn: AsyncClient, event_queues: list[PublicKey]):
+    """
+    Loads the headers (head, count, event_size, seq_num) of multiple Event Queues
+
+    Only the header bytes of each account are loaded, so this is much quicker than load_all_event_queues() when the events are not needed.
+
+    Args:
+        conn (AsyncClient): Solana AsyncClient object
+        event_queues (list[PublicKey]): List of EventQueue account pubkeys
+
+    Returns:
+        list[Container]: List of EventQueue headers (None if the account does not exist)
+    """
+    data = await load_multiple_bytes_data(conn, event_queues, data_slice=DataSliceOpts(0, EVENT_QUEUE_HEADER_LEN))
+    return [layouts.EVENT_QUEUE_HEADER_LAYOUT.parse(d) if d is not None else None for d in data]
+
 def read_event_queue_from_bytes(buffer: bytes) -> Tuple[Container, List[Union[Fill, Out]]]:
     """
     Parses raw event queue data into Event objects
@@ -37,13 +55,13 @@ def read_event_queue_from_bytes(buffer: bytes) -> Tuple[Container, List[Union[Fi
     Returns:
         Tuple[Container, List[Union[Fill, Out]]]: List of headers and nodes (indexed by 'header' and 'node')
     """
-    header = EVENT_QUEUE_HEADER_LAYOUT.parse(buffer)
+    header = layouts.EVENT_QUEUE_HEADER_LAYOUT.parse(buffer)
     buffer_len = len(buffer)
     nodes: List[Union[Fill, Out]] = []
     for i in range(header.count):
         header_offset = EVENT_QUEUE_HEADER_LEN + REGISTER_SIZE
         offset = header_offset + ((i * header.event_size) + header.head) % (buffer_len - header_offset)
-        event = EVENT_LAYOUT.parse(buffer[offset : offset + header.event_size])
+        event = layouts.EVENT_LAYOUT.parse(buffer[offset : offset + header.event_size])
 
         if event.tag == 0: # FILL
             node = Fill(
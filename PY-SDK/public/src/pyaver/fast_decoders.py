@@ -0,0 +1,266 @@
+from struct import Struct
+from typing import Any, Callable, Optional, Tuple
+from anchorpy import Program
+from anchorpy.borsh_extension import _DataclassStruct
+from anchorpy.idl import _IdlTypeArray, _IdlTypeDefined, _IdlTypeDefTyStruct, _IdlTypeOption, _IdlTypeVec
+from borsh_construct import Enum
+from construct import Construct
+from solana.publickey import PublicKey
+
+STRUCT_FORMATS = {
+    'bool': '?',
+    'u8': 'B',
+    'i8': 'b',
+    'u16': 'H',
+    'i16': 'h',
+    'u32': 'I',
+    'i32': 'i',
+    'u64': 'Q',
+    'i64': 'q',
+    'f32': 'f',
+    'f64': 'd',
+}
+"""
+struct format character of fixed size IDL primitives
+"""
+
+INT_128_TYPES = {'u128': False, 'i128': True}
+
+def compile_account_decoder(program: Program, account_name: str) -> Optional[Callable[[bytes], Any]]:
+    """
+    Generates a decoder for an account of a Program from its IDL
+
+    The decoder reads the account (after its 8 byte discriminator) with precompiled struct formats and builds the same
+    objects as the anchor coder, without going through construct.
+
+    Args:
+        program (Program): AnchorPy Program
+        account_name (str): Account name in the IDL (e.g., Market)
+
+    Returns:
+        Optional[Callable[[bytes], Any]]: Decoder taking the raw account data, or None if the account uses types the generator does not support
+    """
+    try:
+        return _DecoderBuilder(program, account_name).build()
+    except NotImplementedError:
+        return None
+
+
+def compile_account_projection(program: Program, account_name: str, field_names: list[str]) -> Optional[Tuple[int, Callable[[bytes], dict]]]:
+    """
+    Generates a decoder for some fields of an account of a Program from its IDL
+
+    Only the fields up to the last requested one are read, so only the first bytes of the account are needed (see dataSlice in getMultipleAccounts).
+
+    Args:
+        program (Program): AnchorPy Program
+        account_name (str): Account name in the IDL (e.g., Market)
+        field_names (list[str]): Names of the fields to decode (snake case, e.g., market_status)
+
+    Returns:
+        Optional[Tuple[int, Callable[[bytes], dict]]]: Number of bytes needed at the start of the account, and decoder returning the requested fields by name. None if a field cannot be projected.
+    """
+    try:
+        return _DecoderBuilder(program, account_name).build_projection(field_names)
+    except NotImplementedError:
+        return None
+
+
+class _DecoderBuilder():
+    """
+    Writes the source of a decoder, line by line, with the offset of the next field in the variable o
+    """
+
+    def __init__(self, program: Program, account_name: str):
+        self.account_name = account_name
+        self.account = next(a for a in program.idl.accounts if a.name == account_name)
+        self.types = {t.name: t for t in program.idl.types}
+        layout = program.account[account_name].coder.accounts._accounts_layout[account_name]
+        self.account_class = layout.subcon.datacls
+        # Decoded objects must be the classes generated by anchor, so they compare equal to anchor's output
+        self.classes = {}
+        find_layout_classes(layout, self.classes)
+        self.namespace = {'PublicKey': PublicKey}
+        self.lines = []
+        self.indent = 1
+        self.variable_count = 0
+
+    def build(self):
+        result = self.struct(self.account_class, self.account.type.fields)
+        return self.compile(result)
+
+    def build_projection(self, field_names: list[str]):
+        fields = self.account.type.fields
+        names = [f.name for f in fields]
+        missing = [n for n in field_names if n not in names]
+        if(len(missing) > 0):
+            raise NotImplementedError(missing)
+        fields = fields[:max(names.index(n) for n in field_names) + 1]
+        values = dict(zip(names, self.fields(fields)))
+        result = self.variable()
+        self.emit(f'{result} = {{{", ".join(f"{n!r}: {values[n]}" for n in field_names)}}}')
+        return 8 + sum(self.max_size(f.type) for f in fields), self.compile(result)
+
+    def compile(self, result: str):
+        self.emit(f'if o > len(data): raise ValueError("Account data too short for {self.account_name}")')
+        self.emit(f'return {result}')
+        source = 'def decode(data):\n    o = 8\n' + '\n'.join(self.lines)
+        exec(compile(source, f'<{self.account_name} decoder>', 'exec'), self.namespace)
+        return self.namespace['decode']
+
+    def emit(self, line: str):
+        self.lines.append('    ' * self.indent + line)
+
+    def variable(self):
+        self.variable_count += 1
+        return f'v{self.variable_count}'
+
+    def constant(self, value):
+        name = f'c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def struct(self, cls: type, fields: list):
+        values = self.fields(fields)
+        result = self.variable()
+        self.emit(f'{result} = {self.constant(cls)}({", ".join(values)})')
+        return result
+
+    def fields(self, fields: list):
+        # Consecutive fixed size primitives are read with a single unpack_from
+        values = []
+        pending_formats = ''
+        pending_values = []
+        for field in fields:
+            if(isinstance(field.type, str) and field.type in STRUCT_FORMATS):
+                pending_formats += STRUCT_FORMATS[field.type]
+                pending_values.append(self.variable())
+                values.append(pending_values[-1])
+                continue
+            self.unpack(pending_formats, pending_values)
+            pending_formats, pending_values = '', []
+            values.append(self.value(field.type))
+        self.unpack(pending_formats, pending_values)
+        return values
+
+    def unpack(self, formats: str, variables: list[str]):
+        if(len(variables) == 0):
+            return
+        struct = Struct('<' + formats)
+        self.emit(f'{", ".join(variables)}, = {self.constant(struct)}.unpack_from(data, o)')
+        self.emit(f'o += {struct.size}')
+
+    def value(self, type_):
+        result = self.variable()
+        if(isinstance(type_, str)):
+            if(type_ in STRUCT_FORMATS):
+                self.unpack(STRUCT_FORMATS[type_], [result])
+            elif(type_ in INT_128_TYPES):
+                self.emit(f'{result} = int.from_bytes(data[o:o + 16], "little", signed={INT_128_TYPES[type_]})')
+                self.emit('o += 16')
+            elif(type_ == 'publicKey'):
+                self.emit(f'{result} = PublicKey(data[o:o + 32])')
+                self.emit('o += 32')
+            elif(type_ == 'string'):
+                length = self.length()
+                self.emit(f'{result} = data[o:o + {length}].decode("utf-8")')
+                self.emit(f'o += {length}')
+            else:
+                raise NotImplementedError(type_)
+        elif(isinstance(type_, _IdlTypeOption)):
+            self.emit('if data[o]:')
+            self.indent += 1
+            self.emit('o += 1')
+            self.emit(f'{result} = {self.value(type_.option)}')
+            self.indent -= 1
+            self.emit('else:')
+            self.indent += 1
+            self.emit('o += 1')
+            self.emit(f'{result} = None')
+            self.indent -= 1
+        elif(isinstance(type_, _IdlTypeVec)):
+            self.sequence(result, type_.vec, self.length())
+        elif(isinstance(type_, _IdlTypeArray)):
+            element_type, length = type_.array
+            self.sequence(result, element_type, str(length))
+        elif(isinstance(type_, _IdlTypeDefined)):
+            typedef = self.types.get(type_.defined)
+            if(typedef is None or typedef.name not in self.classes):
+                raise NotImplementedError(type_.defined)
+            if(isinstance(typedef.type, _IdlTypeDefTyStruct)):
+                return self.struct(self.classes[typedef.name], typedef.type.fields)
+            elif(all(v.fields is None for v in typedef.type.variants)):
+                enum = self.classes[typedef.name]
+                variants = tuple(getattr(enum, v.name)() for v in typedef.type.variants)
+                self.emit(f'{result} = {self.constant(variants)}[data[o]]')
+                self.emit('o += 1')
+            else:
+                raise NotImplementedError(type_.defined)
+        else:
+            raise NotImplementedError(type_)
+        return result
+
+    def max_size(self, type_):
+        if(isinstance(type_, str)):
+            if(type_ in STRUCT_FORMATS):
+                return Struct('<' + STRUCT_FORMATS[type_]).size
+            if(type_ in INT_128_TYPES):
+                return 16
+            if(type_ == 'publicKey'):
+                return 32
+        elif(isinstance(type_, _IdlTypeOption)):
+            return 1 + self.max_size(type_.option)
+        elif(isinstance(type_, _IdlTypeArray)):
+            return type_.array[1] * self.max_size(type_.array[0])
+        elif(isinstance(type_, _IdlTypeDefined) and type_.defined in self.types):
+            typedef = self.types[type_.defined]
+            if(isinstance(typedef.type, _IdlTypeDefTyStruct)):
+                return sum(self.max_size(f.type) for f in typedef.type.fields)
+            return 1
+        # Strings and vectors have no maximum size
+        raise NotImplementedError(type_)
+
+    def length(self):
+        length = self.variable()
+        self.unpack('I', [length])
+        # Every element takes at least one byte, so this stops garbage lengths before looping over them
+        self.emit(f'if {length} > len(data) - o: raise ValueError("Account data too short for {self.account_name}")')
+        return length
+
+    def sequence(self, result: str, element_type, length: str):
+        if(isinstance(element_type, str) and element_type in STRUCT_FORMATS):
+            if(length.isdigit()):
+                struct = self.constant(Struct(f'<{length}{STRUCT_FORMATS[element_type]}'))
+            else:
+                struct = self.variable()
+                self.emit(f'{struct} = Struct(f"<{{{length}}}{STRUCT_FORMATS[element_type]}")')
+                self.namespace['Struct'] = Struct
+            self.emit(f'{result} = list({struct}.unpack_from(data, o))')
+            self.emit(f'o += {struct}.size')
+            return
+        self.emit(f'{result} = []')
+        self.emit(f'for _ in range({length}):')
+        self.indent += 1
+        self.emit(f'{result}.append({self.value(element_type)})')
+        self.indent -= 1
+
+
+def find_layout_classes(layout: Construct, classes: dict):
+    """
+    Collects the dataclasses and enums generated by anchor for the types used in a layout, by name
+
+    Args:
+        layout (Construct): Anchor layout (e.g., of an account)
+        classes (dict): Filled with the classes found, by name
+    """
+    if(isinstance(layout, _DataclassStruct)):
+        classes[layout.datacls.__name__] = layout.datacls
+    elif(isinstance(layout, Enum)):
+        classes[layout.enum.__name__] = layout.enum
+    for attribute in ['subcon', 'thensubcon', 'elsesubcon']:
+        child = getattr(layout, attribute, None)
+        if(isinstance(child, Construct)):
+            find_layout_classes(child, classes)
+    for child in getattr(layout, 'subcons', []):
+        if(isinstance(child, Construct)):
+            find_layout_classes(child, classes)
@@ -0,0 +1,86 @@
+import json
+import os
+from solana.publickey import PublicKey
+
+BUNDLED_IDL_DIRECTORY = os.path.join(os.path.dirname(__file__), 'idl')
+"""
+Directory of the IDLs shipped with the SDK (named by program id)
+"""
+
+class IdlCache():
+    """
+    IDLs stored on disk so programs can be loaded without fetching their IDL onchain
+
+    IDLs are looked up in the cache directory first, then in the IDLs bundled with the SDK.
+    IDLs served from disk may be out of date, AverClient verifies them against the onchain IDLs in the background.
+    """
+
+    directory: str
+    """
+    Directory IDLs fetched onchain are saved to (None to only use the bundled IDLs)
+    """
+    use_bundled_idls: bool
+    """
+    Whether the IDLs bundled with the SDK are used when the cache directory does not have the IDL
+    """
+    served_from_disk: set[str]
+    """
+    Program ids whose IDL was loaded from disk and not verified onchain yet
+    """
+
+    def __init__(self, directory: str = None, use_bundled_idls: bool = True):
+        """
+        Initialise an IdlCache object
+
+        Args:
+            directory (str, optional): Directory to save IDLs fetched onchain to, created if missing. Defaults to None.
+            use_bundled_idls (bool, optional): Use the IDLs bundled with the SDK. Defaults to True.
+        """
+        self.directory = directory
+        self.use_bundled_idls = use_bundled_idls
+        self.served_from_disk = set()
+        if(directory is not None):
+            os.makedirs(directory, exist_ok=True)
+
+    def load(self, program_id: PublicKey):
+        """
+        Loads the raw IDL of a program from disk
+
+        Args:
+            program_id (PublicKey): Program public key
+
+        Returns:
+            dict: Raw IDL (as stored onchain) or None if no IDL is stored for this program
+        """
+        directories = ([self.directory] if self.directory is not None else []) + ([BUNDLED_IDL_DIRECTORY] if self.use_bundled_idls else [])
+        for directory in directories:
+            path = os.path.join(directory, f'{program_id}.json')
+            if(not os.path.exists(path)):
+                continue
+            try:
+                with open(path) as f:
+                    raw_idl = json.load(f)
+            except ValueError:
+                # Partially written or corrupted, the IDL is fetched onchain again
+                continue
+            self.served_from_disk.add(str(program_id))
+            return raw_idl
+        return None
+
+    def save(self, program_id: PublicKey, raw_idl: dict):
+        """
+        Saves the raw IDL of a program to the cache directory
+
+        The file is replaced atomically, so concurrent processes never read a partially written IDL.
+
+        Args:
+            program_id (PublicKey): Program public key
+            raw_idl (dict): Raw IDL (as stored onchain)
+        """
+        if(self.directory is None):
+            return
+        path = os.path.join(self.directory, f'{program_id}.json')
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(raw_idl, f)
+        os.replace(temporary_path, path)
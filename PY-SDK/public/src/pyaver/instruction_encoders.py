@@ -0,0 +1,163 @@
+from operator import itemgetter
+from struct import Struct, pack
+from typing import Any, Callable
+from weakref import WeakKeyDictionary
+from anchorpy import Context, Program
+from anchorpy.idl import _IdlTypeArray, _IdlTypeDefined, _IdlTypeDefTyStruct, _IdlTypeOption, _IdlTypeVec
+from solana.publickey import PublicKey
+from solana.transaction import AccountMeta, TransactionInstruction
+from .fast_decoders import INT_128_TYPES, STRUCT_FORMATS
+
+class InstructionTemplate():
+    """
+    Instruction of a Program whose accounts are fixed, only its arguments are encoded when building it
+
+    Built instructions are byte-identical to those built by program.instruction[name] with the same accounts and arguments.
+    """
+
+    name: str
+    """Instruction name in the IDL (e.g., place_order)"""
+    program_id: PublicKey
+    """Program public key"""
+    keys: list[AccountMeta]
+    """Accounts of the instruction, in the order of the IDL"""
+
+    def __init__(self, name: str, program_id: PublicKey, keys: list[AccountMeta], encode_args: Callable[[tuple], bytes]):
+        """
+        Initialise an InstructionTemplate object. Use compile_instruction() instead
+
+        Args:
+            name (str): Instruction name in the IDL
+            program_id (PublicKey): Program public key
+            keys (list[AccountMeta]): Accounts of the instruction, in the order of the IDL
+            encode_args (Callable[[tuple], bytes]): Encodes the sighash and the arguments of the instruction
+        """
+        self.name = name
+        self.program_id = program_id
+        self.keys = keys
+        self._encode_args = encode_args
+
+    def build(self, *args: Any, remaining_accounts: list[AccountMeta] = None):
+        """
+        Builds the instruction
+
+        Args:
+            *args: Arguments of the instruction, as passed to program.instruction[name]
+            remaining_accounts (list[AccountMeta], optional): Accounts appended after those of the IDL. Defaults to None.
+
+        Returns:
+            TransactionInstruction: TransactionInstruction object
+        """
+        keys = self.keys + remaining_accounts if remaining_accounts else list(self.keys)
+        return TransactionInstruction(keys=keys, program_id=self.program_id, data=self._encode_args(args))
+
+
+def compile_instruction(program: Program, name: str, accounts: dict[str, PublicKey]) -> InstructionTemplate:
+    """
+    Precomputes an instruction of a Program for fixed accounts
+
+    The ordered accounts and the sighash are computed once, the arguments are packed with precompiled struct formats instead of going through construct.
+    Arguments of types the precompiled encoders do not support are encoded by AnchorPy.
+
+    Args:
+        program (Program): AnchorPy Program
+        name (str): Instruction name in the IDL (e.g., place_order)
+        accounts (dict[str, PublicKey]): Accounts of the instruction, as in the Context passed to program.instruction[name]
+
+    Returns:
+        InstructionTemplate: Instruction template
+    """
+    instruction_fn = program.instruction[name]
+    encoders = _args_encoders.setdefault(program, {})
+    if(name not in encoders):
+        try:
+            encoders[name] = _compile_args_encoder(program, name)
+        except NotImplementedError:
+            encoders[name] = None
+    encode_args = encoders[name]
+    if(encode_args is None):
+        encode_args = lambda args: instruction_fn(*args, ctx=Context(accounts=accounts)).data
+    return InstructionTemplate(name, program.program_id, instruction_fn.accounts(accounts), encode_args)
+
+
+# Argument encoders of each program, by instruction name (None if not supported)
+_args_encoders: WeakKeyDictionary = WeakKeyDictionary()
+
+def _compile_args_encoder(program: Program, name: str):
+    idl_instruction = next(i for i in program.idl.instructions if i.name == name)
+    sighash = program.coder.instruction.sighashes[name]
+    types = {t.name: t for t in program.idl.types}
+    encoders = [_encoder(types, arg.type) for arg in idl_instruction.args]
+    if(len(encoders) == 1):
+        encode = encoders[0]
+        return lambda args: sighash + encode(args[0])
+    return lambda args: sighash + b''.join([encode(a) for encode, a in zip(encoders, args)])
+
+def _encoder(types: dict, type_) -> Callable[[Any], bytes]:
+    """
+    Borsh encoder of a value of an IDL type
+    """
+    if(isinstance(type_, str)):
+        if(type_ in STRUCT_FORMATS):
+            return Struct('<' + STRUCT_FORMATS[type_]).pack
+        if(type_ in INT_128_TYPES):
+            signed = INT_128_TYPES[type_]
+            return lambda v: v.to_bytes(16, 'little', signed=signed)
+        if(type_ == 'publicKey'):
+            return bytes
+        if(type_ == 'string'):
+            def encode_string(v):
+                encoded = v.encode('utf-8')
+                return pack('<I', len(encoded)) + encoded
+            return encode_string
+        if(type_ == 'bytes'):
+            return lambda v: pack('<I', len(v)) + bytes(v)
+        raise NotImplementedError(type_)
+    if(isinstance(type_, _IdlTypeOption)):
+        encode = _encoder(types, type_.option)
+        return lambda v: b'\x00' if v is None else b'\x01' + encode(v)
+    if(isinstance(type_, _IdlTypeVec)):
+        if(isinstance(type_.vec, str) and type_.vec in STRUCT_FORMATS):
+            format_ = STRUCT_FORMATS[type_.vec]
+            return lambda v: pack(f'<I{len(v)}{format_}', len(v), *v)
+        encode = _encoder(types, type_.vec)
+        return lambda v: pack('<I', len(v)) + b''.join([encode(e) for e in v])
+    if(isinstance(type_, _IdlTypeArray)):
+        element_type, length = type_.array
+        if(isinstance(element_type, str) and element_type in STRUCT_FORMATS):
+            return Struct(f'<{length}{STRUCT_FORMATS[element_type]}').pack
+        encode = _encoder(types, element_type)
+        return lambda v: b''.join([encode(e) for e in v])
+    if(isinstance(type_, _IdlTypeDefined)):
+        typedef = types.get(type_.defined)
+        if(typedef is None):
+            raise NotImplementedError(type_.defined)
+        if(isinstance(typedef.type, _IdlTypeDefTyStruct)):
+            return _struct_encoder(types, typedef.type.fields)
+        return _enum_encoder(typedef.type.variants)
+    raise NotImplementedError(type_)
+
+def _struct_encoder(types: dict, fields: list):
+    names = [f.name for f in fields]
+    if(all(isinstance(f.type, str) and f.type in STRUCT_FORMATS for f in fields)):
+        # The whole struct is packed at once
+        packer = Struct('<' + ''.join(STRUCT_FORMATS[f.type] for f in fields)).pack
+        get_values = itemgetter(*names) if len(names) > 1 else (lambda v: (v[names[0]],))
+        def encode_struct(v):
+            if(isinstance(v, dict)):
+                return packer(*get_values(v))
+            return packer(*[getattr(v, n) for n in names])
+        return encode_struct
+    encoders = [_encoder(types, f.type) for f in fields]
+    def encode_struct(v):
+        if(isinstance(v, dict)):
+            return b''.join([encode(v[n]) for encode, n in zip(encoders, names)])
+        return b''.join([encode(getattr(v, n)) for encode, n in zip(encoders, names)])
+    return encode_struct
+
+def _enum_encoder(variants: list):
+    if(any(v.fields for v in variants)):
+        raise NotImplementedError('enum variants with fields')
+    indices = {v.name: i for i, v in enumerate(variants)}
+    # Variants are passed as the objects of the anchor enum, whose class is named after the variant
+    return lambda v: bytes([indices[type(v).__name__]])
@@ -1,49 +1,10 @@
 from enum import IntEnum
-from construct import Switch, Bytes, Int8ul, Int32ul, Int64ul, Padding, Int64sl
-from construct import Struct as cStruct
+from struct import Struct
 
 ### This file is used to parse AAOB Orderbooks
 
-PUBLIC_KEY_LAYOUT = Bytes(32)
-
-KEY_LAYOUT = Bytes(16)
-
-STRING_LAYOUT = cStruct(
-    "string_length" / Int8ul,
-    Padding(3),
-    "content" / Bytes(lambda this: this.string_length)
-)
-
-STRING_VECTOR_LAYOUT = cStruct(
-    "vec_length" / Int8ul,
-    Padding(3),
-    "strings" / STRING_LAYOUT[lambda this: this.vec_length]
-)
-
-OUTCOME_AOB_INSTANCE_LAYOUT = cStruct(
-    "orderbook" / PUBLIC_KEY_LAYOUT,
-    "event_queue" / PUBLIC_KEY_LAYOUT,
-    "bids" / PUBLIC_KEY_LAYOUT,
-    "asks" / PUBLIC_KEY_LAYOUT,
-)
-
-
-SLAB_HEADER_LAYOUT = cStruct(
-    "account_tag" / Int8ul,
-    "bump_index" / Int64ul,
-    "free_list_len" / Int64ul,
-    "free_list_head" / Int32ul,
-
-    "callback_memory_offset" / Int64ul,
-    "callback_free_list_len" / Int64ul,
-    "callback_free_list_head" / Int64ul,
-    "callback_bump_index" / Int64ul,
-
-    "root_node" / Int32ul,
-    "leaf_count" / Int64ul,
-    "market_address" / PUBLIC_KEY_LAYOUT,
-    Padding(7)
-)
+### The construct layouts (*_LAYOUT and CLOCK_STRUCT) are only built the first time one of them is used
+### (see __getattr__ below), so importing the SDK does not pay for them. Access them as layouts.NAME or import them lazily.
 
 
 class NodeType(IntEnum):
@@ -55,81 +16,19 @@ class NodeType(IntEnum):
 
 # Node size = 32 (+ tag size = 8) => SLOT_SIZE = 40
 
-
-UNINTIALIZED_LAYOUT = cStruct(
-    Padding(32)
-)
-
-INNER_NODE_LAYOUT = cStruct(
-    "key" / KEY_LAYOUT,                # 16
-    "prefix_len" / Int64ul,         # 8
-    "children" / Int32ul[2],           # 8
-)
-
-LEAF_NODE_LAYOUT = cStruct(
-    "key" / KEY_LAYOUT,                 # 16
-    "callback_info_pt" / Int64ul,       # 8
-    "base_quantity" / Int64ul,          # 8
-)
-
-FREE_NODE_LAYOUT = cStruct(
-    "next" / Int32ul,                   # 4
-    Padding(28)                            # -> 32
-)
-
-LAST_FREE_NODE_LAYOUT = cStruct(
-    Padding(32)
-)
-
-SLAB_NODE_LAYOUT = cStruct(
-    "tag" / Int64ul,
-    "node"
-    / Switch(
-        lambda this: this.tag,
-        {
-            NodeType.UNINTIALIZED: UNINTIALIZED_LAYOUT,
-            NodeType.INNER_NODE: INNER_NODE_LAYOUT,
-            NodeType.LEAF_NODE: LEAF_NODE_LAYOUT,
-            NodeType.FREE_NODE: FREE_NODE_LAYOUT,
-            NodeType.LAST_FREE_NODE: LAST_FREE_NODE_LAYOUT,
-        },
-    ),
-)
-
-CALLBACK_INFO_LAYOUT = cStruct(
-    "user_market" / PUBLIC_KEY_LAYOUT,
-    "fee_tier" / Int8ul,
-)
 CALLBACK_INFO_LEN = 33
 
 SLOT_SIZE = 40
 SLAB_HEADER_SIZE = 97
 PADDED_LEN = SLAB_HEADER_SIZE + 7
 
-SLAB_LAYOUT = cStruct(
-    "header" / SLAB_HEADER_LAYOUT,
-    "nodes" / SLAB_NODE_LAYOUT[lambda this: this.header.bump_index],
-)
-
-
-USER_MARKET_OUTCOME_POSITION_LAYOUT = cStruct(
-    "free" / Int64ul,
-    "locked" / Int64ul,
-)
-
-USER_MARKET_ORDER_LAYOUT = cStruct(
-    "order_id" / KEY_LAYOUT,
-    "outcome_id" / Int8ul,
-    "base_qty" / Int64ul,
-)
+# Precompiled equivalents of SLAB_HEADER_LAYOUT / SLAB_NODE_LAYOUT used by Slab.from_bytes
+SLAB_HEADER_STRUCT = Struct("<BQQIQQQQIQ32s")   # 97 (= SLAB_HEADER_SIZE)
 
-CLOCK_STRUCT = cStruct(
-    "slot" / Int64ul,
-    "epoch_start_timestamp" / Int64sl,
-    "epoch" / Int64ul,
-    "leader_schedule_epoch" / Int64ul,
-    "unix_timestamp" / Int64sl,
-)
+# Every slot is read as 5 u64 words: tag, key (lo, hi) and the two node specific words
+#  - INNER_NODE: prefix_len, children (2 x u32 packed into one u64)
+#  - LEAF_NODE: callback_info_pt, base_quantity
+SLAB_NODE_STRUCT = Struct("<5Q")                # 40 (= SLOT_SIZE)
 
 def USER_MARKET_STATE_LEN(number_of_outcomes: int, max_number_of_orders: int):
     return 8 + 32*4 + 3*1 +2*4 + 6*8 + 4+(number_of_outcomes * 2*8) + 4+(max_number_of_orders * (16+1+8))
@@ -141,59 +40,182 @@ class EventType(IntEnum):
     FILL = 0
     OUT = 1
 
-STRING_LAYOUT = cStruct(
-    "string_length" / Int8ul,
-    Padding(3),
-    "content" / Bytes(lambda this: this.string_length)
-)
-
-EVENT_QUEUE_HEADER_LAYOUT = cStruct(
-    "account_tag" / Int8ul,
-    "head" / Int64ul,
-    "count" / Int64ul,
-    "event_size" / Int64ul,
-    "seq_num" / Int64ul,
-)
 EVENT_QUEUE_HEADER_LEN = 33
 
-CALLBACK_INFO_LAYOUT = cStruct(
-    "user_market" / PUBLIC_KEY_LAYOUT,
-    "fee_tier" / Int8ul,
-)
-CALLBACK_INFO_LEN = 33
-
 ORDER_SUMMARY_SIZE = 41
 
 REGISTER_SIZE = ORDER_SUMMARY_SIZE + 1
 
 EVENT_SLOT_SIZE = 1 + 33 + 2*CALLBACK_INFO_LEN
 
-FILL_LAYOUT = cStruct(
-    "taker_side" / Int8ul,
-    "maker_order_id" / KEY_LAYOUT,
-    "quote_size" / Int64ul,
-    "base_size" / Int64ul,
-    "maker_callback_info" / CALLBACK_INFO_LAYOUT,
-    "taker_callback_info" / CALLBACK_INFO_LAYOUT,
-)
-
-OUT_LAYOUT = cStruct(
-    "side" / Int8ul,
-    "order_id" / KEY_LAYOUT,
-    "base_size" / Int64ul,
-    "delete" / Int8ul,
-    "callback_info" / CALLBACK_INFO_LAYOUT,
-    # Padding(EVENT_SLOT_SIZE-59)
-)
-
-EVENT_LAYOUT = cStruct(
-    "tag" / Int8ul,
-    "node"
-    / Switch(
-        lambda this: this.tag,
-        {
-            EventType.FILL: FILL_LAYOUT,
-            EventType.OUT: OUT_LAYOUT,
-        },
-    ),
-)
+
+def _build_construct_layouts():
+    from construct import Switch, Bytes, Int8ul, Int32ul, Int64ul, Padding, Int64sl
+    from construct import Struct as cStruct
+
+    PUBLIC_KEY_LAYOUT = Bytes(32)
+
+    KEY_LAYOUT = Bytes(16)
+
+    STRING_LAYOUT = cStruct(
+        "string_length" / Int8ul,
+        Padding(3),
+        "content" / Bytes(lambda this: this.string_length)
+    )
+
+    STRING_VECTOR_LAYOUT = cStruct(
+        "vec_length" / Int8ul,
+        Padding(3),
+        "strings" / STRING_LAYOUT[lambda this: this.vec_length]
+    )
+
+    OUTCOME_AOB_INSTANCE_LAYOUT = cStruct(
+        "orderbook" / PUBLIC_KEY_LAYOUT,
+        "event_queue" / PUBLIC_KEY_LAYOUT,
+        "bids" / PUBLIC_KEY_LAYOUT,
+        "asks" / PUBLIC_KEY_LAYOUT,
+    )
+
+
+    SLAB_HEADER_LAYOUT = cStruct(
+        "account_tag" / Int8ul,
+        "bump_index" / Int64ul,
+        "free_list_len" / Int64ul,
+        "free_list_head" / Int32ul,
+
+        "callback_memory_offset" / Int64ul,
+        "callback_free_list_len" / Int64ul,
+        "callback_free_list_head" / Int64ul,
+        "callback_bump_index" / Int64ul,
+
+        "root_node" / Int32ul,
+        "leaf_count" / Int64ul,
+        "market_address" / PUBLIC_KEY_LAYOUT,
+        Padding(7)
+    )
+
+    UNINTIALIZED_LAYOUT = cStruct(
+        Padding(32)
+    )
+
+    INNER_NODE_LAYOUT = cStruct(
+        "key" / KEY_LAYOUT,                # 16
+        "prefix_len" / Int64ul,         # 8
+        "children" / Int32ul[2],           # 8
+    )
+
+    LEAF_NODE_LAYOUT = cStruct(
+        "key" / KEY_LAYOUT,                 # 16
+        "callback_info_pt" / Int64ul,       # 8
+        "base_quantity" / Int64ul,          # 8
+    )
+
+    FREE_NODE_LAYOUT = cStruct(
+        "next" / Int32ul,                   # 4
+        Padding(28)                            # -> 32
+    )
+
+    LAST_FREE_NODE_LAYOUT = cStruct(
+        Padding(32)
+    )
+
+    SLAB_NODE_LAYOUT = cStruct(
+        "tag" / Int64ul,
+        "node"
+        / Switch(
+            lambda this: this.tag,
+            {
+                NodeType.UNINTIALIZED: UNINTIALIZED_LAYOUT,
+                NodeType.INNER_NODE: INNER_NODE_LAYOUT,
+                NodeType.LEAF_NODE: LEAF_NODE_LAYOUT,
+                NodeType.FREE_NODE: FREE_NODE_LAYOUT,
+                NodeType.LAST_FREE_NODE: LAST_FREE_NODE_LAYOUT,
+            },
+        ),
+    )
+
+    CALLBACK_INFO_LAYOUT = cStruct(
+        "user_market" / PUBLIC_KEY_LAYOUT,
+        "fee_tier" / Int8ul,
+    )
+
+    SLAB_LAYOUT = cStruct(
+        "header" / SLAB_HEADER_LAYOUT,
+        "nodes" / SLAB_NODE_LAYOUT[lambda this: this.header.bump_index],
+    )
+
+
+    USER_MARKET_OUTCOME_POSITION_LAYOUT = cStruct(
+        "free" / Int64ul,
+        "locked" / Int64ul,
+    )
+
+    USER_MARKET_ORDER_LAYOUT = cStruct(
+        "order_id" / KEY_LAYOUT,
+        "outcome_id" / Int8ul,
+        "base_qty" / Int64ul,
+    )
+
+    CLOCK_STRUCT = cStruct(
+        "slot" / Int64ul,
+        "epoch_start_timestamp" / Int64sl,
+        "epoch" / Int64ul,
+        "leader_schedule_epoch" / Int64ul,
+        "unix_timestamp" / Int64sl,
+    )
+
+    EVENT_QUEUE_HEADER_LAYOUT = cStruct(
+        "account_tag" / Int8ul,
+        "head" / Int64ul,
+        "count" / Int64ul,
+        "event_size" / Int64ul,
+        "seq_num" / Int64ul,
+    )
+
+    FILL_LAYOUT = cStruct(
+        "taker_side" / Int8ul,
+        "maker_order_id" / KEY_LAYOUT,
+        "quote_size" / Int64ul,
+        "base_size" / Int64ul,
+        "maker_callback_info" / CALLBACK_INFO_LAYOUT,
+        "taker_callback_info" / CALLBACK_INFO_LAYOUT,
+    )
+
+    OUT_LAYOUT = cStruct(
+        "side" / Int8ul,
+        "order_id" / KEY_LAYOUT,
+        "base_size" / Int64ul,
+        "delete" / Int8ul,
+        "callback_info" / CALLBACK_INFO_LAYOUT,
+        # Padding(EVENT_SLOT_SIZE-59)
+    )
+
+    EVENT_LAYOUT = cStruct(
+        "tag" / Int8ul,
+        "node"
+        / Switch(
+            lambda this: this.tag,
+            {
+                EventType.FILL: FILL_LAYOUT,
+                EventType.OUT: OUT_LAYOUT,
+            },
+        ),
+    )
+
+    return {name: value for name, value in locals().items() if name.endswith('_LAYOUT') or name == 'CLOCK_STRUCT'}
+
+
+_CONSTRUCT_LAYOUT_NAMES = {
+    'PUBLIC_KEY_LAYOUT', 'KEY_LAYOUT', 'STRING_LAYOUT', 'STRING_VECTOR_LAYOUT', 'OUTCOME_AOB_INSTANCE_LAYOUT',
+    'SLAB_HEADER_LAYOUT', 'UNINTIALIZED_LAYOUT', 'INNER_NODE_LAYOUT', 'LEAF_NODE_LAYOUT', 'FREE_NODE_LAYOUT',
+    'LAST_FREE_NODE_LAYOUT', 'SLAB_NODE_LAYOUT', 'CALLBACK_INFO_LAYOUT', 'SLAB_LAYOUT',
+    'USER_MARKET_OUTCOME_POSITION_LAYOUT', 'USER_MARKET_ORDER_LAYOUT', 'CLOCK_STRUCT',
+    'EVENT_QUEUE_HEADER_LAYOUT', 'FILL_LAYOUT', 'OUT_LAYOUT', 'EVENT_LAYOUT',
+}
+
+def __getattr__(name: str):
+    if(name not in _CONSTRUCT_LAYOUT_NAMES):
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # Built once, then found in the module globals without going through __getattr__
+    globals().update(_build_construct_layouts())
+    return globals()[name]
@@ -11,13 +11,17 @@ from solana.keypair import Keypair
 from .enums import AccountTypes, Fill, MarketStatus
 from .constants import AVER_PROGRAM_IDS
 from .utils import get_version_of_account_type_in_program, load_multiple_bytes_data, parse_with_version, sign_and_send_transaction_instructions
-from .data_classes import MarketState, MarketStoreState, OrderbookAccountsState
+from .data_classes import MarketState, MarketStatusState, MarketStoreState, OrderbookAccountsState
+from .account_decoders import get_account_decoders
 from .orderbook import Orderbook
+from .pda_cache import find_program_address
 from .slab import Slab
 from anchorpy import Context
 from spl.token.instructions import get_associated_token_address
 from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
-from solana.rpc.types import TxOpts
+from solana.rpc.types import DataSliceOpts, TxOpts
+
+MARKET_STATUS_FIELDS = ['market_status', 'trading_cease_time', 'in_play_start_time']
 
 class AverMarket():
     """
@@ -174,6 +178,52 @@ class AverMarket():
             market_states_and_program_ids.append({'state': state, 'program_id': program_id})
         return market_states_and_program_ids
 
+    @staticmethod
+    async def load_multiple_status(aver_client: AverClient, market_pubkeys: list[PublicKey]) -> list[MarketStatusState]:
+        """
+        Loads the status of multiple markets
+
+        Only the first bytes of each market account are loaded and only the status fields are decoded, so this is much quicker than loading the markets to scan them.
+
+        Args:
+            aver_client (AverClient): AverClient object
+            market_pubkeys (list[PublicKey]): List of market public keys
+
+        Returns:
+            list[MarketStatusState]: List of MarketStatusState objects (None if the market does not exist)
+        """
+        length = max(get_account_decoders(p).get_projection(AccountTypes.MARKET, MARKET_STATUS_FIELDS).length for p in aver_client.programs)
+        res = await load_multiple_bytes_data(aver_client.connection, market_pubkeys, [], False, data_slice=DataSliceOpts(0, length))
+
+        statuses = []
+        too_short = []
+        for i, m in enumerate(res):
+            if(m is None):
+                statuses.append(None)
+                continue
+            program = await aver_client.get_program_from_program_id(PublicKey(m['owner']))
+            projection = get_account_decoders(program).get_projection(AccountTypes.MARKET, MARKET_STATUS_FIELDS)
+            if(projection.length > length):
+                # Program loaded while reading the markets, with fields further in the account
+                statuses.append(None)
+                too_short.append((i, projection))
+                continue
+            statuses.append(AverMarket.__parse_market_status(projection.decode(m['data'])))
+
+        if(len(too_short) > 0):
+            data = await load_multiple_bytes_data(aver_client.connection, [market_pubkeys[i] for i, _ in too_short])
+            for (i, projection), d in zip(too_short, data):
+                statuses[i] = AverMarket.__parse_market_status(projection.decode(d)) if d is not None else None
+        return statuses
+
+    @staticmethod
+    def __parse_market_status(fields: dict):
+        return MarketStatusState(
+            market_status=MarketStatus(fields['market_status']),
+            trading_cease_time=fields['trading_cease_time'],
+            in_play_start_time=fields['in_play_start_time'],
+        )
+
     @staticmethod
     def derive_market_store_pubkey_and_bump(market_pubkey: PublicKey, program_id: PublicKey = AVER_PROGRAM_IDS[0]):
         """
@@ -187,7 +237,7 @@ class AverMarket():
         Returns:
             PublicKey: MarketStore public key
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('market-store', 'utf-8'), bytes(market_pubkey)], 
             program_id
         )
@@ -424,7 +474,7 @@ class AverMarket():
             TransactionInstruction: TransactionInstruction object
         """
         quote_token = self.aver_client.quote_token
-        third_party_vault_authority, bump = PublicKey.find_program_address(
+        third_party_vault_authority, bump = find_program_address(
             [b"third-party-token-vault", bytes(quote_token)], self.program_id)
 
         third_party_vault_token_account = get_associated_token_address(
@@ -570,15 +620,52 @@ class AverMarket():
         If Solana clock time is beyond TradingCeaseTime, market is TradingCeased
         If Solana clock time is beyond InPlayStartTime but before TradingCeaseTime, market is ActiveInPlay
 
+        The Solana clock time is estimated by AverClient.clock, which only fetches the clock sysvar when its latest sample is too old.
+
+        Returns:
+            MarketStatus: Implied market status
+        """
+        unix_timestamp = await self.aver_client.clock.unix_timestamp()
+        return AverMarket.imply_market_status(self.market_state, unix_timestamp)
+
+    @staticmethod
+    async def get_implied_market_statuses(
+            aver_client: AverClient,
+            markets: list['AverMarket'],
+        ) -> list[MarketStatus]:
+        """
+        Returns the implied market status of multiple markets (see get_implied_market_status) using a single estimate of the Solana clock time
+
+        Args:
+            aver_client (AverClient): AverClient object
+            markets (list[AverMarket]): List of AverMarket objects
+
+        Returns:
+            list[MarketStatus]: Implied market status of each market
+        """
+        unix_timestamp = await aver_client.clock.unix_timestamp()
+        return [AverMarket.imply_market_status(m.market_state, unix_timestamp) for m in markets]
+
+    @staticmethod
+    def imply_market_status(
+            market_state: MarketState or MarketStatusState,
+            unix_timestamp: float,
+        ) -> MarketStatus:
+        """
+        Returns the implied market status of a market at a given Solana clock time (see get_implied_market_status)
+
+        Args:
+            market_state (MarketState or MarketStatusState): Market state, e.g. from AverMarket.load_multiple_status()
+            unix_timestamp (float): Solana clock unix timestamp
+
         Returns:
             MarketStatus: Implied market status
         """
-        solana_datetime = await self.aver_client.get_system_clock_datetime()
-        if solana_datetime.timestamp() > self.market_state.trading_cease_time:
+        if unix_timestamp > market_state.trading_cease_time:
             return MarketStatus.TRADING_CEASED
-        if self.market_state.inplay_start_time is not None and solana_datetime.timestamp() > self.market_state.inplay_start_time :
+        if market_state.in_play_start_time is not None and unix_timestamp > market_state.in_play_start_time:
             return MarketStatus.ACTIVE_IN_PLAY
-        return self.market_state.market_status
+        return market_state.market_status
 
     async def crank_market(
             self,
@@ -1,11 +1,53 @@
+from bisect import bisect_left
+from itertools import accumulate
+from typing import NamedTuple
+import numpy as np
 from solana.publickey import PublicKey
 from .enums import Side, PriceRoundingFormat
-from .utils import RoundingDirection, load_bytes_data, load_multiple_bytes_data, round_price_to_nearest_probability_tick_size, round_price_to_nearest_decimal_tick_size
+from .utils import RoundingDirection, round_prices, load_bytes_data, load_multiple_bytes_data, round_price_to_nearest_probability_tick_size, round_price_to_nearest_decimal_tick_size
 from .data_classes import Price, SlabOrder, UmaOrder
-from .slab import Slab
+from .slab import Slab, SlabArrays
+from .constants import EXPECTED_SLAB_ACCOUNT_SIZE
+from .pda_cache import find_program_address
 from solana.rpc.async_api import AsyncClient
 from solana.utils.helpers import to_uint8_bytes
 
+class FillLadder(NamedTuple):
+    """
+    Cumulative sums over all price levels of one side of an Orderbook, used to estimate fills
+
+    The cumulative lists have one more element than prices, starting at 0.
+    """
+    prices: list[float]
+    """
+    Price of each level, best first
+    """
+    sizes: list[float]
+    """
+    Size of each level
+    """
+    cumulative_size: list[float]
+    """
+    Sum of the sizes of the levels before each index
+    """
+    cumulative_notional: list[float]
+    """
+    Sum of size * price of the levels before each index
+    """
+
+class OrderbookColumns(NamedTuple):
+    """
+    Columnar (NumPy) view of both sides of an Orderbook, see Orderbook.to_columns()
+    """
+    bids: SlabArrays
+    """
+    Bids, best (highest) price first
+    """
+    asks: SlabArrays
+    """
+    Asks, best (lowest) price first
+    """
+
 class Orderbook:
     """
     Orderbook object
@@ -17,14 +59,6 @@ class Orderbook:
     """
     Orderbook public key
     """
-    slab_bids: Slab
-    """
-    Slab object for bids
-    """
-    slab_asks: Slab
-    """
-    Slab object for asks
-    """
     slab_bids_pubkey: PublicKey
     """
     Public key of the account containing the bids
@@ -64,6 +98,8 @@ class Orderbook:
             decimals (int): Decimal precision for orderbook
             is_inverted (bool, optional): Whether the bids and asks have been switched with each other. Defaults to False.
         """
+        # Ladders (L2 / L3) computed from the current slabs, see __cached_l2
+        self._ladders = {}
         self.decimals = decimals
         self.pubkey = pubkey
         self.slab_bids = slab_bids
@@ -72,6 +108,30 @@ class Orderbook:
         self.slab_asks_pubkey = slab_asks_pubkey
         self.is_inverted = is_inverted
     
+    @property
+    def slab_bids(self) -> Slab:
+        """
+        Slab object for bids
+        """
+        return self._slab_bids
+
+    @slab_bids.setter
+    def slab_bids(self, slab: Slab):
+        self._slab_bids = slab
+        self._ladders.clear()
+
+    @property
+    def slab_asks(self) -> Slab:
+        """
+        Slab object for asks
+        """
+        return self._slab_asks
+
+    @slab_asks.setter
+    def slab_asks(self, slab: Slab):
+        self._slab_asks = slab
+        self._ladders.clear()
+
     @staticmethod
     async def load(
         conn: AsyncClient, 
@@ -79,7 +139,8 @@ class Orderbook:
         slab_asks_pubkey: PublicKey, 
         orderbook_pubkey: PublicKey, 
         decimals: int, 
-        is_inverted: bool = False
+        is_inverted: bool = False,
+        lazy: bool = False
         ):
         """
         Initialise an Orderbook object
@@ -93,13 +154,14 @@ class Orderbook:
             orderbook_pubkey (PublicKey): Orderbook public key
             decimals (int): Decimal precision for orderbook
             is_inverted (bool, optional): Whether the bids and asks have been switched with each other. Defaults to False.
+            lazy (bool, optional): Decode slab nodes on demand (see Slab.from_bytes). Defaults to False.
 
         Returns:
             Orderbook: Orderbook object
         """
 
-        slab_bids = await Orderbook.load_slab(conn, slab_bids_pubkey)
-        slab_asks  = await Orderbook.load_slab(conn, slab_asks_pubkey)
+        slab_bids = await Orderbook.load_slab(conn, slab_bids_pubkey, lazy)
+        slab_asks  = await Orderbook.load_slab(conn, slab_asks_pubkey, lazy)
 
         return Orderbook(
             pubkey=orderbook_pubkey, 
@@ -112,36 +174,38 @@ class Orderbook:
             )
 
     @staticmethod
-    async def load_slab(conn: AsyncClient, slab_address: PublicKey):
+    async def load_slab(conn: AsyncClient, slab_address: PublicKey, lazy: bool = False):
         """
         Loads onchain data for a Slab (contains orders for a particular side of the orderbook)
 
         Args:
             conn (AsyncClient): Solana AsyncClient object
             slab_address (PublicKey): Slab public key
+            lazy (bool, optional): Decode slab nodes on demand (see Slab.from_bytes). Defaults to False.
 
         Returns:
             Slab: Slab object
         """
         data = await load_bytes_data(conn, slab_address)
-        return Slab.from_bytes(data)
+        return Slab.from_bytes(data, lazy)
 
     @staticmethod
-    async def load_multiple_slabs(conn: AsyncClient, slab_addresses: list[PublicKey]):
+    async def load_multiple_slabs(conn: AsyncClient, slab_addresses: list[PublicKey], lazy: bool = False):
         """
         Loads onchain data for multiple Slabs (contains orders for a particular side of the orderbook)
 
         Args:
             conn (AsyncClient): Solana AsyncClient object
             slab_addresses (list[PublicKey]): List of slab public keys
+            lazy (bool, optional): Decode slab nodes on demand (see Slab.from_bytes). Defaults to False.
 
         Returns:
             list[Slab]: List of Slab objects
         """
-        data = await load_multiple_bytes_data(conn, slab_addresses)
+        data = await load_multiple_bytes_data(conn, slab_addresses, [], True, [EXPECTED_SLAB_ACCOUNT_SIZE] * len(slab_addresses))
         slabs = []
         for d in data:
-            slabs.append(Slab.from_bytes(d))
+            slabs.append(Slab.from_bytes(d, lazy))
         return slabs
 
     def invert(self):
@@ -218,6 +282,42 @@ class Orderbook:
 
         return l2_depth
 
+    @staticmethod
+    def get_L2_for_columns(
+        columns: SlabArrays,
+        depth: int,
+        decimals: int,
+        ui_amount=False,
+    ):
+        """
+        Get Level 2 market information from a columnar view of a slab (see Orderbook.to_columns())
+
+        Vectorized equivalent of get_L2_for_slab: consecutive orders with the same price (rounded to decimals) are aggregated,
+        keeping the order of the rows.
+
+        Args:
+            columns (SlabArrays): One side of Orderbook.to_columns() (or Slab.to_arrays())
+            depth (int): Number of price levels to return
+            decimals (int): Decimal precision for orderbook
+            ui_amount (bool, optional): Converts prices based on decimal precision if true. Defaults to False.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Prices and sizes of each price level
+        """
+        exp = 10 ** decimals
+        # Same rounding as __get_price_from_slab (prices are below 2 ** 32 so this is exact in float64)
+        prices = np.round(columns.price.astype(np.float64) / (2 ** 32) * exp)
+        if len(prices) == 0:
+            return prices, np.zeros(0, dtype=np.uint64)
+
+        level_starts = np.concatenate(([0], np.flatnonzero(np.diff(prices)) + 1))
+        sizes = np.add.reduceat(columns.base_quantity, level_starts)[:depth]
+        prices = prices[level_starts][:depth]
+
+        if(ui_amount):
+            return prices / exp, sizes / exp
+        return prices, sizes
+
     @staticmethod
     def get_L2_for_slab_with_bucketing(
         slab: Slab, 
@@ -275,18 +375,12 @@ class Orderbook:
         if is_inverted:
             rounding_direction = RoundingDirection.UP if rounding_direction == RoundingDirection.DOWN else RoundingDirection.DOWN
 
-        # Bucket the prices to acceptable ticks
-        l2_depth = [
-            Orderbook.bucket_price(
-                p = p,
-                price_schema = price_schema,
-                direction = rounding_direction
-            )
-            for p in l2_depth
-        ]
-
-        # Remove any orders which returned None (because they were out of bounds)
-        l2_depth = [p for p in l2_depth if p is not None]
+        # Bucket the prices to acceptable ticks (orders which are out of bounds are removed)
+        l2_depth = Orderbook.bucket_prices(
+            prices = l2_depth,
+            price_schema = price_schema,
+            direction = rounding_direction
+        )
 
         if(ui_amount):
             l2_depth = [Orderbook.convert_price(p, decimals) for p in l2_depth]
@@ -377,6 +471,46 @@ class Orderbook:
             size = p.size
         )
 
+    @staticmethod
+    def bucket_prices(
+        prices: list[Price],
+        price_schema: PriceRoundingFormat,
+        direction: RoundingDirection
+    ):
+        """
+        Buckets a whole ladder of prices at once
+
+        Same as calling bucket_price on each Price, with the Prices which are out of bounds removed
+
+        Args:
+            prices (list[Price]): List of Price objects
+            price_schema (PriceRoundingFormat): Price schema whose ticks are used
+            direction (RoundingDirection): Rounding direction
+
+        Returns:
+            list[Price]: List of bucketed Price objects
+        """
+        # scale from atomic and round to 8 DP for .7799999999...
+        EIGHT_DP = 10 ** 8
+        rounded_prices = np.round(np.array([p.price for p in prices], dtype=np.float64) / (2 ** 32) * EIGHT_DP) / EIGHT_DP
+
+        if price_schema == PriceRoundingFormat.DECIMAL:
+            out_of_bounds = (rounded_prices < (1/1000)) if direction == RoundingDirection.UP else (rounded_prices > (1/1.01))
+        else:
+            out_of_bounds = (rounded_prices < 0.001) if direction == RoundingDirection.DOWN else (rounded_prices > 0.99)
+        if direction not in [RoundingDirection.UP, RoundingDirection.DOWN]:
+            out_of_bounds[:] = False
+
+        in_bounds = np.flatnonzero(~out_of_bounds)
+        bucketed_prices = round_prices(rounded_prices[in_bounds], price_schema, direction).tolist()
+        return [
+            Price(
+                price = bucketed_price,
+                size = prices[i].size
+            )
+            for i, bucketed_price in zip(in_bounds.tolist(), bucketed_prices)
+        ]
+
     @staticmethod
     def invert_price(p: Price, one_in_decimals: int = 1):
         """
@@ -413,7 +547,7 @@ class Orderbook:
         Returns:
             Orderbook Public Key (PublicKey): Orderbook Public Key
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('orderbook', 'utf-8'), bytes(market), to_uint8_bytes(outcome_id)], program_id
         )
 
@@ -431,7 +565,7 @@ class Orderbook:
         Returns:
             EventQueue Public Key (PublicKey): EventQueue Public Key
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('event-queue', 'utf-8'), bytes(market), to_uint8_bytes(outcome_id)], program_id
         )
 
@@ -449,7 +583,7 @@ class Orderbook:
         Returns:
             Bids Public Key (PublicKey): Bids Public Key
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('bids', 'utf-8'), bytes(market), to_uint8_bytes(outcome_id)], program_id
         )
 
@@ -467,29 +601,87 @@ class Orderbook:
         Returns:
             Bids Public Key (PublicKey): Bids Public Key
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('asks', 'utf-8'), bytes(market), to_uint8_bytes(outcome_id)], program_id
         )
 
+    def to_columns(self):
+        """
+        Returns the orders on both sides of the orderbook as NumPy arrays, best price first
+
+        Prices are in 32.32 fixed point for this outcome, i.e. already inverted if the orderbook is inverted.
+        Use Orderbook.get_L2_for_columns() to aggregate them by price.
+
+        Returns:
+            OrderbookColumns: OrderbookColumns object
+        """
+        bids = self.slab_bids.to_arrays()
+        asks = self.slab_asks.to_arrays()
+
+        if(self.is_inverted):
+            # Slab keys are ascending, so inverted prices are best first without reversing
+            one = np.uint64(2 ** 32)
+            return OrderbookColumns(
+                bids=bids._replace(price=one - bids.price),
+                asks=asks.reverse()._replace(price=one - asks.price[::-1]),
+            )
+        return OrderbookColumns(
+            bids=bids.reverse(),
+            asks=asks,
+        )
+
+    def __cached_l2(self, side: Side, depth: int, ui_amount: bool):
+        """
+        Ladder of the bids (Side.BUY) or asks (Side.SELL), cached until a new slab is attached
+
+        A ladder computed for some depth also answers any smaller depth, or any depth if it holds all price levels
+        """
+        key = ('l2', side, ui_amount)
+        cached = self._ladders.get(key)
+        if cached is not None:
+            cached_depth, levels = cached
+            if depth <= cached_depth or len(levels) < cached_depth:
+                return levels[:depth]
+
+        if side == Side.BUY:
+            slab, is_increasing = self.slab_bids, self.is_inverted
+        else:
+            slab, is_increasing = self.slab_asks, not self.is_inverted
+        levels = Orderbook.get_L2_for_slab(
+            slab,
+            depth,
+            is_increasing,
+            self.decimals,
+            ui_amount,
+            self.is_inverted,
+        )
+        self._ladders[key] = (depth, levels)
+        return levels[:]
+
     def get_bids_L3(self):
         """
         Gets level 1 market information for bids.
 
         See https://www.thebalance.com/order-book-level-2-market-data-and-depth-of-market-1031118 for more information
 
+        The orders are cached until a new slab is attached and should be treated as read only.
+
         Returns:
             list[SlabOrder]: List of slab orders for bids
         """
-        is_increasing = False
-        if(self.is_inverted):
-            is_increasing = True
-        
-        return Orderbook.__get_L3(
-            self.slab_bids,
-            self.decimals,
-            is_increasing,
-            self.is_inverted
-        )
+        key = ('l3', Side.BUY)
+        if key not in self._ladders:
+            is_increasing = False
+            if(self.is_inverted):
+                is_increasing = True
+
+            self._ladders[key] = Orderbook.__get_L3(
+                self.slab_bids,
+                self.decimals,
+                is_increasing,
+                self.is_inverted
+            )
+        return self._ladders[key][:]
 
     def get_asks_L3(self):
         """
@@ -497,19 +689,24 @@ class Orderbook:
 
         See https://www.thebalance.com/order-book-level-2-market-data-and-depth-of-market-1031118 for more information
 
+        The orders are cached until a new slab is attached and should be treated as read only.
+
         Returns:
             list[SlabOrder]: List of slab orders for asks
         """
-        is_increasing = True
-        if(self.is_inverted):
-            is_increasing = False
-        
-        return Orderbook.__get_L3(
-            self.slab_asks,
-            self.decimals,
-            is_increasing,
-            self.is_inverted
-        )
+        key = ('l3', Side.SELL)
+        if key not in self._ladders:
+            is_increasing = True
+            if(self.is_inverted):
+                is_increasing = False
+
+            self._ladders[key] = Orderbook.__get_L3(
+                self.slab_asks,
+                self.decimals,
+                is_increasing,
+                self.is_inverted
+            )
+        return self._ladders[key][:]
 
 
     def get_bids_l2(self, depth: int, ui_amount: bool):
@@ -518,6 +715,8 @@ class Orderbook:
 
         See https://www.thebalance.com/order-book-level-2-market-data-and-depth-of-market-1031118 for more information
 
+        The price levels are cached until a new slab is attached and should be treated as read only.
+
         Args:
             depth (int): Number of orders to return
             ui_amount (bool): Converts prices based on decimal precision if true.
@@ -525,18 +724,7 @@ class Orderbook:
         Returns:
             list[Price]: List of Price objects (size and price) corresponding to orders on the slab
         """
-        is_increasing = False
-        if(self.is_inverted):
-            is_increasing = True
-        
-        return Orderbook.get_L2_for_slab(
-            self.slab_bids,
-            depth,
-            is_increasing,
-            self.decimals,
-            ui_amount,
-            self.is_inverted,
-        )
+        return self.__cached_l2(Side.BUY, depth, ui_amount)
 
     def get_asks_l2(self, depth: int, ui_amount: bool):
         """
@@ -544,6 +732,8 @@ class Orderbook:
 
         See https://www.thebalance.com/order-book-level-2-market-data-and-depth-of-market-1031118 for more information
 
+        The price levels are cached until a new slab is attached and should be treated as read only.
+
         Args:
             depth (int): Number of orders to return
             ui_amount (bool): Converts prices based on decimal precision if true.
@@ -551,18 +741,61 @@ class Orderbook:
         Returns:
             list[Price]: List of Price objects (size and probability price) corresponding to orders on the slab
         """
-        is_increasing = True
-        if(self.is_inverted):
-            is_increasing = False
-        
-        return Orderbook.get_L2_for_slab(
-            self.slab_asks,
-            depth,
-            is_increasing,
-            self.decimals,
-            ui_amount,
-            self.is_inverted,
-        )
+        return self.__cached_l2(Side.SELL, depth, ui_amount)
+
+    def get_bids_l2_with_bucketing(self, depth: int, ui_amount: bool, price_schema: PriceRoundingFormat):
+        """
+        Gets level 2 market information for bids, with prices bucketed to the ticks of the price schema
+
+        See Orderbook.get_L2_for_slab_with_bucketing. The price levels are cached until a new slab is attached and should be treated as read only.
+
+        Args:
+            depth (int): Number of orders to return
+            ui_amount (bool): Converts prices based on decimal precision if true.
+            price_schema (PriceRoundingFormat): Price schema used to bucket the prices
+
+        Returns:
+            list[Price]: List of Price objects (size and price) corresponding to orders on the slab
+        """
+        key = ('bucketed', Side.BUY, depth, ui_amount, price_schema)
+        if key not in self._ladders:
+            self._ladders[key] = Orderbook.get_L2_for_slab_with_bucketing(
+                self.slab_bids,
+                depth,
+                self.is_inverted,
+                self.decimals,
+                price_schema,
+                ui_amount,
+                self.is_inverted,
+            )
+        return self._ladders[key][:]
+
+    def get_asks_l2_with_bucketing(self, depth: int, ui_amount: bool, price_schema: PriceRoundingFormat):
+        """
+        Gets level 2 market information for asks, with prices bucketed to the ticks of the price schema
+
+        See Orderbook.get_L2_for_slab_with_bucketing. The price levels are cached until a new slab is attached and should be treated as read only.
+
+        Args:
+            depth (int): Number of orders to return
+            ui_amount (bool): Converts prices based on decimal precision if true.
+            price_schema (PriceRoundingFormat): Price schema used to bucket the prices
+
+        Returns:
+            list[Price]: List of Price objects (size and price) corresponding to orders on the slab
+        """
+        key = ('bucketed', Side.SELL, depth, ui_amount, price_schema)
+        if key not in self._ladders:
+            self._ladders[key] = Orderbook.get_L2_for_slab_with_bucketing(
+                self.slab_asks,
+                depth,
+                not self.is_inverted,
+                self.decimals,
+                price_schema,
+                ui_amount,
+                self.is_inverted,
+            )
+        return self._ladders[key][:]
     
     def get_best_bid_price(self, ui_amount: bool):
         """
@@ -594,18 +827,19 @@ class Orderbook:
             return asks[0]
         return None
     
-    def get_bid_price_by_order_id(self, order: UmaOrder):
+    def get_bid_price_by_order_id(self, order: UmaOrder, use_index: bool = False):
         """
         Gets bid Price object by UMA Order
 
         Args:
             UMA Order (UmaOrder): UMA Order
+            use_index (bool, optional): Use the order index of the slab (see Slab.get), faster when looking up many orders. Defaults to False.
 
         Returns:
             Price: Price object (size and price)
         """
         order_id = order.aaob_order_id if order.aaob_order_id else order.order_id
-        bid = self.slab_bids.get(order_id)
+        bid = self.slab_bids.get(order_id, use_index)
         if(bid is None):
             return None
         
@@ -620,18 +854,19 @@ class Orderbook:
         
         return bid_price
 
-    def get_ask_price_by_order_id(self, order: UmaOrder):
+    def get_ask_price_by_order_id(self, order: UmaOrder, use_index: bool = False):
         """
         Gets ask Price object by UMA Order
 
         Args:
             UMA Order (UmaOrder): UMA Order
+            use_index (bool, optional): Use the order index of the slab (see Slab.get), faster when looking up many orders. Defaults to False.
 
         Returns:
             Price: Price object (size and price)
         """
         order_id = order.aaob_order_id if order.aaob_order_id else order.order_id
-        ask = self.slab_asks.get(order_id)
+        ask = self.slab_asks.get(order_id, use_index)
         if(ask is None):
             return None
         
@@ -691,6 +926,77 @@ class Orderbook:
         
         return total_volume_available
 
+    def get_fill_ladder(self, side: Side, ui_amount: bool):
+        """
+        Gets the cumulative size and notional of every price level of a side, cached until a new slab is attached
+
+        Args:
+            side (Side): Side object (bid or ask)
+            ui_amount (bool): Converts prices based on decimal precision if true.
+
+        Returns:
+            FillLadder: FillLadder object
+        """
+        key = ('fill', side, ui_amount)
+        if key not in self._ladders:
+            slab = self.slab_bids if side == Side.BUY else self.slab_asks
+            # There are never more price levels than orders, so this is the full depth of the book
+            depth = slab.leaf_count + 1
+            levels = self.get_bids_l2(depth, ui_amount) if side == Side.BUY else self.get_asks_l2(depth, ui_amount)
+            self._ladders[key] = FillLadder(
+                prices=[p.price for p in levels],
+                sizes=[p.size for p in levels],
+                cumulative_size=list(accumulate((p.size for p in levels), initial=0)),
+                cumulative_notional=list(accumulate((p.price * p.size for p in levels), initial=0)),
+            )
+        return self._ladders[key]
+
+    def price_impact_curve(self, sizes, side: Side, ui_amount: bool, quote: bool = False):
+        """
+        Vectorized estimate of the average and worst fill prices for many quantities at once, over the full depth of the book
+
+        Quantities are interpreted as in estimate_avg_fill_for_base_qty (or estimate_avg_fill_for_quote_qty if quote is true).
+
+        Args:
+            sizes (array_like): Quantities to estimate fills for
+            side (Side): Side object (bid or ask)
+            ui_amount (bool): Converts prices based on decimal precision if true.
+            quote (bool, optional): Quote quantities if true. Base quantities if false. Defaults to False.
+
+        Returns:
+            dict[str, np.ndarray]: Dictionary containing `avg_price`, `worst_price`, `filled` arrays (NaN prices if the side is empty)
+        """
+        ladder = self.get_fill_ladder(side, ui_amount)
+        qty = np.asarray(sizes, dtype=np.float64)
+        if len(ladder.prices) == 0:
+            nan = np.full(qty.shape, np.nan)
+            return {'avg_price': nan, 'worst_price': nan.copy(), 'filled': np.zeros(qty.shape)}
+
+        prices = np.asarray(ladder.prices, dtype=np.float64)
+        sizes = np.asarray(ladder.sizes, dtype=np.float64)
+        cumulative_size = np.asarray(ladder.cumulative_size, dtype=np.float64)
+        cumulative_notional = np.asarray(ladder.cumulative_notional, dtype=np.float64)
+        cumulative = cumulative_size if quote else cumulative_notional
+        accumulator = sizes if quote else sizes * prices
+
+        # Level at which each quantity is exhausted, len(prices) if the whole side is not enough
+        level = np.searchsorted(cumulative[1:], qty, side='left')
+        # Same comparison as __estimate_fill_for_qty, the search can be off by a level on float rounding
+        previous = np.maximum(level - 1, 0)
+        level = np.where((level > 0) & (qty - cumulative[previous] <= accumulator[previous]), previous, level)
+        current = np.minimum(level, len(prices) - 1)
+        level = np.where((level < len(prices)) & (qty - cumulative[level] > accumulator[current]), level + 1, level)
+        partial = level < len(prices)
+        last = np.minimum(level, len(prices) - 1)
+
+        remaining = np.where(partial, qty - cumulative[level], 0)
+        partial_size = remaining if quote else remaining / prices[last]
+        return {
+            'avg_price': (cumulative_notional[level] + prices[last] * partial_size) / (cumulative_size[level] + partial_size),
+            'worst_price': prices[last],
+            'filled': cumulative[level] + remaining,
+        }
+
     def __estimate_fill_for_qty(self, qty: int, side: Side, quote: bool, ui_amount: bool):
         """
         _summary_
@@ -704,36 +1010,32 @@ class Orderbook:
         Returns:
             dict[str, float]: Dictionary containing `avg_price`, `worst_price`, `filled`
         """
-        if(side == Side.BUY):
-            prices = self.get_bids_l2(100, ui_amount)
-        elif(side == Side.SELL):
-            prices = self.get_asks_l2(100, ui_amount)
-        
-        if(quote):
-            accumulator = lambda p: p.size
-        else:
-            accumulator = lambda p: p.size * p.price
-        
-        new_prices: list[Price] = []
-        cumulative_qty = 0
-        for price in prices:
-            remaining_qty = qty - cumulative_qty
-            if(remaining_qty <= accumulator(price)):
-                cumulative_qty += remaining_qty
-                new_size = remaining_qty if quote else remaining_qty/price.price
-                new_prices.append(Price(price=price.price, size=new_size))
-                break
-            else:
-                cumulative_qty += accumulator(price)
-                new_prices.append(price)
-        
+        ladder = self.get_fill_ladder(side, ui_amount)
+        prices = ladder.prices
+        sizes = ladder.sizes
+        # Quote quantities are matched against the level sizes, base quantities against size * price
+        cumulative = ladder.cumulative_size if quote else ladder.cumulative_notional
+        accumulator = (lambda i: sizes[i]) if quote else (lambda i: sizes[i] * prices[i])
+
+        # Binary search, then the same comparison as walking the levels one by one (the search can be off by a level on float rounding)
+        level = max(bisect_left(cumulative, qty, 1) - 2, 0)
+        while level < len(prices) and qty - cumulative[level] > accumulator(level):
+            level += 1
+
+        if level == len(prices):
+            # Not enough liquidity, everything is filled
+            return {
+                'avg_price': ladder.cumulative_notional[level] / ladder.cumulative_size[level],
+                'worst_price': prices[-1],
+                'filled': cumulative[level]
+            }
+
+        remaining_qty = qty - cumulative[level]
+        new_size = remaining_qty if quote else remaining_qty/prices[level]
         return {
-            'avg_price': Orderbook.weighted_average(
-                nums=[p.price for p in new_prices],
-                weights=[p.size for p in new_prices]
-            ),
-            'worst_price': new_prices[-1].price,
-            'filled': cumulative_qty
+            'avg_price': (ladder.cumulative_notional[level] + prices[level] * new_size) / (ladder.cumulative_size[level] + new_size),
+            'worst_price': prices[level],
+            'filled': cumulative[level] + remaining_qty
         }
 
     @staticmethod
@@ -0,0 +1,159 @@
+from asyncio import gather, get_running_loop
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import fields, is_dataclass
+from functools import partial
+from typing import Any, Union
+from anchorpy import Idl, Program, Provider
+from solana.publickey import PublicKey
+from .account_decoders import get_account_decoders
+from .constants import PARALLEL_DECODE_BATCH_SIZE
+from .decode_cache import DecodeCache, MISSING
+from .enums import AccountTypes
+from .fast_decoders import find_layout_classes
+from .slab import Slab
+
+SLAB_KIND = 'slab'
+"""
+Kind of decoding of slabs (in DecodeCache and decode_accounts())
+"""
+
+DecodeKind = Union[AccountTypes, str]
+
+async def decode_accounts(
+    programs: list[Program],
+    kind: DecodeKind,
+    buffers: list[bytes],
+    pubkeys: list[PublicKey] = None,
+    decode_cache: DecodeCache = None,
+    executor: Executor = None,
+    batch_size: int = PARALLEL_DECODE_BATCH_SIZE,
+):
+    """
+    Decodes many accounts of the same kind, optionally in an executor so the event loop stays responsive
+
+    With a ThreadPoolExecutor the accounts are decoded as usual on the executor threads. With any other executor (e.g., a ProcessPoolExecutor),
+    raw buffers are sent to the workers and the decoded accounts come back as plain values, rebuilt with the classes of the programs.
+
+    Args:
+        programs (list[Program]): Program owning each account (None for slabs)
+        kind (DecodeKind): Account Type (e.g., MarketStore) or SLAB_KIND
+        buffers (list[bytes]): Raw bytes of each account (None if the account does not exist)
+        pubkeys (list[PublicKey], optional): Account public keys, required to use decode_cache. Defaults to None.
+        decode_cache (DecodeCache, optional): Cache of decoded accounts, only accounts missing from it are decoded. Defaults to None.
+        executor (Executor, optional): Executor to decode in. Defaults to decoding on the event loop.
+        batch_size (int, optional): Number of accounts sent to the executor at once. Defaults to PARALLEL_DECODE_BATCH_SIZE.
+
+    Returns:
+        list: Decoded accounts (None if the account does not exist)
+    """
+    if(programs is None):
+        programs = [None] * len(buffers)
+    use_cache = decode_cache is not None and pubkeys is not None
+    decoded = [None] * len(buffers)
+    to_decode = []
+    for i, buffer in enumerate(buffers):
+        if(buffer is None):
+            continue
+        if(use_cache):
+            cached = decode_cache.get(pubkeys[i], _cache_kind(programs[i], kind), buffer, MISSING)
+            if(cached is not MISSING):
+                decoded[i] = cached
+                continue
+        to_decode.append(i)
+
+    if(executor is None):
+        for i in to_decode:
+            decoded[i] = _decode(programs[i], kind, buffers[i])
+    else:
+        # Batches only contain accounts of the same program, so workers build a single program per batch
+        batches = []
+        by_program = {}
+        for i in to_decode:
+            program = programs[i] if kind != SLAB_KIND else None
+            by_program.setdefault(program, []).append(i)
+        for program, indices in by_program.items():
+            batches += [(program, indices[j:j + batch_size]) for j in range(0, len(indices), batch_size)]
+
+        loop = get_running_loop()
+        results = await gather(*[loop.run_in_executor(executor, _batch_function(executor, program, kind, [buffers[i] for i in indices])) for program, indices in batches])
+        for (program, indices), batch in zip(batches, results):
+            if(not isinstance(executor, ThreadPoolExecutor) and kind != SLAB_KIND):
+                batch = [_from_plain(program, d) for d in batch]
+            for i, d in zip(indices, batch):
+                decoded[i] = d
+
+    if(use_cache):
+        for i in to_decode:
+            decode_cache.put(pubkeys[i], _cache_kind(programs[i], kind), buffers[i], decoded[i])
+    return decoded
+
+
+def _cache_kind(program: Program, kind: DecodeKind):
+    # Same kinds as parse_with_version and load_multiple_account_states, so entries are shared
+    return kind if kind == SLAB_KIND else (kind, str(program.program_id))
+
+def _decode(program: Program, kind: DecodeKind, buffer: bytes):
+    if(kind == SLAB_KIND):
+        return Slab.from_bytes(buffer)
+    return get_account_decoders(program).decode(kind, buffer)
+
+def _batch_function(executor: Executor, program: Program, kind: DecodeKind, buffers: list[bytes]):
+    if(isinstance(executor, ThreadPoolExecutor)):
+        return partial(_decode_batch, program, kind, buffers)
+    if(kind == SLAB_KIND):
+        return partial(_decode_batch, None, kind, buffers)
+    return partial(_decode_batch_in_worker, program.idl, str(program.program_id), kind, buffers)
+
+def _decode_batch(program: Program, kind: DecodeKind, buffers: list[bytes]):
+    return [_decode(program, kind, b) for b in buffers]
+
+
+_worker_programs: dict[str, Program] = {}
+
+def _decode_batch_in_worker(idl: Idl, program_id: str, kind: AccountTypes, buffers: list[bytes]):
+    """
+    Runs in executor workers (e.g., other processes), returns decoded accounts as plain picklable values
+    """
+    program = _worker_programs.get(program_id)
+    if(program is None):
+        # Only the coders of the program are used, it never connects
+        program = Program(idl, PublicKey(program_id), Provider.readonly())
+        _worker_programs[program_id] = program
+    return [_to_plain(_decode(program, kind, b)) for b in buffers]
+
+def _to_plain(value: Any):
+    """
+    Converts objects decoded by anchor (dataclasses generated at runtime, which cannot be pickled) to tuples and lists
+    """
+    if(is_dataclass(value)):
+        return ('dataclass', type(value).__name__, [_to_plain(getattr(value, f.name)) for f in fields(value)])
+    if(hasattr(type(value), '_sumtype_attribs')):
+        # Enum variant, its class is a subclass of the enum
+        if(len(type(value)._sumtype_attribs) > 0):
+            raise Exception(f'Cannot send enum variants with fields from executor workers: {value}')
+        return ('enum', type(value).__mro__[1].__name__, type(value).__name__)
+    if(isinstance(value, list)):
+        return [_to_plain(v) for v in value]
+    return value
+
+def _from_plain(program: Program, value: Any):
+    """
+    Rebuilds the objects of the program from the values returned by _to_plain()
+    """
+    decoders = get_account_decoders(program)
+    account_name = value[1]
+    classes = decoders.layout_classes.get(account_name)
+    if(classes is None):
+        # Account of another type (decoded by anchor because of its discriminator)
+        classes = {}
+        find_layout_classes(program.account[account_name].coder.accounts._accounts_layout[account_name], classes)
+    return _rebuild(classes, value)
+
+def _rebuild(classes: dict, value: Any):
+    if(isinstance(value, tuple)):
+        if(value[0] == 'dataclass'):
+            return classes[value[1]](*[_rebuild(classes, v) for v in value[2]])
+        return getattr(classes[value[1]], value[2])()
+    if(isinstance(value, list)):
+        return [_rebuild(classes, v) for v in value]
+    return value
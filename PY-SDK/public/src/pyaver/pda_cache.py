@@ -0,0 +1,223 @@
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor
+from solana.publickey import PublicKey
+
+PdaKey = tuple[tuple[bytes, ...], bytes]
+
+class PdaCache():
+    """
+    Bounded LRU cache of derived PDAs (Program Derived Addresses)
+
+    PublicKey.find_program_address() hashes the seeds with every bump from 255 down until the result is off the curve,
+    which is slow when deriving the accounts of thousands of markets or users. PDAs never change, so entries are keyed by
+    (seeds, program id) and can optionally be persisted to a file to be reused by later processes.
+    """
+
+    max_size: int
+    """
+    Maximum number of PDAs kept in memory
+    """
+    path: str
+    """
+    File the cache is loaded from and saved to (None to only keep PDAs in memory)
+    """
+    hits: int
+    """
+    Number of lookups which returned an already derived PDA
+    """
+    misses: int
+    """
+    Number of lookups which had to derive the PDA
+    """
+
+    def __init__(self, max_size: int = 100_000, path: str = None):
+        """
+        Initialise a PdaCache object
+
+        If path is provided and the file exists, the PDAs saved in it are loaded.
+
+        Args:
+            max_size (int, optional): Maximum number of PDAs kept in memory. Defaults to 100_000.
+            path (str, optional): File to load the cache from and save it to. Defaults to None.
+        """
+        if(max_size <= 0):
+            raise Exception('PdaCache max_size must be positive')
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[PdaKey, tuple[PublicKey, int]] = OrderedDict()
+        if(path is not None and os.path.exists(path)):
+            self.load(path)
+
+    @staticmethod
+    def key(seeds: list[bytes], program_id: PublicKey) -> PdaKey:
+        """
+        Cache key of a PDA
+
+        Args:
+            seeds (list[bytes]): Seeds of the PDA
+            program_id (PublicKey): Program public key
+
+        Returns:
+            PdaKey: Key of the PDA in the cache
+        """
+        return (tuple(bytes(s) for s in seeds), bytes(program_id))
+
+    def find_program_address(self, seeds: list[bytes], program_id: PublicKey):
+        """
+        Same as PublicKey.find_program_address(), only derives PDAs missing from the cache
+
+        Args:
+            seeds (list[bytes]): Seeds of the PDA
+            program_id (PublicKey): Program public key
+
+        Returns:
+            tuple[PublicKey, int]: PDA and bump
+        """
+        key = PdaCache.key(seeds, program_id)
+        pda = self.__get(key)
+        if(pda is None):
+            pda = PublicKey.find_program_address(list(key[0]), program_id)
+            self.__put(key, pda)
+        return pda
+
+    def find_program_addresses(self, requests: list[tuple[list[bytes], PublicKey]], executor: Executor = None, chunksize: int = 256):
+        """
+        Derives many PDAs at once, optionally in an executor
+
+        PDAs missing from the cache are derived once each. Use a ProcessPoolExecutor to derive them on several cores.
+
+        Args:
+            requests (list[tuple[list[bytes], PublicKey]]): Seeds and program public key of each PDA
+            executor (Executor, optional): Executor to derive missing PDAs in. Defaults to deriving them in this thread.
+            chunksize (int, optional): Number of PDAs sent to the executor at once. Defaults to 256.
+
+        Returns:
+            list[tuple[PublicKey, int]]: PDA and bump of each request
+        """
+        keys = [PdaCache.key(seeds, program_id) for seeds, program_id in requests]
+        results = [self.__get(k) for k in keys]
+        missing = list(dict.fromkeys(k for k, r in zip(keys, results) if r is None))
+        if(executor is None):
+            derived = map(_derive, missing)
+        else:
+            derived = executor.map(_derive, missing, chunksize=chunksize)
+        derived = {k: (PublicKey(address), bump) for k, (address, bump) in zip(missing, derived)}
+        for k, pda in derived.items():
+            self.__put(k, pda)
+        return [r if r is not None else derived[k] for k, r in zip(keys, results)]
+
+    def load(self, path: str = None):
+        """
+        Adds the PDAs saved in a file to the cache
+
+        Args:
+            path (str, optional): File to load. Defaults to the path of the cache.
+        """
+        path = path if path is not None else self.path
+        with open(path, 'r') as f:
+            saved = json.load(f)
+        for program_id, seeds, address, bump in saved['pdas']:
+            key = (tuple(bytes.fromhex(s) for s in seeds), bytes(PublicKey(program_id)))
+            self.__put(key, (PublicKey(address), bump))
+
+    def save(self, path: str = None):
+        """
+        Writes the PDAs in the cache to a file
+
+        The file is replaced atomically, so a process reading it never sees a partially written cache.
+
+        Args:
+            path (str, optional): File to write. Defaults to the path of the cache.
+        """
+        path = path if path is not None else self.path
+        if(path is None):
+            raise Exception('PdaCache has no path to save to')
+        pdas = [[str(PublicKey(program_id)), [s.hex() for s in seeds], str(address), bump] for (seeds, program_id), (address, bump) in self._entries.items()]
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump({'pdas': pdas}, f)
+        os.replace(temporary_path, path)
+
+    def clear(self):
+        """
+        Removes all PDAs from memory (the saved file is left untouched)
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __get(self, key: PdaKey):
+        pda = self._entries.get(key)
+        if(pda is None):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pda
+
+    def __put(self, key: PdaKey, pda: tuple[PublicKey, int]):
+        self._entries[key] = pda
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def _derive(key: PdaKey):
+    """
+    Runs in executor workers, returns plain values which are cheap to send back
+    """
+    address, bump = PublicKey.find_program_address(list(key[0]), PublicKey(key[1]))
+    return bytes(address), bump
+
+
+_default_pda_cache = PdaCache()
+
+def get_default_pda_cache():
+    """
+    PdaCache used by the derive_* methods of the SDK
+
+    Returns:
+        PdaCache: Default PdaCache
+    """
+    return _default_pda_cache
+
+def set_default_pda_cache(pda_cache: PdaCache):
+    """
+    Replaces the PdaCache used by the derive_* methods of the SDK (e.g., with one saved to a file)
+
+    Args:
+        pda_cache (PdaCache): PdaCache to use
+    """
+    global _default_pda_cache
+    _default_pda_cache = pda_cache
+
+def find_program_address(seeds: list[bytes], program_id: PublicKey):
+    """
+    Same as PublicKey.find_program_address(), using the default PdaCache
+
+    Args:
+        seeds (list[bytes]): Seeds of the PDA
+        program_id (PublicKey): Program public key
+
+    Returns:
+        tuple[PublicKey, int]: PDA and bump
+    """
+    return _default_pda_cache.find_program_address(seeds, program_id)
+
+def find_program_addresses(requests: list[tuple[list[bytes], PublicKey]], executor: Executor = None):
+    """
+    Derives many PDAs at once using the default PdaCache, see PdaCache.find_program_addresses()
+
+    Args:
+        requests (list[tuple[list[bytes], PublicKey]]): Seeds and program public key of each PDA
+        executor (Executor, optional): Executor to derive missing PDAs in. Defaults to deriving them in this thread.
+
+    Returns:
+        list[tuple[PublicKey, int]]: PDA and bump of each request
+    """
+    return _default_pda_cache.find_program_addresses(requests, executor)
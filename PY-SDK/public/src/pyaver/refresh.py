@@ -1,6 +1,11 @@
+from inspect import isawaitable
+from typing import Any, Callable
+from solana.publickey import PublicKey
 from .aver_client import AverClient
 from .user_market import AverMarket, UserMarket
-from .utils import load_multiple_account_states
+from .slab import Slab
+from .subscriptions import AccountSubscription
+from .utils import load_multiple_account_states, parse_market_state, parse_market_store, parse_user_host_lifetime_state, parse_user_market_state
 
 
 
@@ -153,3 +158,123 @@ async def refresh_user_market(aver_client: AverClient, user_market: UserMarket)
     """
     return (await refresh_multiple_user_markets(aver_client, [user_market]))[0]
 
+
+async def subscribe_to_markets(
+    aver_client: AverClient,
+    markets: list[AverMarket],
+    on_update: Callable[[AverMarket], Any] = None,
+    ) -> list[AccountSubscription]:
+    """
+    Keeps markets up to date with websocket account subscriptions, instead of polling with refresh_multiple_markets()
+
+    The MarketState, MarketStoreState and orderbook slabs of each market are replaced in place as soon as the accounts change.
+    Subscriptions are shared with other consumers of the same accounts (see AverClient.subscriptions).
+
+    Args:
+        aver_client (AverClient): AverClient object
+        markets (list[AverMarket]): List of AverMarket objects
+        on_update (Callable[[AverMarket], Any], optional): Called with the market after each update. May be a coroutine function. Defaults to None.
+
+    Returns:
+        list[AccountSubscription]: Subscriptions, pass them to unsubscribe() to stop updating the markets
+    """
+    subscriptions = []
+    for market in markets:
+        program = await aver_client.get_program_from_program_id(market.program_id)
+
+        async def notify(market: AverMarket):
+            if(on_update is not None):
+                res = on_update(market)
+                if(isawaitable(res)):
+                    await res
+
+        async def on_market_state(pubkey: PublicKey, data: bytes, slot: int, market=market, program=program):
+            if(data is None):
+                return
+            market.market_state = parse_market_state(data, aver_client, program, pubkey)
+            await notify(market)
+
+        async def on_market_store(pubkey: PublicKey, data: bytes, slot: int, market=market, program=program):
+            market.market_store_state = parse_market_store(data, aver_client, program, pubkey) if data is not None else None
+            await notify(market)
+
+        async def on_slab(pubkey: PublicKey, data: bytes, slot: int, market=market):
+            if(data is None or market.orderbooks is None):
+                return
+            slab = Slab.from_bytes(data)
+            # Binary markets also hold the inverted orderbook, which has the same slabs switched
+            for orderbook in market.orderbooks:
+                if(orderbook.slab_bids_pubkey == pubkey):
+                    orderbook.slab_bids = slab
+                if(orderbook.slab_asks_pubkey == pubkey):
+                    orderbook.slab_asks = slab
+            await notify(market)
+
+        subscriptions.append(await aver_client.subscriptions.subscribe(market.market_pubkey, on_market_state))
+        subscriptions.append(await aver_client.subscriptions.subscribe(market.market_state.market_store, on_market_store))
+        if(market.market_store_state is not None and market.market_store_state.orderbook_accounts is not None):
+            for orderbook_accounts in market.market_store_state.orderbook_accounts:
+                subscriptions.append(await aver_client.subscriptions.subscribe(orderbook_accounts.bids, on_slab))
+                subscriptions.append(await aver_client.subscriptions.subscribe(orderbook_accounts.asks, on_slab))
+    return subscriptions
+
+async def subscribe_to_user_markets(
+    aver_client: AverClient,
+    user_markets: list[UserMarket],
+    on_update: Callable[[UserMarket], Any] = None,
+    ) -> list[AccountSubscription]:
+    """
+    Keeps user markets (and their markets) up to date with websocket account subscriptions, instead of polling with refresh_multiple_user_markets()
+
+    The UserMarketState and UserHostLifetimeState of each user market are replaced in place as soon as the accounts change,
+    and the underlying markets are kept up to date as in subscribe_to_markets().
+
+    Args:
+        aver_client (AverClient): AverClient object
+        user_markets (list[UserMarket]): List of UserMarket objects
+        on_update (Callable[[UserMarket], Any], optional): Called with the user market after each update (including updates of its market). May be a coroutine function. Defaults to None.
+
+    Returns:
+        list[AccountSubscription]: Subscriptions, pass them to unsubscribe() to stop updating the user markets
+    """
+    subscriptions = []
+    for user_market in user_markets:
+        program = await aver_client.get_program_from_program_id(user_market.program_id)
+
+        async def notify(user_market: UserMarket):
+            if(on_update is not None):
+                res = on_update(user_market)
+                if(isawaitable(res)):
+                    await res
+
+        async def on_user_market_state(pubkey: PublicKey, data: bytes, slot: int, user_market=user_market, program=program):
+            if(data is None):
+                return
+            user_market.user_market_state = parse_user_market_state(data, aver_client, program, pubkey)
+            await notify(user_market)
+
+        async def on_user_host_lifetime(pubkey: PublicKey, data: bytes, slot: int, user_market=user_market, program=program):
+            if(data is None):
+                return
+            user_market.user_host_lifetime.user_host_lifetime_state = parse_user_host_lifetime_state(aver_client, data, program, pubkey)
+            await notify(user_market)
+
+        subscriptions.append(await aver_client.subscriptions.subscribe(user_market.pubkey, on_user_market_state))
+        subscriptions.append(await aver_client.subscriptions.subscribe(user_market.user_host_lifetime.pubkey, on_user_host_lifetime))
+        subscriptions += await subscribe_to_markets(
+            aver_client,
+            [user_market.market],
+            (lambda _, user_market=user_market: notify(user_market)) if on_update is not None else None,
+        )
+    return subscriptions
+
+async def unsubscribe(aver_client: AverClient, subscriptions: list[AccountSubscription]):
+    """
+    Stops the updates started by subscribe_to_markets() or subscribe_to_user_markets()
+
+    Args:
+        aver_client (AverClient): AverClient object
+        subscriptions (list[AccountSubscription]): Subscriptions returned when subscribing
+    """
+    for subscription in subscriptions:
+        await aver_client.subscriptions.unsubscribe(subscription)
@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import Iterable, List, NamedTuple, Optional
-from construct import ListContainer
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
 from solana.publickey import PublicKey
-from .layouts import SLAB_LAYOUT, NodeType, CALLBACK_INFO_LEN
+from .layouts import SLAB_HEADER_STRUCT, SLAB_NODE_STRUCT, NodeType, CALLBACK_INFO_LEN, PADDED_LEN, SLOT_SIZE
 
 class Callback(NamedTuple):
     user_market: PublicKey
@@ -21,10 +21,58 @@ class SlabHeader(NamedTuple):
     leaf_count: int
     market_address: PublicKey
 
+class SlabArrays(NamedTuple):
+    """
+    Columnar (NumPy) view of the orders in a Slab, one row per order
+
+    Rows are sorted by order key ascending (i.e. price ascending) unless stated otherwise
+    """
+    key_hi: np.ndarray
+    """
+    Upper 64 bits of the order key (uint64)
+    """
+    key_lo: np.ndarray
+    """
+    Lower 64 bits of the order key (uint64)
+    """
+    price: np.ndarray
+    """
+    Price in 32.32 fixed point, i.e. price / 2 ** 32 is the probability price (uint64)
+    """
+    base_quantity: np.ndarray
+    """
+    Base quantity of the order (uint64)
+    """
+    fee_tier: np.ndarray
+    """
+    Fee tier of the order (uint8)
+    """
+    user_market: np.ndarray
+    """
+    User market public key bytes, shape (N, 32) (uint8)
+    """
+
+    def reverse(self):
+        """
+        Returns the same rows in reverse order
+
+        Returns:
+            SlabArrays: SlabArrays object
+        """
+        return SlabArrays(*(a[::-1] for a in self))
+
 
 # Used as dummy value for SlabNode#next.
 NONE_NEXT = -1
 
+# Node slots as a NumPy record, used by Slab.to_arrays
+SLAB_NODE_DTYPE = np.dtype([('tag', '<u8'), ('key_lo', '<u8'), ('key_hi', '<u8'), ('word_a', '<u8'), ('word_b', '<u8')])
+
+# Plain int node tags, compared against in the decoding loop
+INNER_NODE = int(NodeType.INNER_NODE)
+LEAF_NODE = int(NodeType.LEAF_NODE)
+LAST_FREE_NODE = int(NodeType.LAST_FREE_NODE)
+
 
 # UninitializedNode, FreeNode and LastFreeNode all maps to this class.
 @dataclass(frozen=True)
@@ -47,101 +95,220 @@ class SlabInnerNode(SlabNode):
     children: List[int]
 
 
+class LazySlabLeafNode(SlabLeafNode):
+    """
+    SlabLeafNode returned by lazily decoded Slabs
+
+    user_market and fee_tier are only read from the callback area of the slab buffer when they are accessed
+    """
+    def __init__(self, key: int, callback_info_pt: int, base_quantity: int, buffer: bytes):
+        object.__setattr__(self, 'is_initialized', True)
+        object.__setattr__(self, 'next', NONE_NEXT)
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'callback_info_pt', callback_info_pt)
+        object.__setattr__(self, 'base_quantity', base_quantity)
+        object.__setattr__(self, '_buffer', buffer)
+        object.__setattr__(self, '_user_market', None)
+
+    @property
+    def user_market(self) -> PublicKey:
+        if self._user_market is None:
+            object.__setattr__(self, '_user_market', PublicKey(self._buffer[self.callback_info_pt:self.callback_info_pt+CALLBACK_INFO_LEN-1]))
+        return self._user_market
+
+    @property
+    def fee_tier(self) -> int:
+        return self._buffer[self.callback_info_pt+CALLBACK_INFO_LEN-1]
+
+
 class Slab:
     """
     Slab object
 
     A Slab is one side of the orderbook (bids or asks), which contains all of the open orders for side and outcome in a given market
     """
-    def __init__(self, header: SlabHeader, nodes: List[SlabNode]): 
+    def __init__(self, header: SlabHeader, nodes: Dict[int, SlabNode], buffer: bytes = None, lazy: bool = False): 
         self._header: SlabHeader = header
-        self._nodes: List[SlabNode] = nodes
+        self._nodes: Dict[int, SlabNode] = nodes
+        # Raw account data (used by to_arrays), lazy Slabs also decode nodes from it into self._nodes as they are reached
+        self._buffer: Optional[bytes] = buffer
+        self._lazy: bool = lazy
+        self._arrays: Optional[SlabArrays] = None
+        # Order key -> leaf, built on first use by get(use_index=True) / get_many
+        self._index: Optional[Dict[int, SlabLeafNode]] = None
 
     @staticmethod
-    def __build(nodes: ListContainer, buffer: bytes) -> List[SlabNode]:
-        res: List[SlabNode] = []
-        for construct_node in nodes:
-            node_type = construct_node.tag
-            node = construct_node.node
-            if node_type == NodeType.UNINTIALIZED:
-                res.append(SlabNode(is_initialized=False, next=-1))
-            elif node_type == NodeType.LEAF_NODE:
-                res.append(
-                    SlabLeafNode(
-                        key = int.from_bytes(node.key, "little"),
-                        callback_info_pt = node.callback_info_pt,
-                        base_quantity = node.base_quantity,
-                        is_initialized = True,
-                        next = NONE_NEXT,
-                        user_market = PublicKey(buffer[node.callback_info_pt:node.callback_info_pt+CALLBACK_INFO_LEN-1]),
-                        fee_tier = int.from_bytes(buffer[node.callback_info_pt+CALLBACK_INFO_LEN-1:node.callback_info_pt+CALLBACK_INFO_LEN], "little"),
-                    )
-                )
-            elif node_type == NodeType.INNER_NODE:
-                res.append(
-                    SlabInnerNode(
-                        prefix_len = node.prefix_len,
-                        key = int.from_bytes(node.key, "little"),
-                        children = node.children,
-                        is_initialized = True,
-                        next = NONE_NEXT,
-                    )
+    def __build(view: memoryview, buffer: bytes, bump_index: int) -> Dict[int, SlabNode]:
+        # Only inner and leaf nodes are kept (indexed by slot), free and uninitialized slots are skipped
+        res: Dict[int, SlabNode] = {}
+        nodes_end = PADDED_LEN + bump_index * SLOT_SIZE
+        for index, (tag, key_lo, key_hi, word_a, word_b) in enumerate(SLAB_NODE_STRUCT.iter_unpack(view[PADDED_LEN:nodes_end])):
+            # Positional arguments (field order of the dataclasses) as this loop runs for every slot
+            if tag == LEAF_NODE:
+                # is_initialized, next, key, callback_info_pt, base_quantity, user_market, fee_tier
+                res[index] = SlabLeafNode(
+                    True,
+                    NONE_NEXT,
+                    (key_hi << 64) | key_lo,
+                    word_a,
+                    word_b,
+                    PublicKey(buffer[word_a:word_a+CALLBACK_INFO_LEN-1]),
+                    buffer[word_a+CALLBACK_INFO_LEN-1],
                 )
-            elif node_type == NodeType.FREE_NODE:
-                res.append(
-                    SlabNode(
-                        is_initialized=True,
-                        next=node.next
-                    )
+            elif tag == INNER_NODE:
+                # is_initialized, next, prefix_len, key, children
+                res[index] = SlabInnerNode(
+                    True,
+                    NONE_NEXT,
+                    word_a,
+                    (key_hi << 64) | key_lo,
+                    [word_b & 0xFFFFFFFF, word_b >> 32],
                 )
-            elif node_type == NodeType.LAST_FREE_NODE:
-                res.append(
-                    SlabNode(
-                        is_initialized=True,
-                        next=NONE_NEXT
-                    )
-                )
-            else:
-                raise RuntimeError("Unrecognized node type" + node.tag)
-        return res        
+            elif tag > LAST_FREE_NODE:
+                raise RuntimeError("Unrecognized node type " + str(tag))
+        return res
 
     @staticmethod
-    def from_bytes(buffer: bytes):
+    def __decode_node(buffer: bytes, index: int) -> SlabNode:
+        tag, key_lo, key_hi, word_a, word_b = SLAB_NODE_STRUCT.unpack_from(buffer, PADDED_LEN + index * SLOT_SIZE)
+        if tag == LEAF_NODE:
+            return LazySlabLeafNode(
+                key = (key_hi << 64) | key_lo,
+                callback_info_pt = word_a,
+                base_quantity = word_b,
+                buffer = buffer,
+            )
+        elif tag == INNER_NODE:
+            return SlabInnerNode(
+                prefix_len = word_a,
+                key = (key_hi << 64) | key_lo,
+                children = [word_b & 0xFFFFFFFF, word_b >> 32],
+                is_initialized = True,
+                next = NONE_NEXT,
+            )
+        elif tag > LAST_FREE_NODE:
+            raise RuntimeError("Unrecognized node type " + str(tag))
+        return SlabNode(is_initialized=tag != NodeType.UNINTIALIZED, next=NONE_NEXT)
+
+    @staticmethod
+    def from_bytes(buffer: bytes, lazy: bool = False):
         """
         Parses raw onchain data to Slab object
 
+        If lazy is true, only the header is parsed upfront. Nodes are decoded when get() or items() reaches them,
+        so reading the best prices only touches O(tree depth) nodes. The user_market and fee_tier of each order are
+        also only read when accessed.
+
         Args:
             buffer (bytes): Raw bytes coming from onchain
+            lazy (bool, optional): Decode nodes on demand instead of all at once. Defaults to False.
 
         Returns:
             Slab: Slab object
         """
-        parsed_slab = SLAB_LAYOUT.parse(buffer)
-        header = parsed_slab.header
-        nodes = parsed_slab.nodes
+        buffer = bytes(buffer)
+        view = memoryview(buffer)
+        (
+            account_tag,
+            bump_index,
+            free_list_len,
+            free_list_head,
+            callback_memory_offset,
+            callback_free_list_len,
+            callback_free_list_head,
+            callback_bump_index,
+            root_node,
+            leaf_count,
+            market_address,
+        ) = SLAB_HEADER_STRUCT.unpack_from(view, 0)
         return Slab(
             SlabHeader(
-                account_tag=header.account_tag,
-                bump_index=header.bump_index,
-                free_list_len=header.free_list_len,
-                free_list_head=header.free_list_head,
-                callback_memory_offset=header.callback_memory_offset,
-                callback_free_list_len=header.callback_free_list_len,
-                callback_free_list_head=header.callback_free_list_head,
-                callback_bump_index=header.callback_bump_index,
-                root_node=header.root_node,
-                leaf_count=header.leaf_count,
-                market_address=PublicKey(header.market_address),
+                account_tag=account_tag,
+                bump_index=bump_index,
+                free_list_len=free_list_len,
+                free_list_head=free_list_head,
+                callback_memory_offset=callback_memory_offset,
+                callback_free_list_len=callback_free_list_len,
+                callback_free_list_head=callback_free_list_head,
+                callback_bump_index=callback_bump_index,
+                root_node=root_node,
+                leaf_count=leaf_count,
+                market_address=PublicKey(market_address),
             ),
-            Slab.__build(nodes, buffer),
+            {} if lazy else Slab.__build(view, buffer, bump_index),
+            buffer,
+            lazy,
         )
 
-    def get(self, search_key: int) -> Optional[SlabLeafNode]:
+    @property
+    def leaf_count(self) -> int:
+        """
+        Number of orders (leaf nodes) in the Slab
+        """
+        return self._header.leaf_count
+
+    def _get_node(self, index: int) -> Optional[SlabNode]:
+        node = self._nodes.get(index)
+        if node is None and self._lazy:
+            node = Slab.__decode_node(self._buffer, index)
+            self._nodes[index] = node
+        return node
+
+    def to_arrays(self) -> SlabArrays:
+        """
+        Returns all orders in the Slab as NumPy arrays, sorted by order key ascending (i.e. in the same order as items())
+
+        The arrays are built straight from the slab buffer without decoding any nodes, and are cached on the Slab.
+        They are read only.
+
+        Raises:
+            Exception: Slab was not created with Slab.from_bytes
+
+        Returns:
+            SlabArrays: SlabArrays object
+        """
+        if self._arrays is not None:
+            return self._arrays
+        if self._buffer is None:
+            raise Exception('Slab has no buffer, use Slab.from_bytes')
+
+        data = np.frombuffer(self._buffer, dtype=np.uint8)
+        slots = np.frombuffer(self._buffer, dtype=SLAB_NODE_DTYPE, count=self._header.bump_index, offset=PADDED_LEN)
+        leaves = slots[slots['tag'] == LEAF_NODE]
+        # Keys are unique so sorting by (key_hi, key_lo) is the in-order traversal of the crit-bit tree
+        leaves = leaves[np.lexsort((leaves['key_lo'], leaves['key_hi']))]
+
+        callback_pts = leaves['word_a'].astype(np.intp)
+        user_market = data[callback_pts[:, None] + np.arange(CALLBACK_INFO_LEN - 1)]
+        self._arrays = SlabArrays(
+            key_hi=leaves['key_hi'],
+            key_lo=leaves['key_lo'],
+            price=leaves['key_hi'],
+            base_quantity=leaves['word_b'],
+            fee_tier=data[callback_pts + CALLBACK_INFO_LEN - 1],
+            user_market=user_market.reshape(-1, CALLBACK_INFO_LEN - 1),
+        )
+        return self._arrays
+
+    def get(self, search_key: int, use_index: bool = False) -> Optional[SlabLeafNode]:
+        """
+        Finds the order with the given key (order id)
+
+        Args:
+            search_key (int): Order key
+            use_index (bool, optional): Look the key up in the order index of the Slab, building it (one pass over all orders) if needed.
+                Worth it when looking up many orders in the same Slab. Defaults to False.
+
+        Returns:
+            Optional[SlabLeafNode]: SlabLeafNode object or None if there is no such order
+        """
+        if use_index or self._index is not None:
+            return self._get_index().get(search_key)
         if self._header.leaf_count == 0:
             return None
         index: int = self._header.root_node
         while True:
-            node: SlabNode = self._nodes[index]
+            node: SlabNode = self._get_node(index)
             if isinstance(node, SlabLeafNode):  # pylint: disable=no-else-return
                 return node if node.key == search_key else None
             elif isinstance(node, SlabInnerNode):
@@ -152,6 +319,26 @@ class Slab:
             else:
                 raise RuntimeError("Should not go here! Node type not recognize.")
 
+    def get_many(self, search_keys: Iterable[int]) -> List[Optional[SlabLeafNode]]:
+        """
+        Finds the orders with the given keys (order ids)
+
+        Uses the order index of the Slab, so looking up all orders of a user is a single pass over the Slab.
+
+        Args:
+            search_keys (Iterable[int]): Order keys
+
+        Returns:
+            List[Optional[SlabLeafNode]]: SlabLeafNode object (or None if there is no such order) for each key
+        """
+        index = self._get_index()
+        return [index.get(k) for k in search_keys]
+
+    def _get_index(self) -> Dict[int, SlabLeafNode]:
+        if self._index is None:
+            self._index = {node.key: node for node in self.items()}
+        return self._index
+
     def __iter__(self) -> Iterable[SlabLeafNode]:
         return self.items(False)
 
@@ -173,7 +360,7 @@ class Slab:
         stack = [self._header.root_node]
         while stack:
             index = stack.pop()
-            node: SlabNode = self._nodes[index]
+            node: SlabNode = self._get_node(index)
             if isinstance(node, SlabLeafNode):
                 yield node
             elif isinstance(node, SlabInnerNode):
@@ -0,0 +1,296 @@
+import asyncio
+import base64
+from inspect import isawaitable
+from itertools import count
+from json import dumps, loads
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse, urlunparse
+import websockets
+from solana.publickey import PublicKey
+from solana.rpc.async_api import AsyncClient
+
+AccountCallback = Callable[[PublicKey, Optional[bytes], int], Any]
+"""
+Called with the account public key, its new data (None if the account was closed) and the slot of the update. May be a coroutine function.
+"""
+
+def get_websocket_endpoint(http_endpoint: str):
+    """
+    Derives the RPC websocket endpoint from an RPC http endpoint
+
+    Args:
+        http_endpoint (str): RPC http endpoint (e.g., https://api.devnet.solana.com)
+
+    Returns:
+        str: RPC websocket endpoint (e.g., wss://api.devnet.solana.com)
+    """
+    url = urlparse(http_endpoint)
+    scheme = 'wss' if url.scheme == 'https' else 'ws'
+    netloc = url.netloc
+    # Local validators serve websockets on the port after the http port
+    if(url.port is not None and url.port == 8899):
+        netloc = netloc.replace(':8899', ':8900')
+    return urlunparse(url._replace(scheme=scheme, netloc=netloc))
+
+
+class AccountSubscription():
+    """
+    A consumer of the updates of an account, returned by AccountSubscriptionManager.subscribe()
+    """
+
+    pubkey: PublicKey
+    """
+    Account public key
+    """
+    callback: AccountCallback
+    """
+    Called with each update of the account
+    """
+
+    def __init__(self, pubkey: PublicKey, callback: AccountCallback):
+        self.pubkey = pubkey
+        self.callback = callback
+
+
+class AccountSubscriptionManager():
+    """
+    Streams account updates from an RPC websocket (accountSubscribe)
+
+    Consumers of the same account share a single subscription. The connection is opened with the first subscription,
+    is re-opened (resubscribing to every account) whenever it drops and is closed once every consumer unsubscribed.
+    As accountSubscribe does not send the current data, accounts are fetched again after reconnecting so changes made
+    while the connection was down reach the consumers.
+    """
+
+    endpoint: str
+    """
+    RPC websocket endpoint
+    """
+    commitment: str
+    """
+    Commitment of the updates
+    """
+    connection: AsyncClient
+    """
+    Solana AsyncClient fetching the accounts after reconnecting
+    """
+    failed_subscriptions: dict
+    """
+    RPC error of accounts whose subscription was rejected, by account public key (base58)
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        commitment: str = 'confirmed',
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30,
+        connection: AsyncClient = None,
+    ):
+        """
+        Initialise an AccountSubscriptionManager object. Use AverClient.subscriptions instead of creating one.
+
+        Args:
+            endpoint (str): RPC websocket endpoint
+            commitment (str, optional): Commitment of the updates. Defaults to 'confirmed'.
+            reconnect_delay (float, optional): Seconds before reconnecting, doubled after each failed attempt. Defaults to 0.5.
+            max_reconnect_delay (float, optional): Maximum seconds before reconnecting. Defaults to 30.
+            connection (AsyncClient, optional): Solana AsyncClient fetching the accounts after reconnecting. Defaults to None (accounts are not fetched again).
+        """
+        self.endpoint = endpoint
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connection = connection
+        self.failed_subscriptions = {}
+
+        # Account (base58) -> consumers, and the state of the RPC subscriptions on the current connection
+        self._listeners: dict[str, list[AccountSubscription]] = {}
+        self._subscription_ids: dict[int, str] = {}
+        self._pending_requests: dict[int, str] = {}
+        self._last_slots: dict[str, int] = {}
+        self._request_ids = count(1)
+        self._ws = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._subscribed = asyncio.Event()
+
+    @property
+    def is_connected(self):
+        """
+        Whether the websocket is currently open
+        """
+        return self._connected.is_set()
+
+    async def wait_until_connected(self, timeout: float = None):
+        """
+        Waits until the websocket is open
+
+        Args:
+            timeout (float, optional): Seconds to wait for. Defaults to no limit.
+        """
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def subscribe(self, pubkey: PublicKey, callback: AccountCallback):
+        """
+        Calls callback with every update of an account
+
+        Args:
+            pubkey (PublicKey): Account public key
+            callback (AccountCallback): Called with the public key, new data and slot of each update
+
+        Returns:
+            AccountSubscription: AccountSubscription object, to pass to unsubscribe()
+        """
+        subscription = AccountSubscription(pubkey, callback)
+        key = str(pubkey)
+        listeners = self._listeners.setdefault(key, [])
+        listeners.append(subscription)
+        if(len(listeners) == 1 and self._ws is not None):
+            await self.__send_subscribe(key)
+        if(self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.__run())
+        return subscription
+
+    async def unsubscribe(self, subscription: AccountSubscription):
+        """
+        Stops calling the callback of a subscription. The RPC subscription is cancelled when an account has no consumer left.
+
+        Args:
+            subscription (AccountSubscription): AccountSubscription object returned by subscribe()
+        """
+        key = str(subscription.pubkey)
+        listeners = self._listeners.get(key, [])
+        if(subscription in listeners):
+            listeners.remove(subscription)
+        if(len(listeners) > 0):
+            return
+        self._listeners.pop(key, None)
+        self._last_slots.pop(key, None)
+        for subscription_id, subscribed_key in list(self._subscription_ids.items()):
+            if(subscribed_key == key):
+                del self._subscription_ids[subscription_id]
+                await self.__send('accountUnsubscribe', [subscription_id])
+        if(len(self._listeners) == 0 and self._ws is not None):
+            # The run loop stops once the connection is closed
+            await self._ws.close()
+
+    async def close(self):
+        """
+        Closes the websocket and drops every subscription
+        """
+        self._listeners.clear()
+        self._last_slots.clear()
+        if(self._task is not None):
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __send(self, method: str, params: list):
+        request_id = next(self._request_ids)
+        if(self._ws is not None):
+            try:
+                await self._ws.send(dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}))
+            except websockets.ConnectionClosed:
+                # The run loop reconnects and resubscribes
+                pass
+        return request_id
+
+    async def __send_subscribe(self, key: str):
+        request_id = await self.__send('accountSubscribe', [key, {'encoding': 'base64', 'commitment': self.commitment}])
+        self._pending_requests[request_id] = key
+
+    async def __run(self):
+        delay = self.reconnect_delay
+        reconnecting = False
+        refetch = None
+        while len(self._listeners) > 0:
+            try:
+                async with websockets.connect(self.endpoint, max_size=None) as ws:
+                    self._ws = ws
+                    self._subscribed.clear()
+                    for key in list(self._listeners):
+                        await self.__send_subscribe(key)
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    if(reconnecting and self.connection is not None):
+                        refetch = asyncio.create_task(self.__refetch(list(self._listeners)))
+                    reconnecting = True
+                    async for message in ws:
+                        try:
+                            await self.__handle_message(loads(message))
+                        except Exception as e:
+                            # A malformed message must not stop every subscription
+                            print(f'Subscription message could not be handled: {e!r}')
+            except (websockets.WebSocketException, OSError, asyncio.TimeoutError):
+                pass
+            finally:
+                if(refetch is not None):
+                    refetch.cancel()
+                    refetch = None
+                self._ws = None
+                self._connected.clear()
+                self._subscription_ids.clear()
+                self._pending_requests.clear()
+            if(len(self._listeners) == 0):
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def __refetch(self, keys: list[str]):
+        # Imported here as utils depends on AverClient, which owns this manager
+        from .utils import load_multiple_bytes_data
+
+        try:
+            # Fetched once subscribed so no change is missed in between, at a slot no older than the one read before fetching
+            await self._subscribed.wait()
+            keys = [key for key in keys if key in self._subscription_ids.values()]
+            slot = (await self.connection.get_slot(self.commitment))['result']
+            data = await load_multiple_bytes_data(self.connection, [PublicKey(key) for key in keys])
+        except Exception as e:
+            print(f'Accounts could not be fetched after reconnecting: {e!r}')
+            return
+        for key, account_data in zip(keys, data):
+            await self.__dispatch(key, account_data, slot)
+
+    async def __dispatch(self, key: str, data: Optional[bytes], slot: int):
+        # Ignore updates older than the last one (e.g., replayed after a reconnect)
+        if(slot < self._last_slots.get(key, -1)):
+            return
+        self._last_slots[key] = slot
+        for subscription in list(self._listeners.get(key, [])):
+            try:
+                res = subscription.callback(subscription.pubkey, data, slot)
+                if(isawaitable(res)):
+                    await res
+            except Exception as e:
+                print(f'Subscription callback for {key} failed: {e!r}')
+
+    async def __handle_message(self, message: dict):
+        if(message.get('method') == 'accountNotification'):
+            params = message['params']
+            key = self._subscription_ids.get(params['subscription'])
+            if(key is None):
+                return
+            slot = params['result']['context']['slot']
+            value = params['result']['value']
+            data = base64.b64decode(value['data'][0]) if value is not None else None
+            await self.__dispatch(key, data, slot)
+            return
+
+        key = self._pending_requests.pop(message.get('id'), None)
+        if(key is None):
+            return
+        if(len(self._pending_requests) == 0):
+            self._subscribed.set()
+        if('error' in message):
+            self.failed_subscriptions[key] = message['error']
+        elif(key in self._listeners):
+            self.failed_subscriptions.pop(key, None)
+            self._subscription_ids[message['result']] = key
+        else:
+            # Every consumer unsubscribed while the subscription was being confirmed
+            await self.__send('accountUnsubscribe', [message['result']])
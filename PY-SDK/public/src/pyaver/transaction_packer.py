@@ -0,0 +1,111 @@
+from solana.publickey import PublicKey
+from solana.transaction import TransactionInstruction
+from .compute_units import compute_budget_program_id, set_compute_unit_limit_ixn, set_compute_unit_price_ixn
+from .constants import DEFAULT_COMPUTE_UNIT_PRICE, DEFAULT_INSTRUCTION_COMPUTE_UNITS, MAX_TRANSACTION_ACCOUNT_LOCKS, MAX_TRANSACTION_COMPUTE_UNITS, MAX_TRANSACTION_SIZE
+
+class _PackedTransaction():
+    """
+    Instructions packed into a transaction so far, with the accounts, signers and bytes they take
+    """
+
+    def __init__(self, fee_payer: PublicKey, compute_unit_price: int):
+        self.instructions: list[TransactionInstruction] = []
+        self.compute_units = 0
+        self.accounts = {bytes(fee_payer), bytes(compute_budget_program_id)}
+        self.signers = {bytes(fee_payer)}
+        # Compute unit limit (5 bytes of data) and price (9 bytes of data) instructions, without accounts
+        self.budget_instructions = 2 if compute_unit_price is not None else 1
+        self.instructions_size = _instruction_size(0, 5) + (_instruction_size(0, 9) if compute_unit_price is not None else 0)
+
+    def add(self, ix: TransactionInstruction, compute_units: int):
+        """
+        Adds the instruction if the transaction stays within the size, account lock and compute unit limits
+
+        Returns:
+            bool: True if the instruction was added
+        """
+        accounts = self.accounts | {bytes(ix.program_id)} | {bytes(k.pubkey) for k in ix.keys}
+        signers = self.signers | {bytes(k.pubkey) for k in ix.keys if k.is_signer}
+        instructions_size = self.instructions_size + _instruction_size(len(ix.keys), len(ix.data))
+        size = _transaction_size(len(signers), len(accounts), len(self.instructions) + self.budget_instructions + 1, instructions_size)
+        if(self.instructions and (
+            size > MAX_TRANSACTION_SIZE
+            or len(accounts) > MAX_TRANSACTION_ACCOUNT_LOCKS
+            or self.compute_units + compute_units > MAX_TRANSACTION_COMPUTE_UNITS
+        )):
+            return False
+        if(size > MAX_TRANSACTION_SIZE):
+            raise Exception(f'Instruction too large to fit in a transaction ({size} > {MAX_TRANSACTION_SIZE} bytes)')
+        self.instructions.append(ix)
+        self.compute_units += compute_units
+        self.accounts = accounts
+        self.signers = signers
+        self.instructions_size = instructions_size
+        return True
+
+
+def pack_instructions(
+    instructions: list[TransactionInstruction],
+    fee_payer: PublicKey,
+    compute_units: list[int] = None,
+    compute_unit_price: int = DEFAULT_COMPUTE_UNIT_PRICE,
+):
+    """
+    Packs instructions into as few transactions as possible
+
+    Instructions keep their order: each transaction is filled with the next instructions until one does not fit,
+    i.e. until the transaction would exceed MAX_TRANSACTION_SIZE bytes, lock more than MAX_TRANSACTION_ACCOUNT_LOCKS accounts
+    or use more than MAX_TRANSACTION_COMPUTE_UNITS compute units.
+    Each transaction starts with a set_compute_unit_limit_ixn for the compute units of its instructions and a set_compute_unit_price_ixn.
+
+    Args:
+        instructions (list[TransactionInstruction]): Instructions to pack (e.g., from make_place_order_instruction)
+        fee_payer (PublicKey): Public key paying the transaction fees
+        compute_units (list[int], optional): Compute units of each instruction. Defaults to DEFAULT_INSTRUCTION_COMPUTE_UNITS per instruction.
+        compute_unit_price (int, optional): Compute unit price in micro lamports, None not to set one. Defaults to DEFAULT_COMPUTE_UNIT_PRICE.
+
+    Raises:
+        Exception: Instruction too large to fit in a transaction
+
+    Returns:
+        list[list[TransactionInstruction]]: Instructions of each transaction, compute budget instructions included
+    """
+    if(compute_units is None):
+        compute_units = [DEFAULT_INSTRUCTION_COMPUTE_UNITS] * len(instructions)
+
+    transactions: list[_PackedTransaction] = []
+    for ix, units in zip(instructions, compute_units):
+        units = min(units, MAX_TRANSACTION_COMPUTE_UNITS)
+        if(not transactions or not transactions[-1].add(ix, units)):
+            transactions.append(_PackedTransaction(fee_payer, compute_unit_price))
+            transactions[-1].add(ix, units)
+
+    packed = []
+    for tx in transactions:
+        budget_ixs = [set_compute_unit_limit_ixn(units=tx.compute_units)]
+        if(compute_unit_price is not None):
+            budget_ixs.append(set_compute_unit_price_ixn(micro_lamports=compute_unit_price))
+        packed.append(budget_ixs + tx.instructions)
+    return packed
+
+
+def _shortvec_length(n: int):
+    length = 1
+    while n >= 0x80:
+        n >>= 7
+        length += 1
+    return length
+
+def _instruction_size(number_of_keys: int, data_length: int):
+    # Program index, account indices and data
+    return 1 + _shortvec_length(number_of_keys) + number_of_keys + _shortvec_length(data_length) + data_length
+
+def _transaction_size(number_of_signers: int, number_of_accounts: int, number_of_instructions: int, instructions_size: int):
+    # Signatures, message header, account keys, recent blockhash and instructions
+    return (
+        _shortvec_length(number_of_signers) + 64 * number_of_signers
+        + 3
+        + _shortvec_length(number_of_accounts) + 32 * number_of_accounts
+        + 32
+        + _shortvec_length(number_of_instructions) + instructions_size
+    )
@@ -2,8 +2,9 @@ from asyncio import gather
 from .aver_client import AverClient
 from solana.publickey import PublicKey
 from .data_classes import UserHostLifetimeState
+from .pda_cache import find_program_address
 from .constants import AVER_HOST_ACCOUNT, AVER_PROGRAM_IDS
-from .utils import get_version_of_account_type_in_program, load_multiple_bytes_data, parse_with_version, sign_and_send_transaction_instructions
+from .utils import FetchPlan, get_version_of_account_type_in_program, parse_with_version, sign_and_send_transaction_instructions
 from solana.system_program import SYS_PROGRAM_ID
 from solana.rpc.commitment import Finalized
 from anchorpy import Context
@@ -72,14 +73,20 @@ class UserHostLifetime():
         Returns:
             list[UserHostLifetime]: List of UserHostLifetime objects
         """
-        res = await load_multiple_bytes_data(aver_client.connection, pubkeys, [], False)
+        # Each UserHostLifetime is fetched and decoded once, even if it is shared by many UserMarkets
+        plan = FetchPlan()
+        group = plan.add(pubkeys)
+        await plan.load(aver_client.connection)
+        res = plan.get(group)
         programs = await gather(*[aver_client.get_program_from_program_id(PublicKey(r['owner'])) for r in res])
-        uhls: list[UserHostLifetime] = []
+        uhls_by_position: dict[int, UserHostLifetime] = {}
         for i, pubkey in enumerate(pubkeys):
-            state = parse_with_version(programs[i], AccountTypes.USER_HOST_LIFETIME, res[i]['data'])
-            program = programs[i]
-            uhls.append(UserHostLifetime(aver_client, pubkey, state, program.program_id))
-        return uhls
+            position = group.indices[i]
+            if(position not in uhls_by_position):
+                state = parse_with_version(programs[i], AccountTypes.USER_HOST_LIFETIME, res[i]['data'])
+                program = programs[i]
+                uhls_by_position[position] = UserHostLifetime(aver_client, pubkey, state, program.program_id)
+        return [uhls_by_position[position] for position in group.indices]
 
     @staticmethod
     async def get_or_create_user_host_lifetime(
@@ -264,7 +271,7 @@ class UserHostLifetime():
         Returns:
             PublicKey: Public key of UserHostLifetime account
         """
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('user-host-lifetime', 'utf-8'), bytes(owner), bytes(host)],
             program_id
         )
@@ -2,23 +2,29 @@ from copy import deepcopy
 from pydash import chunk
 from .market import AverMarket
 from solana.publickey import PublicKey
-from asyncio import gather
+from asyncio import Task, create_task, gather, shield
 from .checks import *
-from solana.transaction import AccountMeta
+from solana.transaction import AccountMeta, TransactionInstruction
 from solana.keypair import Keypair
 from .version_checks import check_if_instruction_is_out_of_date_with_idl
 from solana.system_program import SYS_PROGRAM_ID
 from spl.token.constants import TOKEN_PROGRAM_ID
 from anchorpy import Context, Program
 from .user_host_lifetime import UserHostLifetime
+from .pda_cache import find_program_address
+from .errors import is_stale_state_error
+from .instruction_encoders import InstructionTemplate, compile_instruction
+from .transaction_packer import pack_instructions
 from .aver_client import AverClient
+from .parallel_decoding import decode_accounts
 from .utils import get_version_of_account_type_in_program, load_multiple_bytes_data, sign_and_send_transaction_instructions, load_multiple_account_states, parse_user_market_state
 from solana.rpc.types import TxOpts
 from solana.rpc.commitment import Confirmed
-from .data_classes import UserHostLifetimeState, UserMarketState, UserBalanceState
-from .constants import AVER_HOST_ACCOUNT, AVER_PROGRAM_IDS, CANCEL_ALL_ORDERS_INSTRUCTION_CHUNK_SIZE
+from .data_classes import Price, QuoteChange, UserHostLifetimeState, UserMarketState, UserBalanceState
+from .constants import AVER_HOST_ACCOUNT, AVER_PROGRAM_IDS, CANCEL_ALL_ORDERS_INSTRUCTION_CHUNK_SIZE, DEFAULT_COMPUTE_UNIT_PRICE, PENDING_QUOTE_CHANGE_LIFETIME
 from .enums import AccountTypes, OrderType, SelfTradeBehavior, Side, SizeFormat
 import math
+import time
 
 class UserMarket():
     """
@@ -49,6 +55,10 @@ class UserMarket():
     """
     UserHostLifetime object
     """
+    is_warm: bool
+    """
+    Whether account versions, the quote token ATA and IDL compatibility were resolved once by warm_up() and are reused by every order
+    """
 
 
     def __init__(self, aver_client: AverClient, pubkey: PublicKey, user_market_state: UserMarketState, market: AverMarket, user_balance_state: UserBalanceState, user_host_lifetime: UserHostLifetime):
@@ -70,6 +80,13 @@ class UserMarket():
         self.user_balance_state = user_balance_state
         self.user_host_lifetime = user_host_lifetime
         self.program_id = market.program_id
+        self.is_warm = False
+        self._stay_warm = False
+        self._quote_token_ata: PublicKey = None
+        self._warming: Task = None
+        self._instruction_templates: dict = {}
+        # Changes sent by replace_quotes() which may not show in user_market_state and the slabs yet
+        self._pending_quote_changes: list = []
 
     @staticmethod
     async def load(
@@ -125,9 +142,14 @@ class UserMarket():
             for i, m in enumerate(markets):
                 program_id = m.program_id
                 umas.append(UserMarket.derive_pubkey_and_bump(owners[i], m.market_pubkey, host, program_id)[0])
+            # Owners usually trade many markets of the same program, derive each UserHostLifetime once
+            uhls_by_owner_and_program = {}
             uhls = []
             for i, o in enumerate(owners):
-                uhls.append(UserHostLifetime.derive_pubkey_and_bump(o, host, markets[i].program_id)[0])
+                key = (bytes(o), bytes(markets[i].program_id))
+                if(key not in uhls_by_owner_and_program):
+                    uhls_by_owner_and_program[key] = UserHostLifetime.derive_pubkey_and_bump(o, host, markets[i].program_id)[0]
+                uhls.append(uhls_by_owner_and_program[key])
             return await UserMarket.load_multiple_by_uma(aver_client, umas, markets, uhls)
 
     @staticmethod
@@ -180,7 +202,7 @@ class UserMarket():
         """
         account_buffers = await load_multiple_bytes_data(aver_client.connection, pubkeys, [], True)
         programs = await gather(*[aver_client.get_program_from_program_id(m.program_id) for m in markets])
-        res: list[UserMarketState] = UserMarket.parse_multiple_user_market_state(account_buffers, aver_client, programs)
+        res: list[UserMarketState] = await decode_accounts(programs, AccountTypes.USER_MARKET, account_buffers, pubkeys, aver_client.decode_cache, aver_client.decode_executor)
         uhls = await UserHostLifetime.load_multiple(aver_client, uhls)
 
         user_pubkeys = [u.user for u in res]
@@ -236,6 +258,8 @@ class UserMarket():
         """
         Parses raw onchain data to UserMarketState objects    
 
+        Decodes on the event loop, see parallel_decoding.decode_accounts() to decode in AverClient.decode_executor
+
         Args:
             buffer (list[bytes]): List of raw bytes coming from onchain
             aver_client (AverMarket): AverClient object
@@ -265,7 +289,7 @@ class UserMarket():
             PublicKey: UserMarket account public key
         """
 
-        return PublicKey.find_program_address(
+        return find_program_address(
             [bytes('user-market', 'utf-8'), bytes(owner), bytes(market), bytes(host)],
             program_id
         )    
@@ -505,9 +529,8 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
 
-        program = await self.aver_client.get_program_from_program_id(program_id)
-
         if(active_pre_flight_check):
+            program = await self.aver_client.get_program_from_program_id(program_id)
             check_if_instruction_is_out_of_date_with_idl('place_order', program)
             check_sufficient_lamport_balance(self.user_balance_state)
             check_correct_uma_market_match(self.user_market_state, self.market)
@@ -529,19 +552,14 @@ class UserMarket():
 
         is_binary_market_second_outcome = self.market.market_state.number_of_outcomes == 2 and outcome_id == 1
         orderbook_account_index = outcome_id if not is_binary_market_second_outcome else 0
-        orderbook_account = self.market.market_store_state.orderbook_accounts[orderbook_account_index]
-
-        if self.market.market_state.in_play_queue == None or self.market.market_state.in_play_queue == SYS_PROGRAM_ID:
-            in_play_queue = Keypair().public_key
-        else:
-            in_play_queue = self.market.market_state.in_play_queue
 
         #Logic to return correct instruction based on ProgramID
         if(program_id.to_base58() == ''):
             #return program.instruction()...
             return ''
-        else:        
-            return program.instruction['place_order'](
+        else:
+            template = await self.__get_instruction_template('place_order', orderbook_account_index, user_quote_token_ata, program_id)
+            return template.build(
                 {
                     "limit_price": limit_price_u64,
                     "size": max_base_qty,
@@ -550,27 +568,7 @@ class UserMarket():
                     "order_type": order_type,
                     "self_trade_behavior": self_trade_behavior,
                     "outcome_id": outcome_id,
-                },
-                ctx=Context(
-                    accounts={
-                        "user": self.user_market_state.user,
-                        "user_host_lifetime": self.user_market_state.user_host_lifetime,
-                        "market": self.market.market_pubkey,
-                        "market_store": self.market.market_state.market_store,
-                        "user_market": self.pubkey,
-                        "user": self.user_market_state.user,
-                        "user_quote_token_ata": user_quote_token_ata,
-                        "quote_vault": self.market.market_state.quote_vault,
-                        "vault_authority": self.market.market_state.vault_authority,
-                        "orderbook": orderbook_account.orderbook,
-                        "bids": orderbook_account.bids,
-                        "asks": orderbook_account.asks,
-                        "event_queue": orderbook_account.event_queue,
-                        "in_play_queue": in_play_queue,
-                        "spl_token_program": TOKEN_PROGRAM_ID,
-                        "system_program": SYS_PROGRAM_ID,
-                        "vault_authority": self.market.market_state.vault_authority
-                },)
+                }
             )
 
     async def place_order(
@@ -617,13 +615,9 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
         
-        await self.update_all_accounts_if_required(owner)
+        await self.__update_all_accounts_if_not_warm(owner)
 
-        user_quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
-            self.user_market_state.user,
-            self.market.aver_client.owner,
-            self.market.market_state.quote_token_mint
-        )
+        user_quote_token_ata = await self.__get_quote_token_ata()
 
         ix = await self.make_place_order_instruction(
             outcome_id,
@@ -637,13 +631,7 @@ class UserMarket():
             active_pre_flight_check,
             program_id
         )
-        return await sign_and_send_transaction_instructions(
-            self.aver_client,
-            [],
-            owner,
-            [ix],
-            send_options
-        )
+        return await self.__send_order_instructions(owner, [ix], send_options)
 
     async def make_cancel_order_instruction(
             self,
@@ -678,32 +666,21 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
 
-        program = await self.aver_client.get_program_from_program_id(program_id)
-
         # find the corresponding order id incase they pass in aaob order in by accident
         order_from_aaob_id = self.get_order_from_aaob_order_id(order_id)
         order_id = order_from_aaob_id.order_id if order_from_aaob_id else order_id
 
         if(active_pre_flight_check):
+            program = await self.aver_client.get_program_from_program_id(program_id)
             check_if_instruction_is_out_of_date_with_idl('cancel_order', program)
             check_sufficient_lamport_balance(self.user_balance_state)
             check_cancel_order_market_status(self.market.market_state.market_status)
             check_order_exists(self.user_market_state, order_id)
 
-        user_quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
-            self.user_market_state.user,
-            self.market.aver_client.owner,
-            self.market.market_state.quote_token_mint
-        )
+        user_quote_token_ata = await self.__get_quote_token_ata()
       
         is_binary_market_second_outcome = self.market.market_state.number_of_outcomes == 2 and outcome_id == 1
         orderbook_account_index = outcome_id if not is_binary_market_second_outcome else 0
-        orderbook_account = self.market.market_store_state.orderbook_accounts[orderbook_account_index]
-
-        if self.market.market_state.in_play_queue == None or self.market.market_state.in_play_queue == SYS_PROGRAM_ID:
-            in_play_queue = Keypair().public_key
-        else:
-            in_play_queue = self.market.market_state.in_play_queue
 
         if self.user_market_state.version == 0:
             aaob_order_id = order_id
@@ -717,27 +694,13 @@ class UserMarket():
             #return program.instruction()...
             return ''
         else:
-            return program.instruction['cancel_order'](
+            template = await self.__get_instruction_template('cancel_order', orderbook_account_index, user_quote_token_ata, program_id)
+            return template.build(
                 {
                     "order_id": order_id, 
                     "outcome_id": orderbook_account_index,
                     "aaob_order_id": aaob_order_id
-                },
-                ctx=Context(accounts={
-                    "orderbook": orderbook_account.orderbook,
-                    "event_queue": orderbook_account.event_queue,
-                    "bids": orderbook_account.bids,
-                    "asks": orderbook_account.asks,
-                    "market": self.market.market_pubkey,
-                    "user_market": self.pubkey,
-                    "user": self.user_market_state.user,
-                    "market_store": self.market.market_state.market_store,
-                    "user_quote_token_ata": user_quote_token_ata,
-                    "quote_vault": self.market.market_state.quote_vault,
-                    "vault_authority": self.market.market_state.vault_authority,
-                    "spl_token_program": TOKEN_PROGRAM_ID,
-                    "in_play_queue": in_play_queue
-                })
+                }
             )
         
     async def cancel_order(
@@ -772,7 +735,7 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
         
-        sig = await self.update_all_accounts_if_required(fee_payer)
+        sig = await self.__update_all_accounts_if_not_warm(fee_payer)
         #await self.market.aver_client.connection.confirm_transaction(sig['result'], Finalized)
 
         ix = await self.make_cancel_order_instruction(
@@ -782,13 +745,7 @@ class UserMarket():
             program_id
         )
 
-        return await sign_and_send_transaction_instructions(
-            self.aver_client,
-            [],
-            fee_payer,
-            [ix],
-            send_options
-        )
+        return await self.__send_order_instructions(fee_payer, [ix], send_options)
 
     async def make_cancel_all_orders_instruction(
         self, 
@@ -822,20 +779,15 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
 
-        program = await self.aver_client.get_program_from_program_id(program_id)
-
         if(active_pre_flight_check):
+            program = await self.aver_client.get_program_from_program_id(program_id)
             check_if_instruction_is_out_of_date_with_idl('cancel_all_orders', program)
             check_sufficient_lamport_balance(self.user_balance_state)
             check_cancel_order_market_status(self.market.market_state.market_status)
             for outcome_id in outcome_ids_to_cancel:
                 check_outcome_has_orders(outcome_id, self.user_market_state)
 
-        user_quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
-            self.user_market_state.user,
-            self.market.aver_client.owner,
-            self.market.market_state.quote_token_mint
-        )
+        user_quote_token_ata = await self.__get_quote_token_ata()
 
         remaining_accounts: list[AccountMeta] = []
         for i, accounts in enumerate(self.market.market_store_state.orderbook_accounts):
@@ -868,11 +820,6 @@ class UserMarket():
 
         ixs = []
 
-        if self.market.market_state.in_play_queue == None or self.market.market_state.in_play_queue == SYS_PROGRAM_ID:
-            in_play_queue = Keypair().public_key
-        else:
-            in_play_queue = self.market.market_state.in_play_queue
-
         for i, outcome_ids in enumerate(chunked_outcome_ids):
             #Logic to return correct instruction based on ProgramID
             ix = None
@@ -880,23 +827,8 @@ class UserMarket():
                 #ix = program.instruction()...
                 pass
             else:
-                ix = program.instruction['cancel_all_orders'](
-                    outcome_ids,
-                    ctx=Context(
-                        accounts={
-                                "user_market": self.pubkey,
-                                "market": self.market.market_pubkey,
-                                "user": self.user_market_state.user,
-                                "market_store": self.market.market_state.market_store,
-                                "user_quote_token_ata": user_quote_token_ata,
-                                "quote_vault": self.market.market_state.quote_vault,
-                                "vault_authority": self.market.market_state.vault_authority,
-                                "spl_token_program": TOKEN_PROGRAM_ID,
-                                "in_play_queue": in_play_queue
-                            },
-                        remaining_accounts = chunked_remaining_accounts[i],
-                        )
-                    )
+                template = await self.__get_instruction_template('cancel_all_orders', None, user_quote_token_ata, program_id)
+                ix = template.build(outcome_ids, remaining_accounts=chunked_remaining_accounts[i])
             ixs.append(ix)
 
         return ixs
@@ -908,11 +840,12 @@ class UserMarket():
         send_options: TxOpts = None,
         active_pre_flight_check: bool = True,
         program_id: PublicKey = None,
+        compute_unit_price: int = DEFAULT_COMPUTE_UNIT_PRICE,
     ):
         """
         Cancels all orders on particular outcome_ids (not by order_id)
 
-        Sends instructions on chain
+        Sends instructions on chain, packed into as few transactions as possible (see send_packed_instructions())
 
         Args:
             fee_payer (Keypair): Keypair to pay fee for transaction. Defaults to AverClient wallet
@@ -920,9 +853,10 @@ class UserMarket():
             send_options (TxOpts, optional): Options to specify when broadcasting a transaction. Defaults to None.
             active_pre_flight_check (bool, optional): Clientside check if order will success or fail. Defaults to True.
             program_id (PublicKey, optional): Program public key. Defaults to Market Program ID.
+            compute_unit_price (int, optional): Compute unit price in micro lamports, None not to set one. Defaults to DEFAULT_COMPUTE_UNIT_PRICE.
 
         Returns:
-            RPCResponse: Response
+            list[RPCResponse]: Response of each transaction
         """
         if(fee_payer is None):
             fee_payer = self.aver_client.owner
@@ -930,21 +864,220 @@ class UserMarket():
         if(program_id is None):
             program_id = self.market.program_id
 
-        sig = await self.update_all_accounts_if_required(fee_payer)
+        sig = await self.__update_all_accounts_if_not_warm(fee_payer)
         #await self.market.aver_client.connection.confirm_transaction(sig['result'], Finalized)
 
         ixs = await self.make_cancel_all_orders_instruction(outcome_ids_to_cancel, active_pre_flight_check, program_id)
 
-        sigs = await gather(
-            *[sign_and_send_transaction_instructions(
-                self.aver_client,
-                [],
-                fee_payer,
-                [ix],
-                send_options
-            ) for ix in ixs]
-            )
-        return sigs
+        return await self.send_packed_instructions(ixs, fee_payer, send_options, compute_unit_price=compute_unit_price)
+
+    async def send_packed_instructions(
+        self,
+        ixs: list[TransactionInstruction],
+        fee_payer: Keypair = None,
+        send_options: TxOpts = None,
+        compute_units: list[int] = None,
+        compute_unit_price: int = DEFAULT_COMPUTE_UNIT_PRICE,
+    ):
+        """
+        Sends instructions (e.g., from make_place_order_instruction and make_cancel_order_instruction) packed into as few transactions as possible
+
+        Instructions keep their order within each transaction, but the transactions are sent concurrently and may land in any order.
+        Each transaction sets its compute unit limit and price, see pack_instructions().
+
+        Args:
+            ixs (list[TransactionInstruction]): Instructions to send
+            fee_payer (Keypair, optional): Keypair to pay fee for transactions. Defaults to AverClient wallet
+            send_options (TxOpts, optional): Options to specify when broadcasting a transaction. Defaults to None.
+            compute_units (list[int], optional): Compute units of each instruction. Defaults to DEFAULT_INSTRUCTION_COMPUTE_UNITS per instruction.
+            compute_unit_price (int, optional): Compute unit price in micro lamports, None not to set one. Defaults to DEFAULT_COMPUTE_UNIT_PRICE.
+
+        Returns:
+            list[RPCResponse]: Response of each transaction
+        """
+        if(fee_payer is None):
+            fee_payer = self.aver_client.owner
+
+        packed = pack_instructions(ixs, fee_payer.public_key, compute_units, compute_unit_price)
+        return await gather(*[self.__send_order_instructions(fee_payer, tx_ixs, send_options) for tx_ixs in packed])
+
+    def diff_quotes(self, desired_ladder: dict[int, dict[Side, list[Price]]]):
+        """
+        Works out the fewest cancels and new orders moving the user's resting orders to the desired quotes
+
+        Resting orders are read from user_market_state.orders and priced from the orderbook slabs. On each quoted side, at each price:
+        - a level at the desired size is left untouched, keeping its queue priority
+        - a level below the desired size gets a new order for the difference
+        - a level above the desired size has its latest orders cancelled until it is not, then a new order for any difference
+        - orders at prices which are not desired are cancelled
+
+        Sides missing from desired_ladder are left untouched, an empty list cancels every order on the side.
+        In binary markets both outcomes share one orderbook: quotes on the second outcome are matched as the opposite side of the first outcome at the inverted price.
+
+        Changes sent by replace_quotes() are taken into account until both the UserMarket and the slab of their side have been refreshed,
+        or until PENDING_QUOTE_CHANGE_LIFETIME seconds after they were sent (when their transaction can no longer land).
+
+        Args:
+            desired_ladder (dict[int, dict[Side, list[Price]]]): Desired quotes by outcome and side. Prices are probabilities and sizes are payouts (as in Orderbook L2 Price objects).
+
+        Raises:
+            Exception: Cannot quote on closed market
+
+        Returns:
+            list[QuoteChange]: All cancels, then all new orders, level by level
+        """
+        if(self.market.orderbooks is None):
+            raise Exception('Cannot quote on closed market')
+
+        exp = 10 ** self.market.market_state.decimals
+        self._pending_quote_changes = [p for p in self._pending_quote_changes if not self.__is_pending_quote_change_expired(*p)]
+        pending_sizes = {}
+        pending_cancels = set()
+        for change, (book, side, price), _, _ in self._pending_quote_changes:
+            if(change.order is not None):
+                pending_cancels.add(change.order.order_id)
+            else:
+                sizes = pending_sizes.setdefault((book, side), {})
+                sizes[price] = sizes.get(price, 0) + change.size
+
+        # Desired size at each price of each side of each orderbook, with the quote a new order is placed as
+        desired = {}
+        for outcome_id, sides in desired_ladder.items():
+            for side, levels in sides.items():
+                book, book_side, _ = self.__get_quote_level(outcome_id, Side(side), 0)
+                book_levels = desired.setdefault((book, book_side), {})
+                for level in levels:
+                    price = round(level.price * exp)
+                    size = round(level.size * exp)
+                    book_price = self.__get_quote_level(outcome_id, Side(side), price)[2]
+                    if(book_price in book_levels):
+                        book_levels[book_price][0] += size
+                    else:
+                        book_levels[book_price] = [size, outcome_id, Side(side), price]
+
+        resting = {}
+        for order in self.user_market_state.orders:
+            book = self.__get_orderbook_account_index(order.outcome_id)
+            if(order.order_id in pending_cancels or ((book, Side.BUY) not in desired and (book, Side.SELL) not in desired)):
+                continue
+            order_id = order.aaob_order_id if order.aaob_order_id else order.order_id
+            for side in [Side.BUY, Side.SELL]:
+                node = self.__get_slab(book, side).get(order_id, True)
+                if(node is not None):
+                    price = round(((node.key >> 64) / 2 ** 32) * exp)
+                    resting.setdefault((book, side), {}).setdefault(price, []).append((order, node.base_quantity))
+                    break
+
+        # Cancels come first so a new order never trades against the user's own orders it replaces (e.g., bids moved above a resting ask)
+        cancels = []
+        new_orders = []
+        for (book, side), levels in desired.items():
+            orders_by_price = resting.get((book, side), {})
+            pending = pending_sizes.get((book, side), {})
+            for price in sorted(set(levels) | set(orders_by_price)):
+                desired_size, outcome_id, quote_side, quote_price = levels.get(price, [0, book, side, price])
+                orders = sorted(orders_by_price.get(price, []), key=lambda o: o[0].order_id, reverse=True)
+                current = sum(size for _, size in orders) + pending.get(price, 0)
+                for order, size in orders:
+                    if(current <= desired_size):
+                        break
+                    # Reported as the order was placed (the orderbook mapping of the second outcome of a binary market is its own inverse)
+                    cancels.append(QuoteChange(order.outcome_id, *self.__get_quote_level(order.outcome_id, side, price)[1:], size, order))
+                    current -= size
+                if(desired_size > current):
+                    new_orders.append(QuoteChange(outcome_id, quote_side, quote_price, desired_size - current))
+        return cancels + new_orders
+
+    async def replace_quotes(
+        self,
+        desired_ladder: dict[int, dict[Side, list[Price]]],
+        fee_payer: Keypair = None,
+        send_options: TxOpts = None,
+        order_type: OrderType = OrderType.LIMIT,
+        self_trade_behavior: SelfTradeBehavior = SelfTradeBehavior.CANCEL_PROVIDE,
+        compute_unit_price: int = DEFAULT_COMPUTE_UNIT_PRICE,
+    ):
+        """
+        Moves the user's resting orders to the desired quotes with the fewest cancels and new orders (see diff_quotes())
+
+        The cancels, then the new orders, are packed into as few transactions as possible (see pack_instructions()).
+        Cancels and new orders packed into the same transaction are atomic. Transactions carrying cancels are sent first, and the transactions
+        only placing new orders are sent once those are confirmed, so a new order never trades against or stacks on an order it replaces.
+        If a transaction carrying cancels fails, no new order is sent.
+        Once a transaction is sent, later calls consider its cancelled orders gone and its new orders resting, until the UserMarket
+        and the slabs have been refreshed (see diff_quotes()). user_market_state itself is never modified.
+
+        No pre-flight checks are run. Call warm_up() first so quoting only builds, signs and sends transactions.
+
+        Args:
+            desired_ladder (dict[int, dict[Side, list[Price]]]): Desired quotes by outcome and side. Prices are probabilities and sizes are payouts (as in Orderbook L2 Price objects).
+            fee_payer (Keypair, optional): Keypair to pay fee for transactions. Defaults to AverClient wallet
+            send_options (TxOpts, optional): Options to specify when broadcasting a transaction. Defaults to None.
+            order_type (OrderType, optional): OrderType of new orders. Defaults to OrderType.LIMIT.
+            self_trade_behavior (SelfTradeBehavior, optional): SelfTradeBehavior of new orders. Defaults to SelfTradeBehavior.CANCEL_PROVIDE.
+            compute_unit_price (int, optional): Compute unit price in micro lamports, None not to set one. Defaults to DEFAULT_COMPUTE_UNIT_PRICE.
+
+        Raises:
+            Exception: Cannot quote on closed market
+            Exception: The first error raised sending or confirming a transaction, once the other transactions are sent
+            Exception: Cancels could not be sent, new orders were not sent
+
+        Returns:
+            list[RPCResponse]: Response of each transaction sent (empty if the quotes are already as desired)
+        """
+        if(fee_payer is None):
+            fee_payer = self.aver_client.owner
+
+        await self.__update_all_accounts_if_not_warm(fee_payer)
+
+        changes = self.diff_quotes(desired_ladder)
+        if(len(changes) == 0):
+            return []
+        # Refreshes of the UserMarket or the slabs from here on may not show the changes yet
+        sent_at = time.monotonic()
+        sources = {(book, side): (self.user_market_state, self.__get_slab(book, side)) for book in range(len(self.market.orderbooks)) for side in Side}
+
+        user_quote_token_ata = await self.__get_quote_token_ata()
+        ixs = []
+        for change in changes:
+            if(change.order is not None):
+                ixs.append(await self.make_cancel_order_instruction(change.order.order_id, change.order.outcome_id, False, self.program_id))
+            else:
+                template = await self.__get_instruction_template('place_order', self.__get_orderbook_account_index(change.outcome_id), user_quote_token_ata, self.program_id)
+                ixs.append(template.build({
+                    "limit_price": change.limit_price,
+                    "size": change.size,
+                    "size_format": SizeFormat.PAYOUT,
+                    "side": change.side,
+                    "order_type": order_type,
+                    "self_trade_behavior": self_trade_behavior,
+                    "outcome_id": change.outcome_id,
+                }))
+
+        changes_by_ix = {id(ix): change for ix, change in zip(ixs, changes)}
+        packed = pack_instructions(ixs, fee_payer.public_key, compute_unit_price=compute_unit_price)
+        # Cancels come first, so the transactions carrying cancels are the first ones
+        with_cancels = [tx_ixs for tx_ixs in packed if any(id(ix) in changes_by_ix and changes_by_ix[id(ix)].order is not None for ix in tx_ixs)]
+        places_only = packed[len(with_cancels):]
+        responses = await gather(*[self.__send_order_instructions(fee_payer, tx_ixs, send_options) for tx_ixs in with_cancels], return_exceptions=True)
+        if(len(places_only) > 0):
+            # Transactions sent concurrently may land in any order, new orders wait for the cancels to land
+            responses = await gather(*[self.__confirm_quote_transaction(r) for r in responses], return_exceptions=True)
+            if(all(r is not None and not isinstance(r, BaseException) for r in responses)):
+                responses += await gather(*[self.__send_order_instructions(fee_payer, tx_ixs, send_options) for tx_ixs in places_only], return_exceptions=True)
+        for tx_ixs, response in zip(packed, responses):
+            if(response is None or isinstance(response, BaseException)):
+                continue
+            for ix in tx_ixs:
+                if(id(ix) in changes_by_ix):
+                    self.__add_pending_quote_change(changes_by_ix[id(ix)], sources, sent_at)
+
+        errors = [r for r in responses if isinstance(r, BaseException)]
+        if(len(errors) > 0):
+            raise errors[0]
+        if(len(responses) < len(packed)):
+            raise Exception('Cancels could not be sent, new orders were not sent')
+        return responses
 
     async def make_withdraw_idle_funds_instruction(
         self,
@@ -1016,11 +1149,7 @@ class UserMarket():
         sig = await self.update_all_accounts_if_required(owner)
         #await self.market.aver_client.connection.confirm_transaction(sig['result'], Finalized)
 
-        user_quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
-            self.user_market_state.user,
-            self.market.aver_client.owner,
-            self.market.market_state.quote_token_mint
-        )
+        user_quote_token_ata = await self.__get_quote_token_ata()
 
         if(program_id is None):
             program_id = self.market.program_id
@@ -1060,11 +1189,7 @@ class UserMarket():
         
         program = await self.aver_client.get_program_from_program_id(program_id)
 
-        user_quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
-            self.user_market_state.user,
-            self.market.aver_client.owner,
-            self.market.market_state.quote_token_mint
-        )
+        user_quote_token_ata = await self.__get_quote_token_ata()
 
         check_if_instruction_is_out_of_date_with_idl('cancel_all_orders', program)
 
@@ -1331,6 +1456,150 @@ class UserMarket():
 
     
 
+    async def warm_up(self, fee_payer: Keypair = None, send_options: TxOpts = None):
+        """
+        Resolves once what every order otherwise checks: account versions (updating accounts if required), the quote token ATA
+        (creating it if required) and the compatibility of the order instructions with the IDL.
+
+        Afterwards, placing and cancelling orders only builds, signs and sends the transaction. When sending an order fails with an error
+        pointing to stale accounts or instructions (see is_stale_state_error()), the cached results are dropped and the next order resolves them again.
+        Use cool_down() to stop caching them.
+
+        Args:
+            fee_payer (Keypair, optional): Pays transaction fees of account updates. Defaults to AverClient wallet
+            send_options (TxOpts, optional): Options to specify when broadcasting account updates. Defaults to None.
+        """
+        self.is_warm = False
+        self._stay_warm = True
+        await self.update_all_accounts_if_required(fee_payer, send_options)
+        self._quote_token_ata = await self.market.aver_client.get_or_create_associated_token_account(
+            self.user_market_state.user,
+            self.market.aver_client.owner,
+            self.market.market_state.quote_token_mint
+        )
+        program = await self.aver_client.get_program_from_program_id(self.program_id)
+        for instruction in ['place_order', 'cancel_order', 'cancel_all_orders']:
+            check_if_instruction_is_out_of_date_with_idl(instruction, program)
+        self.is_warm = True
+
+    def cool_down(self):
+        """
+        Drops the results cached by warm_up(), every order checks account versions and the quote token ATA again
+        """
+        self._stay_warm = False
+        self.__invalidate()
+
+    def __invalidate(self):
+        self.is_warm = False
+        self._quote_token_ata = None
+
+    async def __update_all_accounts_if_not_warm(self, fee_payer: Keypair):
+        if(self.is_warm):
+            return True
+        if(self._stay_warm):
+            # Concurrent orders share a single warm up
+            if(self._warming is None or self._warming.done()):
+                self._warming = create_task(self.warm_up(fee_payer))
+            await shield(self._warming)
+            return True
+        return await self.update_all_accounts_if_required(fee_payer)
+
+    async def __get_quote_token_ata(self):
+        if(self.is_warm and self._quote_token_ata is not None):
+            return self._quote_token_ata
+        return await self.market.aver_client.get_or_create_associated_token_account(
+            self.user_market_state.user,
+            self.market.aver_client.owner,
+            self.market.market_state.quote_token_mint
+        )
+
+    async def __send_order_instructions(self, fee_payer: Keypair, ixs: list, send_options: TxOpts):
+        try:
+            return await sign_and_send_transaction_instructions(self.aver_client, [], fee_payer, ixs, send_options, on_error=self.__invalidate_if_stale)
+        except Exception as e:
+            self.__invalidate_if_stale(e)
+            raise
+
+    async def __confirm_quote_transaction(self, response):
+        if(response is None or isinstance(response, BaseException)):
+            return response
+        status = await self.aver_client.provider.connection.confirm_transaction(response['result'], commitment=Confirmed)
+        err = status['result']['value'][0]['err']
+        if(err is not None):
+            raise Exception(f'Transaction {response["result"]} failed: {err}')
+        return response
+
+    def __invalidate_if_stale(self, e: Exception):
+        # Only errors from a stale cached result (e.g., an account upgraded or closed since warm_up) resolve them again,
+        # orders rejected by the program or failed requests keep the UserMarket warm
+        if(is_stale_state_error(e)):
+            self.__invalidate()
+
+    async def __get_instruction_template(self, name: str, orderbook_account_index: int, user_quote_token_ata: PublicKey, program_id: PublicKey) -> InstructionTemplate:
+        # Templates are compiled once per instruction and orderbook, and again whenever the accounts they were compiled from change
+        sources = (self.market.market_state, self.market.market_store_state, self.user_market_state, user_quote_token_ata, program_id)
+        cached = self._instruction_templates.get((name, orderbook_account_index))
+        if(cached is not None and all(a is b for a, b in zip(cached[0][:3], sources[:3])) and cached[0][3:] == sources[3:]):
+            return cached[1]
+        program = await self.aver_client.get_program_from_program_id(program_id)
+        template = compile_instruction(program, name, self.__get_order_instruction_accounts(name, orderbook_account_index, user_quote_token_ata))
+        self._instruction_templates[(name, orderbook_account_index)] = (sources, template)
+        return template
+
+    def __get_order_instruction_accounts(self, name: str, orderbook_account_index: int, user_quote_token_ata: PublicKey):
+        if self.market.market_state.in_play_queue == None or self.market.market_state.in_play_queue == SYS_PROGRAM_ID:
+            in_play_queue = Keypair().public_key
+        else:
+            in_play_queue = self.market.market_state.in_play_queue
+
+        accounts = {
+            "user": self.user_market_state.user,
+            "user_market": self.pubkey,
+            "user_quote_token_ata": user_quote_token_ata,
+            "market": self.market.market_pubkey,
+            "market_store": self.market.market_state.market_store,
+            "quote_vault": self.market.market_state.quote_vault,
+            "vault_authority": self.market.market_state.vault_authority,
+            "in_play_queue": in_play_queue,
+            "spl_token_program": TOKEN_PROGRAM_ID,
+        }
+        if(name == 'place_order'):
+            accounts["user_host_lifetime"] = self.user_market_state.user_host_lifetime
+            accounts["system_program"] = SYS_PROGRAM_ID
+        if(orderbook_account_index is not None):
+            orderbook_account = self.market.market_store_state.orderbook_accounts[orderbook_account_index]
+            accounts["orderbook"] = orderbook_account.orderbook
+            accounts["bids"] = orderbook_account.bids
+            accounts["asks"] = orderbook_account.asks
+            accounts["event_queue"] = orderbook_account.event_queue
+        return accounts
+
+    def __get_orderbook_account_index(self, outcome_id: int):
+        is_binary_market_second_outcome = self.market.market_state.number_of_outcomes == 2 and outcome_id == 1
+        return outcome_id if not is_binary_market_second_outcome else 0
+
+    def __get_quote_level(self, outcome_id: int, side: Side, limit_price: int):
+        # Orderbook, side and price of the orderbook an order rests at (orders on the second outcome of a binary market rest inverted in the first orderbook)
+        book = self.__get_orderbook_account_index(outcome_id)
+        if(book != outcome_id):
+            return book, Side(1 - side), 10 ** self.market.market_state.decimals - limit_price
+        return book, side, limit_price
+
+    def __get_slab(self, book: int, side: Side):
+        orderbook = self.market.orderbooks[book]
+        return orderbook.slab_bids if side == Side.BUY else orderbook.slab_asks
+
+    def __is_pending_quote_change_expired(self, change: QuoteChange, level: tuple, sources: tuple, sent_at: float):
+        # Decoded states are shared (see DecodeCache), an unchanged account is the same object: the time limit expires changes which never landed
+        if(time.monotonic() - sent_at > PENDING_QUOTE_CHANGE_LIFETIME):
+            return True
+        user_market_state, slab = sources
+        return self.user_market_state is not user_market_state and self.__get_slab(*level[:2]) is not slab
+
+    def __add_pending_quote_change(self, change: QuoteChange, sources: dict, sent_at: float):
+        level = self.__get_quote_level(change.outcome_id, change.side, change.limit_price)
+        self._pending_quote_changes.append((change, level, sources[level[:2]], sent_at))
+
     async def check_if_uma_latest_version(self):
         """
         Returns true if market state does not need to be updated (using update_user_market_state)
@@ -1,25 +1,31 @@
-from asyncio import gather
+from asyncio import Semaphore, gather
+from typing import Any, Callable, NamedTuple
 from anchorpy import Program
 from .aver_client import AverClient
 from spl.token.instructions import get_associated_token_address
 from spl.token._layouts import ACCOUNT_LAYOUT
 from spl.token.constants import ACCOUNT_LEN
 from .data_classes import UserBalanceState, MarketStatus
-from .constants import AVER_PROGRAM_IDS
+from .constants import AVER_PROGRAM_IDS, EXPECTED_ACCOUNT_SIZE, EXPECTED_SLAB_ACCOUNT_SIZE, MAX_CONCURRENT_ACCOUNT_REQUESTS, MULTIPLE_ACCOUNTS_CHUNK_BYTES, MULTIPLE_ACCOUNTS_CHUNK_SIZE
 from solana.publickey import PublicKey
 from .errors import parse_error
 from hashlib import sha256
 from .slab import Slab
-from .enums import AccountTypes
+from .decode_cache import DecodeCache
+from .account_decoders import get_account_decoders
+from .parallel_decoding import SLAB_KIND, decode_accounts
+from .enums import AccountTypes, PriceRoundingFormat
 from solana.keypair import Keypair
-from solana.rpc.types import RPCResponse, TxOpts
+from solana.rpc.types import DataSliceOpts, RPCResponse, TxOpts
 import base64
 from anchorpy.error import ProgramError
 from solana.publickey import PublicKey
 from solana.rpc.async_api import AsyncClient
 from solana.transaction import TransactionInstruction, Transaction
 import enum
+from bisect import bisect_left, bisect_right
 from math import ceil, floor
+import numpy as np
 
 def parse_bytes_data(res: RPCResponse) -> bytes:
     """
@@ -83,35 +89,177 @@ async def load_bytes_data(conn: AsyncClient, address: PublicKey) -> bytes:
     res = await conn.get_account_info(address)
     return parse_bytes_data(res)
 
-#This function chunks requests into max size of 100 accounts
+def chunk_accounts_by_size(
+    expected_sizes: list[int],
+    max_accounts: int = MULTIPLE_ACCOUNTS_CHUNK_SIZE,
+    max_bytes: int = MULTIPLE_ACCOUNTS_CHUNK_BYTES
+):
+    """
+    Splits accounts into consecutive chunks of at most max_accounts accounts and (unless a single account is larger) max_bytes of data
+
+    Args:
+        expected_sizes (list[int]): Expected data size of each account
+        max_accounts (int, optional): Maximum number of accounts per chunk. Defaults to MULTIPLE_ACCOUNTS_CHUNK_SIZE.
+        max_bytes (int, optional): Maximum expected data size per chunk. Defaults to MULTIPLE_ACCOUNTS_CHUNK_BYTES.
+
+    Returns:
+        list[tuple[int, int]]: Start (inclusive) and end (exclusive) index of each chunk
+    """
+    chunks = []
+    start = 0
+    chunk_bytes = 0
+    for index, size in enumerate(expected_sizes):
+        if(index > start and (index - start == max_accounts or chunk_bytes + size > max_bytes)):
+            chunks.append((start, index))
+            start = index
+            chunk_bytes = 0
+        chunk_bytes += size
+    if(start < len(expected_sizes)):
+        chunks.append((start, len(expected_sizes)))
+    return chunks
+
 async def load_multiple_bytes_data(
     conn: AsyncClient, 
     addresses_remaining: list[PublicKey], 
     loaded_data_so_far: list[bytes] = [],
-    is_only_getting_data: bool = True):
+    is_only_getting_data: bool = True,
+    expected_sizes: list[int] = None,
+    max_concurrent_requests: int = MAX_CONCURRENT_ACCOUNT_REQUESTS,
+    data_slice: DataSliceOpts = None):
     """
     Fetch account data from AsyncClient for multiple accounts
 
+    Accounts are requested in chunks (see chunk_accounts_by_size) which are sent concurrently. Results are in the same order as the addresses.
+
     Args:
         conn (AsyncClient): Solana AsyncClient object
         addresses_remaining (list[PublicKey]): Public keys of accounts to be loaded
-        loaded_data_so_far (list[bytes], optional): Parameter for recursive use of function. Defaults to [].
+        loaded_data_so_far (list[bytes], optional): Data prepended to the result (kept for backwards compatibility). Defaults to [].
         is_only_getting_data (bool, optional): Only returns account data if true; gets all information otherwise. Defaults to True.
+        expected_sizes (list[int], optional): Expected data size of each account, used to split large accounts (e.g., slabs) into smaller requests. Defaults to EXPECTED_ACCOUNT_SIZE for every account.
+        max_concurrent_requests (int, optional): Maximum number of requests in flight at once. Defaults to MAX_CONCURRENT_ACCOUNT_REQUESTS.
+        data_slice (DataSliceOpts, optional): Only loads this byte range of each account. Defaults to the whole account.
 
     Returns:
-        list[bytes]: _description_
+        list[bytes]: Data of each account (None if the account does not exist)
     """
-    if(len(addresses_remaining) == 0):
-        return loaded_data_so_far
-    
-    addresses_to_load = addresses_remaining[:100]
-    res = await conn.get_multiple_accounts(addresses_to_load)
-    return await load_multiple_bytes_data(
-        conn,
-        addresses_remaining[100:],
-        loaded_data_so_far + parse_multiple_bytes_data(res, is_only_getting_data),
-        is_only_getting_data
-    )
+    if(expected_sizes is None):
+        expected_sizes = [EXPECTED_ACCOUNT_SIZE if data_slice is None else data_slice.length] * len(addresses_remaining)
+    if(len(expected_sizes) != len(addresses_remaining)):
+        raise Exception('Number of expected sizes and addresses do not correspond')
+
+    semaphore = Semaphore(max_concurrent_requests)
+    async def load_chunk(start: int, end: int):
+        async with semaphore:
+            if(data_slice is None):
+                res = await conn.get_multiple_accounts(addresses_remaining[start:end])
+            else:
+                res = await conn.get_multiple_accounts(addresses_remaining[start:end], data_slice=data_slice)
+        return parse_multiple_bytes_data(res, is_only_getting_data)
+
+    chunks = await gather(*[load_chunk(start, end) for start, end in chunk_accounts_by_size(expected_sizes)])
+
+    loaded_data = list(loaded_data_so_far)
+    for chunk in chunks:
+        loaded_data.extend(chunk)
+    return loaded_data
+
+class FetchGroup(NamedTuple):
+    """
+    Accounts added to a FetchPlan together, returned by FetchPlan.add()
+    """
+    indices: tuple[int]
+    """
+    Position of each account in FetchPlan.pubkeys
+    """
+
+
+class FetchPlan():
+    """
+    Accounts to load together, each account being fetched once however many times (and in however many groups) it is added
+
+    Add groups of accounts with add(), load them all with load() and get the data of each group back with get().
+    """
+
+    pubkeys: list[PublicKey]
+    """
+    Unique public keys to fetch
+    """
+    expected_sizes: list[int]
+    """
+    Expected data size of each unique account (largest size it was added with)
+    """
+    requested: int
+    """
+    Number of accounts added, duplicates included
+    """
+
+    def __init__(self):
+        self.pubkeys = []
+        self.expected_sizes = []
+        self.requested = 0
+        self._positions: dict[bytes, int] = {}
+        self._data: list = None
+
+    def add(self, pubkeys: list[PublicKey], expected_size: int = EXPECTED_ACCOUNT_SIZE) -> FetchGroup:
+        """
+        Adds accounts to the plan
+
+        Args:
+            pubkeys (list[PublicKey]): Public keys of accounts to be loaded
+            expected_size (int, optional): Expected data size of these accounts (see load_multiple_bytes_data). Defaults to EXPECTED_ACCOUNT_SIZE.
+
+        Returns:
+            FetchGroup: FetchGroup object, to pass to get()
+        """
+        indices = []
+        for pubkey in pubkeys:
+            key = bytes(pubkey)
+            position = self._positions.get(key)
+            if(position is None):
+                position = len(self.pubkeys)
+                self._positions[key] = position
+                self.pubkeys.append(pubkey)
+                self.expected_sizes.append(expected_size)
+            else:
+                self.expected_sizes[position] = max(self.expected_sizes[position], expected_size)
+            indices.append(position)
+        self.requested += len(pubkeys)
+        return FetchGroup(tuple(indices))
+
+    @property
+    def fetches_saved(self):
+        """
+        Number of accounts not fetched because they were added more than once
+        """
+        return self.requested - len(self.pubkeys)
+
+    async def load(self, conn: AsyncClient, is_only_getting_data: bool = False):
+        """
+        Fetches every account of the plan (once each)
+
+        Args:
+            conn (AsyncClient): Solana AsyncClient object
+            is_only_getting_data (bool, optional): Only loads account data if true; gets all information otherwise. Defaults to False.
+        """
+        self._data = await load_multiple_bytes_data(conn, self.pubkeys, [], is_only_getting_data, self.expected_sizes)
+
+    def get(self, group: FetchGroup) -> list:
+        """
+        Returns the loaded accounts of a group, in the order they were added
+
+        Args:
+            group (FetchGroup): FetchGroup object returned by add()
+
+        Raises:
+            Exception: Plan not loaded
+
+        Returns:
+            list: Account of each public key of the group (None if the account does not exist)
+        """
+        if(self._data is None):
+            raise Exception('FetchPlan has not been loaded')
+        return [self._data[i] for i in group.indices]
 
 #TODO - calculate lamports required for transaction    
 async def sign_and_send_transaction_instructions(
@@ -120,11 +268,15 @@ async def sign_and_send_transaction_instructions(
     fee_payer: Keypair,
     tx_instructions: list[TransactionInstruction],
     send_options: TxOpts = None,
-    manual_max_retry: int = 0
+    manual_max_retry: int = 0,
+    on_error: Callable[[Exception], Any] = None,
 ):
     """
     Cryptographically signs transaction and sends onchain
 
+    The transaction is signed with the blockhash prefetched by client.blockhashes, so no request is made to get a blockhash.
+    Use send_options=FAST_SEND_OPTIONS (see constants.py) to also skip the preflight simulation and confirmation, sending the transaction in a single RPC call.
+
     Args:
         client (AverClient): AverClient object
         signers (list[Keypair]): List of signing keypairs
@@ -132,6 +284,7 @@ async def sign_and_send_transaction_instructions(
         tx_instructions (list[TransactionInstruction]): List of transaction instructions to pack into transaction to be sent
         send_options (TxOpts, optional): Options to specify when broadcasting a transaction. Defaults to None.
         manual_max_retry (int, optional): Number of times to retry a transaction if it fails. Defaults to 0
+        on_error (Callable[[Exception], Any], optional): Called with the error of each failed attempt. Defaults to None.
 
     Raises:
         error: COMING SOON
@@ -149,8 +302,13 @@ async def sign_and_send_transaction_instructions(
     attempts = 0
     while attempts <= manual_max_retry:
         try:
-            return await client.provider.connection.send_transaction(tx, *signers, opts=send_options)
+            recent_blockhash = await client.blockhashes.get()
+            return await client.provider.connection.send_transaction(tx, *signers, opts=send_options, recent_blockhash=recent_blockhash)
         except Exception as e:
+            if('Blockhash not found' in str(e)):
+                client.blockhashes.invalidate()
+            if(on_error is not None):
+                on_error(e)
             error = parse_error(e, client.programs[0])
             if(isinstance(error, ProgramError)):
                 raise error
@@ -159,6 +317,16 @@ async def sign_and_send_transaction_instructions(
                 
 
 
+# Tick size bands: a price is in the first band whose upper bound it does not exceed
+# Probability schema, prices in 6dp (e.g., 0.5 -> 500_000)
+PROBABILITY_TICK_MIN_PRICE = 1_000
+PROBABILITY_TICK_BOUNDS = [2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 990_000]
+PROBABILITY_TICK_SIZES = [100, 250, 500, 1_000, 2_500, 5_000, 10_000]
+# Decimal schema, prices in decimal odds (e.g., 0.5 -> 2.0)
+DECIMAL_TICK_MIN_PRICE = 1.01
+DECIMAL_TICK_BOUNDS = [2, 3, 4, 6, 10, 20, 30, 50, 100, 1000]
+DECIMAL_TICK_SIZES = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10]
+
 def calculate_probability_tick_size_for_price(limit_price: float):
     """
     Calculates probabilitytick size for specific price
@@ -173,25 +341,12 @@ def calculate_probability_tick_size_for_price(limit_price: float):
     Returns:
         int: Tick size
     """
-    if(limit_price < 1_000):
+    if(limit_price < PROBABILITY_TICK_MIN_PRICE):
         raise Exception('Limit price too low')
-    if(limit_price <= 2_000):
-        return 100
-    if(limit_price <= 5_000):
-        return 250
-    if(limit_price <= 10_000):
-        return 500
-    if(limit_price <= 20_000):
-        return 1_000
-    if(limit_price <= 50_000):
-        return 2_500
-    if(limit_price <= 100_000):
-        return 5_000
-    if(limit_price <= 990_000):
-        return 10_000
-    if(limit_price > 990_000):
+    band = bisect_left(PROBABILITY_TICK_BOUNDS, limit_price)
+    if(band == len(PROBABILITY_TICK_BOUNDS)):
         raise Exception('Limit price too high')
-    return limit_price
+    return PROBABILITY_TICK_SIZES[band]
 
 
 def calculate_decimal_tick_size_for_price(
@@ -210,31 +365,12 @@ def calculate_decimal_tick_size_for_price(
     Returns:
         int: Tick size
     """
-    if(limit_price_decimal < 1.01):
+    if(limit_price_decimal < DECIMAL_TICK_MIN_PRICE):
         raise Exception('Limit price too low')
-    if(limit_price_decimal <= 2):
-        return 0.01
-    if(limit_price_decimal <= 3):
-        return 0.02
-    if(limit_price_decimal <= 4):
-        return 0.05
-    if(limit_price_decimal <= 6):
-        return 0.1
-    if(limit_price_decimal <= 10):
-        return 0.2
-    if(limit_price_decimal <= 20):
-        return 0.5
-    if(limit_price_decimal <= 30):
-        return 1
-    if(limit_price_decimal <= 50):
-        return 2
-    if(limit_price_decimal <= 100):
-        return 5
-    if(limit_price_decimal <= 1000):
-        return 10
-    if(limit_price_decimal > 1000):
+    band = bisect_left(DECIMAL_TICK_BOUNDS, limit_price_decimal)
+    if(band == len(DECIMAL_TICK_BOUNDS)):
         raise Exception('Limit price too high')
-    return limit_price_decimal
+    return DECIMAL_TICK_SIZES[band]
 
 
 class RoundingDirection(enum.Enum):
@@ -341,40 +477,203 @@ def round_price_to_nearest_decimal_tick_size(
         return rounded_limit_price
 
 
+def _tick_sizes(prices: np.ndarray, min_price: float, bounds: list, tick_sizes: list):
+    """Vectorized calculate_*_tick_size_for_price"""
+    if((prices < min_price).any()):
+        raise Exception('Limit price too low')
+    bands = np.searchsorted(bounds, prices, side='left')
+    if((bands == len(bounds)).any()):
+        raise Exception('Limit price too high')
+    return np.asarray(tick_sizes, dtype=np.float64)[bands]
+
+
+def _approximate_prices(tick_sizes: np.ndarray, limit_prices: np.ndarray, direction: RoundingDirection):
+    """Vectorized approximate_price"""
+    if direction is RoundingDirection.ROUND:
+        # Round half to even, like round()
+        rounded = np.round(limit_prices / tick_sizes)
+    elif direction is RoundingDirection.UP:
+        rounded = np.ceil(limit_prices / tick_sizes)
+    else:
+        rounded = np.floor(limit_prices / tick_sizes)
+    return rounded * tick_sizes
+
+
+def round_prices(
+    limit_prices,
+    price_schema: PriceRoundingFormat,
+    direction: RoundingDirection = RoundingDirection.ROUND,
+    binary_flag: bool = False
+):
+    """
+    Rounds many prices at once to the nearest tick size available
+
+    Vectorized round_price_to_nearest_probability_tick_size / round_price_to_nearest_decimal_tick_size, giving identical results
+
+    Args:
+        limit_prices (array_like): Limit prices (in probability format)
+        price_schema (PriceRoundingFormat): Price schema whose ticks are used
+        direction (RoundingDirection, optional): Rounding direction. Defaults to RoundingDirection.ROUND.
+        binary_flag (bool, optional): Prices above 0.5 use the ticks of the opposite outcome. Defaults to False.
 
-def parse_user_market_state(buffer: bytes, aver_client: AverClient, program: Program = None):
+    Raises:
+        Exception: Limit price too low
+        Exception: Limit price too high
+
+    Returns:
+        np.ndarray: Rounded limit prices (in probability format)
+    """
+    limit_prices = np.asarray(limit_prices, dtype=np.float64)
+
+    if price_schema == PriceRoundingFormat.PROBABILITY:
+        clamped = (limit_prices < 0.001) | (limit_prices > 0.999)
+        limit_prices_to_6dp = np.where(clamped, 500_000, limit_prices * 10 ** 6)
+        mirrored = binary_flag & (limit_prices_to_6dp > 500_000)
+        tick_sizes = _tick_sizes(
+            np.where(mirrored, 1_000_000 - limit_prices_to_6dp, limit_prices_to_6dp),
+            PROBABILITY_TICK_MIN_PRICE,
+            PROBABILITY_TICK_BOUNDS,
+            PROBABILITY_TICK_SIZES,
+        )
+        rounded = _approximate_prices(tick_sizes, limit_prices_to_6dp, direction) / 10 ** 6
+        return np.where(limit_prices < 0.001, 0.001, np.where(limit_prices > 0.999, 0.999, rounded))
+
+    upper, lower = 1 / 1.01, 1 / 1_000
+    clamped = (limit_prices > upper) | (limit_prices < lower)
+    safe_limit_prices = np.where(clamped, 0.25, limit_prices)
+    decimal_limit_prices = 1 / safe_limit_prices
+    mirrored = binary_flag & (decimal_limit_prices < 2.0)
+    # Inverted decimal price of the opposite outcome where mirrored
+    decimal_prices = np.where(mirrored, 1 / (1 - np.where(mirrored, safe_limit_prices, 0)), decimal_limit_prices)
+    tick_sizes = _tick_sizes(decimal_prices, DECIMAL_TICK_MIN_PRICE, DECIMAL_TICK_BOUNDS, DECIMAL_TICK_SIZES)
+    rounded_decimal_prices = _approximate_prices(tick_sizes, decimal_prices, direction)
+    rounded_decimal_prices = np.where(mirrored, 1.0 / (1.0 - (1.0 / rounded_decimal_prices)), rounded_decimal_prices)
+    return np.where(limit_prices > upper, upper, np.where(limit_prices < lower, lower, 1 / rounded_decimal_prices))
+
+
+def _build_tick_ladder(price_schema: PriceRoundingFormat, binary_flag: bool):
+    """
+    All prices (in probability format, ascending) rounding can return for a price schema
+
+    These are the prices left unchanged by rounding, the bounds prices outside the range are clamped to,
+    and the ticks just outside the range that prices at its bounds round to
+    """
+    if price_schema == PriceRoundingFormat.PROBABILITY:
+        prices_6dp = []
+        lower = PROBABILITY_TICK_MIN_PRICE - PROBABILITY_TICK_SIZES[0]
+        for upper, tick_size in zip(PROBABILITY_TICK_BOUNDS, PROBABILITY_TICK_SIZES):
+            prices_6dp += range(lower + tick_size, upper + 1, tick_size)
+            lower = upper
+        if binary_flag:
+            lower_half = [p for p in prices_6dp if p <= 500_000]
+            prices_6dp = lower_half + [1_000_000 - p for p in lower_half if p < 500_000]
+        return _add_range_bounds(set(p / 10 ** 6 for p in prices_6dp), price_schema, binary_flag, 0.001, 0.999)
+
+    # Decimal prices built as (number of ticks) * tick size, as approximate_price does
+    decimal_prices = []
+    lower = DECIMAL_TICK_MIN_PRICE - DECIMAL_TICK_SIZES[0]
+    for upper, tick_size in zip(DECIMAL_TICK_BOUNDS, DECIMAL_TICK_SIZES):
+        decimal_prices += [n * tick_size for n in range(round(lower / tick_size) + 1, round(upper / tick_size) + 1)]
+        lower = upper
+    prices = [1 / d for d in decimal_prices if not binary_flag or d >= 2.0]
+    if binary_flag:
+        prices += [1 / (1.0 / (1.0 - (1.0 / d))) for d in decimal_prices if d > 2.0]
+    return _add_range_bounds(set(prices), price_schema, binary_flag, 1 / 1_000, 1 / 1.01)
+
+
+def _add_range_bounds(prices: set, price_schema: PriceRoundingFormat, binary_flag: bool, lower: float, upper: float):
+    """Keeps the prices within the range rounding clamps to, adding the bounds and what the bounds round to"""
+    prices = {p for p in prices if lower <= p <= upper} | {lower, upper}
+    for direction in RoundingDirection:
+        for bound in [lower, upper]:
+            try:
+                prices.add(float(round_prices(bound, price_schema, direction, binary_flag)))
+            except Exception:
+                # Bounds outside the ticks (e.g., 0.999 without the binary flag) are only returned clamped
+                pass
+    return sorted(prices)
+
+
+TICK_LADDERS = {
+    (price_schema, binary_flag): _build_tick_ladder(price_schema, binary_flag)
+    for price_schema in [PriceRoundingFormat.PROBABILITY, PriceRoundingFormat.DECIMAL]
+    for binary_flag in [False, True]
+}
+"""
+Prices rounding can return (in probability format, ascending) for each (price schema, binary flag)
+"""
+
+
+def next_tick_up(limit_price: float, price_schema: PriceRoundingFormat, binary_flag: bool = False):
+    """
+    Gets the lowest valid price strictly above a price
+
+    Args:
+        limit_price (float): Limit price (in probability format)
+        price_schema (PriceRoundingFormat): Price schema whose ticks are used
+        binary_flag (bool, optional): Prices above 0.5 use the ticks of the opposite outcome. Defaults to False.
+
+    Returns:
+        float: Next price (in probability format), None if there is no valid price above
+    """
+    ladder = TICK_LADDERS[(price_schema, binary_flag)]
+    index = bisect_right(ladder, limit_price)
+    return ladder[index] if index < len(ladder) else None
+
+
+def next_tick_down(limit_price: float, price_schema: PriceRoundingFormat, binary_flag: bool = False):
+    """
+    Gets the highest valid price strictly below a price
+
+    Args:
+        limit_price (float): Limit price (in probability format)
+        price_schema (PriceRoundingFormat): Price schema whose ticks are used
+        binary_flag (bool, optional): Prices above 0.5 use the ticks of the opposite outcome. Defaults to False.
+
+    Returns:
+        float: Previous price (in probability format), None if there is no valid price below
+    """
+    ladder = TICK_LADDERS[(price_schema, binary_flag)]
+    index = bisect_left(ladder, limit_price)
+    return ladder[index - 1] if index > 0 else None
+
+
+
+def parse_user_market_state(buffer: bytes, aver_client: AverClient, program: Program = None, pubkey: PublicKey = None):
         """
         Parses raw onchain data to UserMarketState object        
         Args:
             buffer (bytes): Raw bytes coming from onchain
             aver_client (AverClient): AverClient object
             program (Program, optional): Anchor Program. Defaults to first program in client.
+            pubkey (PublicKey, optional): Account public key, decoded objects are reused from aver_client.decode_cache if provided. Defaults to None.
 
         Returns:
             UserMarket: UserMarketState object
         """
         if(program is None):
             program = aver_client.programs[0]
-        return parse_with_version(program, AccountTypes.USER_MARKET, buffer)
+        return parse_with_version(program, AccountTypes.USER_MARKET, buffer, pubkey, aver_client.decode_cache)
 
 
-def parse_market_state(buffer: bytes, aver_client: AverClient, program: Program = None):
+def parse_market_state(buffer: bytes, aver_client: AverClient, program: Program = None, pubkey: PublicKey = None):
         """
         Parses raw onchain data to MarketState object        
         Args:
             buffer (bytes): Raw bytes coming from onchain
             aver_client (AverClient): AverClient object
             program (Program, optional): Anchor Program. Defaults to first program in client.
+            pubkey (PublicKey, optional): Account public key, decoded objects are reused from aver_client.decode_cache if provided. Defaults to None.
 
         Returns:
             MarketState: MarketState object
         """
         if(program is None):
             program = aver_client.programs[0]
-        return parse_with_version(program, AccountTypes.MARKET, buffer)
+        return parse_with_version(program, AccountTypes.MARKET, buffer, pubkey, aver_client.decode_cache)
 
 
-def parse_market_store(buffer: bytes, aver_client: AverClient, program = None):
+def parse_market_store(buffer: bytes, aver_client: AverClient, program = None, pubkey: PublicKey = None):
         """
         Parses onchain data for a MarketStore State
 
@@ -382,17 +681,18 @@ def parse_market_store(buffer: bytes, aver_client: AverClient, program = None):
             buffer (bytes): Raw bytes coming from onchain
             aver_client (AverClient): AverClient
             program (Program, optional): Anchor Program. Defaults to first program in client.
+            pubkey (PublicKey, optional): Account public key, decoded objects are reused from aver_client.decode_cache if provided. Defaults to None.
 
         Returns:
             MarketStore: MarketStore object
         """
         if(program is None):
             program = aver_client.programs[0]
-        return parse_with_version(program, AccountTypes.MARKET_STORE, buffer)
+        return parse_with_version(program, AccountTypes.MARKET_STORE, buffer, pubkey, aver_client.decode_cache)
 
 
 
-def parse_user_host_lifetime_state(aver_client: AverClient, buffer, program: Program=None):
+def parse_user_host_lifetime_state(aver_client: AverClient, buffer, program: Program=None, pubkey: PublicKey = None):
         """
         Parses raw onchain data to UserHostLifetime object
 
@@ -400,13 +700,14 @@ def parse_user_host_lifetime_state(aver_client: AverClient, buffer, program: Pro
             aver_client (AverClient): AverClient object
             buffer (bytes): Raw bytes coming from onchain
             program (Program, optional): Anchor Program. Defaults to first program in client.
+            pubkey (PublicKey, optional): Account public key, decoded objects are reused from aver_client.decode_cache if provided. Defaults to None.
 
         Returns:
             UserHostLifetime: UserHostLifetime object
         """
         if(program is None):
             program = aver_client.programs[0]
-        return parse_with_version(program, AccountTypes.USER_HOST_LIFETIME, buffer)
+        return parse_with_version(program, AccountTypes.USER_HOST_LIFETIME, buffer, pubkey, aver_client.decode_cache)
 
 async def load_multiple_account_states(
         aver_client: AverClient,
@@ -422,6 +723,10 @@ async def load_multiple_account_states(
 
         Used in refresh.py to quckly and efficiently pull all account data at once
 
+        If aver_client has a decode_cache, accounts whose data has not changed since they were last decoded are not decoded again
+
+        If aver_client has a decode_executor, accounts are decoded in it instead of on the event loop
+
         Args:
             aver_client (AverClient): AverClient object
             market_pubkeys (list[PublicKey]): List of MarketState object public keys
@@ -432,67 +737,60 @@ async def load_multiple_account_states(
             uhl_pubkeys(list[PublicKey], optional): List of UserHostLifetime public keys. Defaults to []
 
         Returns:
-            dict[str, list]: Dictionary containing `market_states`, `market_stores`, `slabs`, `user_market_states`, `user_balance_sheets`, `program_ids`
+            dict[str, list]: Dictionary containing `market_states`, `market_stores`, `slabs`, `user_market_states`, `user_balance_sheets`, `program_ids` and `fetches_saved` (number of duplicate accounts not fetched)
         """
         all_ata_pubkeys = [get_associated_token_address(u, aver_client.quote_token) for u in user_pubkeys]
 
-        all_pubkeys = market_pubkeys + market_store_pubkeys + user_market_pubkeys + uhl_pubkeys +  slab_pubkeys + user_pubkeys + all_ata_pubkeys 
-        data = await load_multiple_bytes_data(aver_client.provider.connection, all_pubkeys, [], False)
-        programs = await gather(*[aver_client.get_program_from_program_id(PublicKey(d['owner'] if d else AVER_PROGRAM_IDS[0])) for d in data[0: len(market_pubkeys) + len(market_store_pubkeys) + len(user_market_pubkeys)]])
-       
-        deserialized_market_state = []
-        for index, m in enumerate(market_pubkeys):
-            buffer = data[index]
-            deserialized_market_state.append(parse_market_state(buffer['data'], aver_client, programs[index]))
-        
-        deserialized_market_store = []
-        for index, m in enumerate(market_pubkeys):
-            buffer = data[index + len(market_pubkeys)]
-            if(buffer is None):
-                deserialized_market_store.append(None)
-                continue
-            deserialized_market_store.append(parse_market_store(buffer['data'], aver_client, programs[index]))
-
-        deserialized_uma_data = []
-        if(user_market_pubkeys is not None):
-            for index, u in enumerate(user_market_pubkeys):
-                buffer = data[index + len(market_pubkeys) + len(market_store_pubkeys)]
-                if(buffer is None):
-                    deserialized_uma_data.append(None)
-                    continue
-                deserialized_uma_data.append(parse_user_market_state(buffer['data'], aver_client, programs[index]))
-        
-        uhl_states = []
-        for index, pubkey in enumerate(uhl_pubkeys):
-            buffer = data[index + len(market_pubkeys) + len(market_store_pubkeys) + len(user_market_pubkeys)]
-            if(buffer is None):
-                uhl_states.append(None)
-                continue
-            uhl_state = parse_user_host_lifetime_state(aver_client, buffer['data'], programs[index])
-            uhl_states.append(uhl_state)
-
-        deserialized_slab_data = []
-        for index, s in enumerate(slab_pubkeys):
-            buffer = data[index + len(market_pubkeys) + len(market_store_pubkeys) + len(user_market_pubkeys) + len(uhl_pubkeys)]
-            if(buffer is None):
-                deserialized_slab_data.append(None)
-                continue
-            deserialized_slab_data.append(Slab.from_bytes(buffer['data']))
+        # Accounts shared between users or markets (e.g., the same owner, ATA or UserHostLifetime) are fetched once
+        plan = FetchPlan()
+        market_group = plan.add(market_pubkeys)
+        market_store_group = plan.add(market_store_pubkeys)
+        user_market_group = plan.add(user_market_pubkeys)
+        uhl_group = plan.add(uhl_pubkeys)
+        slab_group = plan.add(slab_pubkeys, EXPECTED_SLAB_ACCOUNT_SIZE)
+        user_group = plan.add(user_pubkeys)
+        ata_group = plan.add(all_ata_pubkeys)
+        await plan.load(aver_client.provider.connection)
+
+        owned_by_programs = plan.get(market_group) + plan.get(market_store_group) + plan.get(user_market_group)
+        programs = await gather(*[aver_client.get_program_from_program_id(PublicKey(d['owner'] if d else AVER_PROGRAM_IDS[0])) for d in owned_by_programs])
+
+        async def decode(kind, group: FetchGroup, pubkeys: list[PublicKey]):
+            # Accounts added more than once are decoded once
+            first_positions = {}
+            for i, position in enumerate(group.indices):
+                first_positions.setdefault(position, i)
+            unique = list(first_positions.values())
+            data = plan.get(group)
+            decoded = await decode_accounts(
+                [programs[i] for i in unique] if kind != SLAB_KIND else None,
+                kind,
+                [data[i]['data'] if data[i] is not None else None for i in unique],
+                [pubkeys[i] for i in unique],
+                aver_client.decode_cache,
+                aver_client.decode_executor,
+            )
+            decoded_by_position = {group.indices[i]: d for i, d in zip(unique, decoded)}
+            return [decoded_by_position[position] for position in group.indices]
+
+        deserialized_market_state, deserialized_market_store, deserialized_uma_data, uhl_states, deserialized_slab_data = await gather(
+            decode(AccountTypes.MARKET, market_group, market_pubkeys),
+            decode(AccountTypes.MARKET_STORE, market_store_group, market_store_pubkeys),
+            decode(AccountTypes.USER_MARKET, user_market_group, user_market_pubkeys),
+            decode(AccountTypes.USER_HOST_LIFETIME, uhl_group, uhl_pubkeys),
+            decode(SLAB_KIND, slab_group, slab_pubkeys),
+        )
 
         lamport_balances = []
-        if(user_pubkeys is not None):
-            for index, pubkey in enumerate(user_pubkeys):
-                balance = data[index + len(market_pubkeys) + len(market_store_pubkeys) + len(user_market_pubkeys) + len(uhl_pubkeys) + len(slab_pubkeys)]
-                lamport_balances.append(balance['lamports'] if balance and balance['lamports'] is not None else 0)
+        for balance in plan.get(user_group):
+            lamport_balances.append(balance['lamports'] if balance and balance['lamports'] is not None else 0)
 
         token_balances = []
-        if(all_ata_pubkeys is not None):
-            for index, pubkey in enumerate(all_ata_pubkeys):
-                buffer = data[index + len(market_pubkeys) + len(market_store_pubkeys) + len(user_market_pubkeys) + len(uhl_pubkeys) + len(slab_pubkeys) + len(user_pubkeys)]
-                if(buffer is not None and len(buffer['data']) == ACCOUNT_LEN):
-                    token_balances.append(ACCOUNT_LAYOUT.parse(buffer['data'])['amount'])
-                else:
-                    token_balances.append(0)
+        for buffer in plan.get(ata_group):
+            if(buffer is not None and len(buffer['data']) == ACCOUNT_LEN):
+                token_balances.append(ACCOUNT_LAYOUT.parse(buffer['data'])['amount'])
+            else:
+                token_balances.append(0)
 
         user_balance_states = []
         for index, x in enumerate(lamport_balances):
@@ -506,7 +804,8 @@ async def load_multiple_account_states(
             'user_market_states': deserialized_uma_data,
             'user_balance_states': user_balance_states,
             'user_host_lifetime_states': uhl_states,
-            'program_ids': [p.program_id for p in programs[0: len(market_pubkeys)]]
+            'program_ids': [p.program_id for p in programs[0: len(market_pubkeys)]],
+            'fetches_saved': plan.fetches_saved,
         }
 
 def is_market_tradeable(market_status: MarketStatus):
@@ -538,7 +837,7 @@ def can_cancel_order_in_market(market_status: MarketStatus):
         MarketStatus.HALTED_PRE_EVENT
     ]
 
-async def fetch_with_version(conn: AsyncClient, program: Program, account_type: AccountTypes, pubkey: PublicKey):
+async def fetch_with_version(conn: AsyncClient, program: Program, account_type: AccountTypes, pubkey: PublicKey, decode_cache: DecodeCache = None):
     """
     Fetches from onchain taking into account Aver Version
 
@@ -547,16 +846,17 @@ async def fetch_with_version(conn: AsyncClient, program: Program, account_type:
         program (Program): AnchorPy Program
         account_type (AccountTypes): Account Type (e.g., MarketStore)
         pubkey (PublicKey): Public key to fetch
+        decode_cache (DecodeCache, optional): Cache of decoded accounts. Defaults to None.
 
     Returns:
         Container: Parsed and fetched object
     """
     bytes = await load_bytes_data(conn, pubkey)
     #9th byte contains version
-    return parse_with_version(program, account_type, bytes)
+    return parse_with_version(program, account_type, bytes, pubkey, decode_cache)
 
 
-async def fetch_multiple_with_version(conn: AsyncClient, program: Program, account_type: AccountTypes, pubkeys: list[PublicKey]):
+async def fetch_multiple_with_version(conn: AsyncClient, program: Program, account_type: AccountTypes, pubkeys: list[PublicKey], decode_cache: DecodeCache = None):
     """
     Fetches from onchain taking into account Aver Version
 
@@ -565,6 +865,7 @@ async def fetch_multiple_with_version(conn: AsyncClient, program: Program, accou
         program (Program): AnchorPy Program
         account_type (AccountTypes): Account Type (e.g., MarketStore)
         pubkeys (list[PublicKey]): Public key to fetch
+        decode_cache (DecodeCache, optional): Cache of decoded accounts. Defaults to None.
 
     Returns:
         list[Container]: Parsed and fetched objects
@@ -573,43 +874,38 @@ async def fetch_multiple_with_version(conn: AsyncClient, program: Program, accou
 
     accounts = []
     for i, d in enumerate(bytes):
-        accounts.append(parse_with_version(program, account_type, d))
+        accounts.append(parse_with_version(program, account_type, d, pubkeys[i], decode_cache))
     
     return accounts
 
-def parse_with_version(program: Program, account_type: AccountTypes, bytes: bytes):
+def parse_with_version(program: Program, account_type: AccountTypes, bytes: bytes, pubkey: PublicKey = None, decode_cache: DecodeCache = None):
     """
     Parses objects taking into account the Aver Version.
 
-    Rewrites first 8 bytes of discriminator
+    Old versions are decoded with the layout of their version, as the discriminator is the one of the latest version
+
+    If a pubkey and decode_cache are provided, an object previously decoded from the same bytes is returned instead of decoding again.
 
     Args:
         program (Program): AnchorPy Program
         account_type (AccountTypes): Account Type (e.g., MarketStore)
         bytes (bytes): Raw bytes data
+        pubkey (PublicKey, optional): Account public key. Defaults to None.
+        decode_cache (DecodeCache, optional): Cache of decoded accounts. Defaults to None.
 
     Returns:
         Container: Parsed object
     """
-    #Version is 9th byte
-    version = bytes[8]
+    if(pubkey is not None and decode_cache is not None):
+        return decode_cache.get_or_decode(
+            pubkey,
+            (account_type, str(program.program_id)),
+            bytes,
+            lambda data: parse_with_version(program, account_type, data),
+        )
 
-    #Latest version according to program
-    latest_version = get_version_of_account_type_in_program(account_type, program)
-    
-    #Checks if this is reading the correct version OR if it is not possible to read an old version
-    if(version == latest_version or program.account.get(f'{account_type.value}V{version}') is None):
-        return program.account[f'{account_type.value}'].coder.accounts.decode(bytes)
-    else:
-        #Reads old version
-        print(f'THE {account_type} BEING READ HAS NOT BEEN UPDATED TO THE LATEST VERSION')
-        print('PLEASE CALL THE UPDATE INSTRUCTION FOR THE CORRESPONDING ACCOUNT TYPE TO RECTIFY, IF POSSIBLE')
-        #We need to replace the discriminator on the bytes data to prevent anchor errors
-        account_discriminator = get_account_discriminator(account_type, version, latest_version)
-        new_bytes = bytearray(bytes)
-        for i, a in enumerate(account_discriminator):
-            new_bytes[i] = a
-        return program.account[f'{account_type.value}V{version}'].coder.accounts.decode(new_bytes)
+    #Decoders of every version are compiled once per program, picked by the version (9th byte)
+    return get_account_decoders(program).decode(account_type, bytes)
 
 
 def get_account_discriminator(account_type: AccountTypes, version: int, latest_version: int):
@@ -628,13 +924,5 @@ def get_account_discriminator(account_type: AccountTypes, version: int, latest_v
 
 #Latest version according to the program
 def get_version_of_account_type_in_program(account_type: AccountTypes, program: Program):
-    version = 0
-    while True:
-        account = program.account.get(f'{account_type.value}V{version}')
-        if(account is None):
-            break
-        else:
-            version = version + 1
-    
-    return version
+    return get_account_decoders(program).latest_versions.get(account_type, 0)
 
@@ -4,6 +4,8 @@
 import json
 import os
 import re
+from functools import lru_cache
+from weakref import WeakKeyDictionary
 from .constants import USER_FACING_INSTRUCTIONS_TO_CHECK_IN_IDL
 
 from anchorpy import Program
@@ -23,6 +25,9 @@ def camel_to_snake(name: str):
     name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
 
+# The IDL files shipped with the SDK never change while running, each one is only read and parsed once.
+# Callers must not modify the returned dict
+@lru_cache(maxsize=None)
 def load_idl_from_json(program_id: str):
     file_path = os.path.join(os.path.dirname(__file__), f'idl/{program_id}.json')
     try:
@@ -99,7 +104,13 @@ def get_differences_between_idl_and_program_instruction(file_instruction, progra
 
     return are_they_the_same
 
+# Instructions of each program which passed check_if_instruction_is_out_of_date_with_idl, they are not compared again
+_up_to_date_instructions: WeakKeyDictionary = WeakKeyDictionary()
+
 def check_if_instruction_is_out_of_date_with_idl(instruction: str, program: Program):
+    up_to_date = _up_to_date_instructions.setdefault(program, set())
+    if(instruction in up_to_date):
+        return
     file_idl = load_idl_from_json(program.program_id.__str__())
     if(file_idl is None):
         print('CANNOT FIND IDL FOR THIS PROGRAM_ID IN PRE-FLIGHT CHECK')
@@ -116,4 +127,5 @@ def check_if_instruction_is_out_of_date_with_idl(instruction: str, program: Prog
         print('THE FOLLOWING ACCOUNTS / ARGUMENTS ARE INCORRECT: ')
         [print(d) for d in differences]
         raise Exception('SDK VERSION OUT OF DATE')
+    up_to_date.add(instruction)
 